@@ -0,0 +1,18 @@
+# Generated by Django 5.2.11 on 2026-10-18 18:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("billing", "0004_rename_billing_ammount_billing_billing_amount"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="billing",
+            index=models.Index(fields=["transaction_date"], name="billing_date_idx"),
+        ),
+    ]
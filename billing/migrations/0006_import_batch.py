@@ -0,0 +1,20 @@
+# Generated by Django 5.2.11 on 2026-10-18 18:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0005_billing_date_idx'),
+        ('kurasel_translator', '0002_import_batch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='billing',
+            name='import_batch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='kurasel_translator.importbatch', verbose_name='取り込みバッチ'),
+        ),
+    ]
@@ -1,6 +1,8 @@
 import datetime
 import logging
 
+from common.period import Period
+from common.querysets import PeriodQuerySet
 from django.contrib.auth import get_user_model
 from django.db import models
 from django.utils import timezone
@@ -42,6 +44,12 @@ class BillingItem(models.Model):
         return qs
 
 
+class BillingQuerySet(PeriodQuerySet):
+    """請求合計金額内訳データのQuerySet"""
+
+    period_field = "transaction_date"
+
+
 class Billing(models.Model):
     """請求データ
     - transaction_date: 取引月
@@ -59,6 +67,26 @@ class Billing(models.Model):
     comment = models.CharField("備考", max_length=64, blank=True, default="")
     author = models.ForeignKey(user, verbose_name="記録者", on_delete=models.CASCADE, null=True)
     created_date = models.DateTimeField(verbose_name="作成日", default=timezone.now)
+    # Kuraselからの取り込みで登録・更新したバッチ（取り込みの取り消しに使う）
+    import_batch = models.ForeignKey(
+        "kurasel_translator.ImportBatch",
+        verbose_name="取り込みバッチ",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+
+    objects = BillingQuerySet.as_manager()
+
+    class Meta:
+        """インデックス
+        - get_billing_data_qs()の取引月の期間での抽出用。
+        """
+
+        indexes = [
+            models.Index(fields=["transaction_date"], name="billing_date_idx"),
+        ]
 
     def __str__(self):
         return self.billing_item.item_name
@@ -68,7 +96,7 @@ class Billing(models.Model):
         """請求合計金額内訳データの抽出を行う"""
 
         qs_billing = cls.objects.select_related("billing_item")
-        qs_billing = qs_billing.filter(transaction_date__range=[tstart, tend])
+        qs_billing = qs_billing.in_period(Period.between(tstart, tend))
         return qs_billing
 
     @staticmethod
@@ -80,9 +108,20 @@ class Billing(models.Model):
                 total_billing += data.billing_amount
         return total_billing
 
+    @classmethod
+    def get_kurasel_amounts(cls, year, month):
+        """取引月の登録済みデータの{請求合計金額内訳名: 金額}を返す（確認モードの差分表示用）"""
+        ymd = datetime.date(int(year), int(month), 1)
+        qs = cls.objects.filter(transaction_date=ymd).values_list("billing_item__item_name", "billing_amount")
+        return dict(qs)
+
     @classmethod
     def billing_from_kurasel(cls, data):
-        """請求合計金額内訳データの保存処理を行う"""
+        """請求合計金額内訳データの保存処理を行う
+        - data["data_list"]は請求合計金額内訳のレコード（kurasel_translatorのBillingRecord）のリスト。
+        - 金額が同じ登録済みのデータは更新しない。
+        - data["import_batch"]: 登録・更新するデータに設定する取り込みバッチ（省略可）。
+        """
 
         # 取引月
         date_str = str(data["year"]) + "-" + str(data["month"]) + "-" + "01"
@@ -94,23 +133,28 @@ class Billing(models.Model):
         rtn = True
         for item in data["data_list"]:
             # Kuraselの費目名と一致する費目オブジェクトを得る
-            billingitem_id = BillingItem.get_billingitem_obj(item[0])
+            billingitem_id = BillingItem.get_billingitem_obj(item.item_name)
             if billingitem_id is None:
                 return False, [
-                    "請求合計金額内訳名「" + item[0] + "」がマスタデータに登録されていません。",
+                    "請求合計金額内訳名「" + item.item_name + "」がマスタデータに登録されていません。",
                 ]
             try:
+                if cls.objects.filter(
+                    transaction_date=ymd, billing_item=billingitem_id, billing_amount=item.amount, comment=""
+                ).exists():
+                    continue
                 cls.objects.update_or_create(
                     transaction_date=ymd,
                     billing_item=billingitem_id,
                     defaults={
-                        "billing_amount": int(item[1]),
+                        "billing_amount": item.amount,
                         "comment": "",
                         "author": author_obj,
+                        "import_batch": data.get("import_batch"),
                     },
                 )
             except Exception as e:
                 logger.error(e)
-                error_list.append(item[0])
+                error_list.append(item.item_name)
                 rtn = False
         return rtn, error_list
@@ -1,4 +1,5 @@
 from common.mixins import PeriodParamMixin
+from common.response_cache import ReportCacheMixin
 from common.services import select_period
 from django.contrib.auth.mixins import PermissionRequiredMixin
 from django.views.generic import TemplateView
@@ -7,7 +8,7 @@ from passbook.forms import YearMonthALLForm
 from .models import Billing
 
 
-class BillingListView(PeriodParamMixin, PermissionRequiredMixin, TemplateView):
+class BillingListView(ReportCacheMixin, PeriodParamMixin, PermissionRequiredMixin, TemplateView):
     """請求合計金額内訳リスト
     - PeriodParamMixinを継承してget_year_month_params()を呼び出す。
     """
@@ -1,5 +1,6 @@
 import logging
 
+from common.ledger_version import bump_years
 from control.models import ControlRecord
 from django.contrib import messages
 from django.contrib.auth.mixins import PermissionRequiredMixin
@@ -232,6 +233,7 @@ class DuplicateBudgetView(PermissionRequiredMixin, generic.FormView):
                 )
                 new_budget.append(budget)
             ExpenseBudget.objects.bulk_create(new_budget)
+            bump_years(target_year)
         return redirect(self.get_success_url())
 
 
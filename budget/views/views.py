@@ -1,6 +1,7 @@
 import logging
 
 from common.mixins import PeriodParamMixin
+from common.response_cache import ReportCacheMixin
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import TemplateView
 
@@ -10,7 +11,7 @@ from budget.services import get_budget_vs_actual
 logger = logging.getLogger(__name__)
 
 
-class BudgetListView(PeriodParamMixin, LoginRequiredMixin, TemplateView):
+class BudgetListView(ReportCacheMixin, PeriodParamMixin, LoginRequiredMixin, TemplateView):
     """会計支出の予算・実績対比表
     - PeriodParamMixinを継承してget_year_month_params()を呼び出す。
     """
@@ -1,3 +1,24 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import AuditResult, BillingItemAlias, HimokuAlias
+
+
+class AuditResultAdmin(admin.ModelAdmin):
+    list_display = ["check_name", "year", "month", "fingerprint", "updated_date"]
+    list_filter = ["check_name", "year"]
+    ordering = ("year", "month", "check_name")
+
+
+class HimokuAliasAdmin(admin.ModelAdmin):
+    list_display = ["alias_name", "himoku_name", "comment"]
+
+
+class BillingItemAliasAdmin(admin.ModelAdmin):
+    list_display = ["billing_item", "himoku", "is_learned", "created_date"]
+    list_filter = ["is_learned"]
+    ordering = ("billing_item__code",)
+
+
+admin.site.register(AuditResult, AuditResultAdmin)
+admin.site.register(HimokuAlias, HimokuAliasAdmin)
+admin.site.register(BillingItemAlias, BillingItemAliasAdmin)
@@ -0,0 +1,108 @@
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from common.cache import require_shared_cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from check_record.services.audit_service import CHECKS, audit_month, audit_months
+from check_record.services.audit_store import get_audit_results
+
+CSV_FIELDS = ["year", "month", "check", "total_mr", "total_pb", "diff", "mismatch_count"]
+
+
+def _init_worker():
+    """ワーカープロセスの初期化（親プロセスのDB接続は使わない）"""
+    django.setup()
+    connections.close_all()
+
+
+def _audit_task(task):
+    year, month, checks = task
+    return audit_month(year, month, checks)
+
+
+class Command(BaseCommand):
+    """チェック画面（収入・支出・不整合・請求金額・支払い承認）の全チェックを年間分まとめて実行する
+    - 保存済みのチェック結果（AuditResult）は、入力データが変わっていなければ再計算しない（--forceで全て再計算）。
+    - 再計算する月の処理を複数プロセスで並列に実行する（--workers 1の場合は並列にしない）。
+    - 月毎・チェック毎の合計と差額をJSONまたはCSVで出力する。
+    - 再計算したチェック毎の処理時間の合計を標準エラー出力に表示する。
+    """
+
+    help = "指定した年（範囲）の全チェックを月毎に実行して、結果をJSON/CSVで出力する"
+
+    def add_arguments(self, parser):
+        parser.add_argument("year", type=int, help="対象年（--to-yearを指定した場合は開始年）")
+        parser.add_argument("--to-year", type=int, help="終了年")
+        parser.add_argument("--format", choices=["json", "csv"], default="json", help="出力形式")
+        parser.add_argument("--output", help="出力ファイル（省略時は標準出力）")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="プロセス数")
+        parser.add_argument("--force", action="store_true", help="保存済みの結果を使わずに全て再計算する")
+
+    def handle(self, *args, **options):
+        require_shared_cache()
+        start_year = options["year"]
+        end_year = options["to_year"] or start_year
+        if end_year < start_year:
+            raise CommandError("--to-yearには開始年以降の年を指定してください。")
+        periods = audit_months(start_year, end_year)
+        if not periods:
+            raise CommandError("対象となる月がありません（Kuraselの開始月より前です）。")
+
+        workers = max(1, options["workers"])
+        if workers == 1:
+            compute = None
+        else:
+
+            def compute(tasks):
+                # 子プロセスに親のDB接続を引き継がない
+                connections.close_all()
+                with ProcessPoolExecutor(
+                    max_workers=min(workers, len(tasks)), initializer=_init_worker
+                ) as ex:
+                    return list(ex.map(_audit_task, tasks))
+
+        stored, recomputed, timings = get_audit_results(start_year, end_year, options["force"], compute)
+        results = [
+            {"year": year, "month": month, "checks": {name: checks[name] for name in CHECKS}}
+            for (year, month), checks in stored.items()
+        ]
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8", newline="") as f:
+                self._write(f, options["format"], start_year, end_year, results, timings)
+        else:
+            self._write(self.stdout, options["format"], start_year, end_year, results, timings)
+
+        for name, seconds in timings.items():
+            self.stderr.write(f"{name}: {seconds:.3f}秒")
+        self.stderr.write(
+            self.style.SUCCESS(
+                f"{len(results)}ヶ月分のチェック結果を出力しました（再計算: {len(recomputed)}ヶ月）。"
+            )
+        )
+
+    def _write(self, f, fmt, start_year, end_year, results, timings):
+        if fmt == "json":
+            data = {"start_year": start_year, "end_year": end_year, "months": results, "timings": timings}
+            f.write(json.dumps(data, ensure_ascii=False, indent=2) + "\n")
+            return
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, lineterminator="\n")
+        writer.writeheader()
+        for r in results:
+            for name, check in r["checks"].items():
+                writer.writerow(
+                    {
+                        "year": r["year"],
+                        "month": r["month"],
+                        "check": name,
+                        "total_mr": check["total_mr"],
+                        "total_pb": check["total_pb"],
+                        "diff": check["diff"],
+                        "mismatch_count": check.get("mismatch_count", ""),
+                    }
+                )
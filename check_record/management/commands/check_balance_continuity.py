@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from check_record.services.balance_continuity_service import get_balance_breaks
+
+
+def _format_row(row):
+    kind = "入金" if row["is_income"] else "出金"
+    return (
+        f"{row['transaction_date']} {kind} {row['amount']:>12,} 残高 {row['balance']:>12,} "
+        f"{row['requesters_name']} {row['description']} (ID: {row['id']})"
+    )
+
+
+class Command(BaseCommand):
+    """通帳残高の連続性（直前の残高 ± 金額 = 残高）を全期間チェックする
+    - 連続しないデータを前後のデータと並べて出力する。
+    - 連続しないデータがある場合は終了コード1で終わる（定期実行での検知用）。
+    """
+
+    help = "Kuraselから取り込んだ入出金明細データの残高が連続しているか全期間チェックする"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--account", type=int, help="チェックする口座のID（省略すると全口座）")
+
+    def handle(self, *args, **options):
+        t = time.perf_counter()
+        breaks = get_balance_breaks(options["account"])
+        seconds = time.perf_counter() - t
+
+        for b in breaks:
+            self.stdout.write(
+                f"口座ID {b['row']['account_id']}: 計算上の残高 {b['expected']:,}（差額 {b['gap']:,}）"
+            )
+            self.stdout.write(f"    {_format_row(b['prev'])}")
+            self.stdout.write(f"  * {_format_row(b['row'])}")
+            if b["next"]:
+                self.stdout.write(f"    {_format_row(b['next'])}")
+        self.stderr.write(f"チェック時間: {seconds:.3f}秒")
+        if breaks:
+            raise CommandError(f"残高が連続しないデータが {len(breaks)} 件あります。")
+        self.stdout.write(self.style.SUCCESS("残高が連続しないデータはありません。"))
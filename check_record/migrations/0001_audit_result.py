@@ -0,0 +1,43 @@
+# Generated by Django 5.2.11 on 2026-10-18 18:27
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="AuditResult",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("check_name", models.CharField(max_length=32, verbose_name="チェック名")),
+                ("year", models.IntegerField(verbose_name="年")),
+                ("month", models.IntegerField(verbose_name="月")),
+                (
+                    "fingerprint",
+                    models.CharField(max_length=64, verbose_name="入力データのフィンガープリント"),
+                ),
+                ("result", models.JSONField(default=dict, verbose_name="チェック結果")),
+                (
+                    "updated_date",
+                    models.DateTimeField(default=django.utils.timezone.now, verbose_name="更新日"),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("check_name", "year", "month"), name="audit_result_unique"
+                    )
+                ],
+            },
+        ),
+    ]
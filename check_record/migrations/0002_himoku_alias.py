@@ -0,0 +1,32 @@
+# Generated by Django 5.2.11 on 2026-10-18 18:28
+
+from django.db import migrations, models
+
+
+def seed_alias(apps, schema_editor):
+    """不整合チェックで読み替えていた費目名を登録する"""
+    HimokuAlias = apps.get_model("check_record", "HimokuAlias")
+    HimokuAlias.objects.get_or_create(
+        alias_name="緑地維持管理費",
+        defaults={"himoku_name": "全体利用施設管理料", "comment": "通帳は緑地維持管理費で支払う"},
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('check_record', '0001_audit_result'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HimokuAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alias_name', models.CharField(max_length=64, unique=True, verbose_name='通帳の費目名')),
+                ('himoku_name', models.CharField(max_length=64, verbose_name='月次報告の費目名')),
+                ('comment', models.CharField(blank=True, default='', max_length=64, verbose_name='備考')),
+            ],
+        ),
+        migrations.RunPython(seed_alias, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.11 on 2026-10-18 18:32
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0005_billing_date_idx'),
+        ('check_record', '0002_himoku_alias'),
+        ('record', '0020_apply_approval_rules'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BillingItemAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_learned', models.BooleanField(default=False, verbose_name='自動登録')),
+                ('created_date', models.DateTimeField(default=django.utils.timezone.now, verbose_name='作成日')),
+                ('billing_item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to='billing.billingitem', verbose_name='請求項目')),
+                ('himoku', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='record.himoku', verbose_name='費目')),
+            ],
+        ),
+    ]
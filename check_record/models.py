@@ -1 +1,113 @@
-# Create your models here.
+from billing.models import BillingItem
+from common.cache import bump_version, cached_master
+from django.db import models
+from django.utils import timezone
+from record.models import Himoku
+
+
+class AuditResult(models.Model):
+    """チェック結果（合計・差額）の保存テーブル
+    - (チェック名, 年, 月)毎に、チェック結果と入力データのフィンガープリントを保存する。
+    - フィンガープリントが現在のデータと一致する場合は、再計算せずに保存済みの結果を使う。
+    - 保存・読み出しはcheck_record.services.audit_storeで行う。
+    """
+
+    check_name = models.CharField(verbose_name="チェック名", max_length=32)
+    year = models.IntegerField(verbose_name="年")
+    month = models.IntegerField(verbose_name="月")
+    fingerprint = models.CharField(verbose_name="入力データのフィンガープリント", max_length=64)
+    result = models.JSONField(verbose_name="チェック結果", default=dict)
+    updated_date = models.DateTimeField(verbose_name="更新日", default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["check_name", "year", "month"], name="audit_result_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.check_name} {self.year}-{self.month}"
+
+
+class HimokuAlias(models.Model):
+    """通帳側の費目名を月次報告側の費目名に読み替える対応表
+    - 月次報告と通帳データの照合（不整合チェック・年間照合表）で使う。
+    """
+
+    alias_name = models.CharField(verbose_name="通帳の費目名", max_length=64, unique=True)
+    himoku_name = models.CharField(verbose_name="月次報告の費目名", max_length=64)
+    comment = models.CharField(verbose_name="備考", max_length=64, blank=True, default="")
+
+    def __str__(self):
+        return f"{self.alias_name} → {self.himoku_name}"
+
+    @classmethod
+    @cached_master("check_record.himokualias")
+    def get_alias_map(cls):
+        """{通帳の費目名: 月次報告の費目名}のdictを返す"""
+        return dict(cls.objects.values_list("alias_name", "himoku_name"))
+
+    @classmethod
+    def resolve(cls, name, alias_map=None):
+        """費目名を読み替える（対応表にない場合はそのまま返す）"""
+        if alias_map is None:
+            alias_map = cls.get_alias_map()
+        return alias_map.get(name, name)
+
+
+class BillingItemAlias(models.Model):
+    """請求項目と月次報告の費目の対応表
+    - 請求金額チェックでは、この対応表で請求項目を費目に読み替える。
+    - 対応表にない名前だけを類似度で照合し、金額が一致した組を登録候補として表示する。
+      候補は確認画面（BillingAliasLearnView）で確認して登録する（is_learned=True）。
+    - 登録の誤りは管理画面で修正する。
+    """
+
+    billing_item = models.OneToOneField(BillingItem, verbose_name="請求項目", on_delete=models.CASCADE)
+    himoku = models.ForeignKey(Himoku, verbose_name="費目", on_delete=models.CASCADE)
+    is_learned = models.BooleanField(verbose_name="自動登録", default=False)
+    created_date = models.DateTimeField(verbose_name="作成日", default=timezone.now)
+
+    def __str__(self):
+        return f"{self.billing_item} → {self.himoku}"
+
+    @classmethod
+    @cached_master("check_record.billingitemalias", "billing.billingitem", "record.himoku")
+    def get_alias_map(cls):
+        """{請求項目名: 費目名}のdictを返す"""
+        return dict(cls.objects.values_list("billing_item__item_name", "himoku__himoku_name"))
+
+    @classmethod
+    def learn(cls, pairs):
+        """確認した(請求項目名, 費目名)の組を登録する（登録済みの請求項目は変更しない）
+        - 戻り値: 新たに登録した件数
+        """
+        pairs = dict(pairs)
+        if not pairs:
+            return 0
+        items = {
+            i.item_name: i
+            for i in BillingItem.objects.filter(item_name__in=pairs.keys())
+            .exclude(billingitemalias__isnull=False)
+            .order_by("-alive", "pk")
+        }
+        himokus = {
+            h.himoku_name: h
+            for h in Himoku.objects.filter(himoku_name__in=pairs.values()).order_by("-alive", "pk")
+        }
+        objs = [
+            cls(billing_item=items[b], himoku=himokus[h], is_learned=True)
+            for b, h in pairs.items()
+            if b in items and h in himokus
+        ]
+        if not objs:
+            return 0
+        # 登録済みの請求項目は除いてあるが、同時に登録された場合に備えてignore_conflictsにする。
+        # その場合bulk_createは登録されなかったデータも返すため、登録件数は数え直す
+        cls.objects.bulk_create(objs, ignore_conflicts=True)
+        inserted = cls.objects.filter(
+            billing_item__in=[o.billing_item for o in objs], created_date__gte=objs[0].created_date
+        ).count()
+        # bulk_createはシグナルを送らないため、キャッシュのバージョンを更新する
+        if inserted:
+            bump_version("check_record.billingitemalias")
+        return inserted
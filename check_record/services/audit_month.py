@@ -0,0 +1,81 @@
+import datetime
+import functools
+
+from common.period import Period
+from django.conf import settings
+from django.db.models import F, Sum
+from django.db.models.functions import Coalesce
+from monthly_report.models import MonthlySummary
+from monthly_report.services.monthly_report_services import get_monthly_summary_queryset, summary_total
+from record.models import ClaimData, Transaction
+
+
+class AuditMonth:
+    """1ヶ月分のチェック用データ
+    - チェック画面（収入・支出・不整合）の*_totals()と年間監査(audit_service)で共通に使う。
+    - 各プロパティは最初に参照したときに読み込み、以後は同じ値を返す。
+    """
+
+    def __init__(self, year, month):
+        self.year = int(year)
+        self.month = int(month)
+        self.period = Period.of(self.year, self.month)
+        self.last_period = self.period.previous_month()
+        self.tstart, self.tend = self.period.start, self.period.last_day
+        self.last_tstart, self.last_tend = self.last_period.start, self.last_period.last_day
+        self.is_start_month = (self.year, self.month) == (
+            settings.START_KURASEL["year"],
+            settings.START_KURASEL["month"],
+        )
+
+    @functools.cached_property
+    def mr_income_total(self):
+        """月次収支の収入合計（集計テーブル）"""
+        return summary_total(get_monthly_summary_queryset(self.tstart, self.tend, 0, "income", True))
+
+    @functools.cached_property
+    def mr_expense_totals(self):
+        """月次収支の支出合計（集計テーブル、相殺金額を除く）を費目の集計フラグ(aggregate_flag)毎のdictで返す"""
+        qs = (
+            get_monthly_summary_queryset(self.tstart, self.tend, 0, "expense", True)
+            .order_by()
+            .values("himoku__aggregate_flag")
+            .annotate(total=Coalesce(Sum(F("amount") - F("netting_amount")), 0))
+        )
+        return {row["himoku__aggregate_flag"]: row["total"] for row in qs}
+
+    @functools.cached_property
+    def netting_total(self):
+        """相殺項目（手数料など）の合計（集計テーブル）"""
+        qs = MonthlySummary.filter_period(self.tstart, self.tend)
+        return qs.aggregate(total=Coalesce(Sum("netting_amount"), 0))["total"]
+
+    @functools.cached_property
+    def pb_income(self):
+        """通帳の入金データ（Kuraselの明細・計算対象・集計対象）。評価済みのquerysetを返す"""
+        qs = (
+            Transaction.get_qs_pb(self.tstart, self.tend, "0", "0", "income", True, False)
+            .filter(transaction_date__gte=datetime.date(2023, 4, 1), himoku__aggregate_flag=True)
+            .order_by("transaction_date", "himoku")
+        )
+        list(qs)
+        return qs
+
+    @functools.cached_property
+    def pb_expense(self):
+        """通帳の出金データ（手入力を含む）。評価済みのquerysetを返す"""
+        qs = Transaction.get_qs_pb(self.tstart, self.tend, "0", "0", "expense", True, False).order_by(
+            "himoku__code", "transaction_date"
+        )
+        list(qs)
+        return qs
+
+    @functools.cached_property
+    def maeuke_claim(self):
+        """請求時点の前受金（合計, dictのリスト, コメント）"""
+        return ClaimData.get_maeuke_claim(self.year, self.month)
+
+    @functools.cached_property
+    def mishuu_claim_total(self):
+        """請求時点の未収金合計"""
+        return ClaimData.get_mishuu_claim(self.year, self.month)[0]
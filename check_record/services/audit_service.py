@@ -0,0 +1,148 @@
+import logging
+import time
+
+from billing.models import Billing
+from django.conf import settings
+from monthly_report.models import BalanceSheet
+from monthly_report.services.balance_sheet_check_service import check_balancesheet
+from monthly_report.services.monthly_report_services import get_monthly_report_queryset
+from payment.models import Payment
+from record.models import AccountingClass
+
+from check_record.services.audit_month import AuditMonth
+from check_record.services.expense_check_service import get_expense_check_totals
+from check_record.services.income_check_service import get_income_check_totals
+from check_record.services.services import (
+    get_billing_name_lists,
+    get_himoku_name_fuzzy,
+    get_inconsistency_totals,
+)
+
+logger = logging.getLogger(__name__)
+
+# -----------------------------------------
+# 年間監査（audit_sweepコマンド）用service関数
+# - チェック画面（収入・支出・不整合・請求金額・支払い承認・銀行残高）と同じ合計・差額を月毎に計算する。
+#   収入・支出・不整合チェックは、チェック画面と同じservice関数（*_totals()）を呼び出す。
+# - 複数のチェックで使うデータはAuditMonth（audit_month.py）で1回だけ読み込み、*_totals()にも渡して共有する。
+# -----------------------------------------
+
+# チェック名（結果の出力順）
+CHECK_INCOME = "income"
+CHECK_EXPENSE = "expense"
+CHECK_INCONSISTENCY = "inconsistency"
+CHECK_BILLING = "billing"
+CHECK_APPROVAL = "approval"
+CHECK_BALANCESHEET = "balancesheet"
+
+# チェック名の表示名と、月別のチェック画面のURL名
+CHECK_LABELS = {
+    CHECK_INCOME: ("月次収入チェック", "check_record:kurasel_mr_income_check"),
+    CHECK_EXPENSE: ("月次支出チェック", "check_record:kurasel_mr_expense_check"),
+    CHECK_INCONSISTENCY: ("支出項目チェック", "check_record:expense_check"),
+    CHECK_BILLING: ("請求金額チェック", "check_record:kurasel_billing_check"),
+    CHECK_APPROVAL: ("支払い承認チェック", "check_record:kurasel_ap_expense_check"),
+    CHECK_BALANCESHEET: ("銀行残高チェック", "monthly_report:bs_table"),
+}
+
+
+def _check_result(totals):
+    """チェック画面と共通の合計・差額（*_totals()の戻り値）を監査結果の形式にする"""
+    return {"total_mr": totals["total_mr"], "total_pb": totals["total_pb"], "diff": totals["total_diff"]}
+
+
+def check_income(m):
+    """収入チェック（MonthlyReportIncomeCheckViewと同じget_income_check_totals()）"""
+    return _check_result(get_income_check_totals(m))
+
+
+def check_expense(m):
+    """支出チェック（MonthlyReportExpenseCheckViewと同じget_expense_check_totals()）"""
+    return _check_result(get_expense_check_totals(m))
+
+
+def check_inconsistency(m):
+    """月次報告と通帳データの不整合チェック（IncosistencyCheckViewと同じget_inconsistency_totals()）"""
+    return _check_result(get_inconsistency_totals(m))
+
+
+def check_billing(m):
+    """請求金額内訳データと月次報告の比較（BillingAmountCheckViewと同じ計算）"""
+    qs_billing = Billing.get_billing_data_qs(m.tstart, m.tend)
+    qs_mr = get_monthly_report_queryset(m.tstart, m.tend, 0, "income", True).exclude(amount=0)
+    mismatch = get_himoku_name_fuzzy(*get_billing_name_lists(qs_mr, qs_billing), cutoff=0.4)
+    billing_total = Billing.calc_total_billing(qs_billing)
+    return {
+        "total_mr": m.mr_income_total,
+        "total_pb": billing_total,
+        "diff": billing_total - m.mr_income_total,
+        "mismatch_count": len(mismatch),
+        "mishuu_claim": m.mishuu_claim_total,
+    }
+
+
+def check_approval(m):
+    """支払い承認データと入出金明細の比較（ApprovalExpenseCheckViewと同じ計算）"""
+    _, total_ap = Payment.kurasel_get_payment(m.tstart, m.tend)
+    total_pb = m.pb_expense.totals()["approval_withdrawals"]
+    return {"total_mr": total_ap, "total_pb": total_pb, "diff": total_pb - total_ap}
+
+
+def check_balance_sheet(m):
+    """銀行残高整合チェック（BalanceSheetTableViewと同じ計算）
+    - 会計区分毎に、貸借対照表の銀行残高と計算現金残高の差額を求める。前月データがない会計区分は除く。
+    """
+    by_class = {}
+    for ac in AccountingClass.objects.order_by("code"):
+        previous, current = check_balancesheet(m.year, m.month, ac.pk)
+        if not previous or not current:
+            continue
+        assets = BalanceSheet.get_bs(m.tstart, m.tend, ac.pk, True).values_list(
+            "item_name__item_name", "amounts"
+        )
+        bank = next((v for k, v in assets if settings.BANK_NAME in k), 0)
+        calc = current["計算現金残高"]
+        by_class[ac.accounting_name] = {"bank": bank, "calc": calc, "diff": bank - calc}
+    return {
+        "total_mr": sum(v["calc"] for v in by_class.values()),
+        "total_pb": sum(v["bank"] for v in by_class.values()),
+        "diff": sum(v["diff"] for v in by_class.values()),
+        "by_class": by_class,
+    }
+
+
+CHECKS = {
+    CHECK_INCOME: check_income,
+    CHECK_EXPENSE: check_expense,
+    CHECK_INCONSISTENCY: check_inconsistency,
+    CHECK_BILLING: check_billing,
+    CHECK_APPROVAL: check_approval,
+    CHECK_BALANCESHEET: check_balance_sheet,
+}
+
+
+def audit_month(year, month, checks=None):
+    """1ヶ月分のチェック（checksがNoneの場合は全チェック）を実行して、チェック毎の結果と処理時間（秒）を返す
+    - 共有データの読み込み時間は、最初に参照したチェックの処理時間に含まれる。
+    """
+    m = AuditMonth(year, month)
+    results = {}
+    timings = {}
+    for name, check in CHECKS.items():
+        if checks is not None and name not in checks:
+            continue
+        start = time.perf_counter()
+        results[name] = check(m)
+        timings[name] = time.perf_counter() - start
+    return {"year": m.year, "month": m.month, "checks": results, "timings": timings}
+
+
+def audit_months(start_year, end_year):
+    """監査対象の(年, 月)のリストを返す（Kuraselの開始月より前は対象外）"""
+    start = (settings.START_KURASEL["year"], settings.START_KURASEL["month"])
+    return [
+        (year, month)
+        for year in range(int(start_year), int(end_year) + 1)
+        for month in range(1, 13)
+        if (year, month) >= start
+    ]
@@ -0,0 +1,216 @@
+import datetime
+import hashlib
+import json
+import logging
+
+from billing.models import Billing
+from common.period import Period
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+from monthly_report.models import BalanceSheet, ReportTransaction
+from payment.models import Payment
+from record.models import ClaimData, Himoku, Transaction
+
+from check_record.models import AuditResult, BillingItemAlias
+from check_record.services.audit_service import (
+    CHECK_APPROVAL,
+    CHECK_BALANCESHEET,
+    CHECK_BILLING,
+    CHECK_EXPENSE,
+    CHECK_INCOME,
+    CHECK_INCONSISTENCY,
+    CHECKS,
+    audit_month,
+    audit_months,
+)
+
+logger = logging.getLogger(__name__)
+
+# -----------------------------------------
+# チェック結果の保存・読み出し
+# - 入力データのフィンガープリント（ソーステーブル毎の件数・金額合計・最大ID・最大作成日と、
+#   費目などのキー毎の件数・金額合計）が保存時と一致するチェック結果は再計算しない。
+# - フィンガープリントは当月と前月のデータから作る（前月の未払金・未収金を参照するチェックがあるため）。
+# - キー毎の件数・金額合計が変わらない変更（同じキーの行の間で金額を入れ替えるなど）は検出しないが、
+#   チェックはキー毎に集計するため結果も変わらない。取引明細データは最大更新日時で全ての変更を検出する。
+# -----------------------------------------
+
+
+def _ledger_source(model, date_field, amount_field, keys=(), created=True, **extra):
+    """台帳テーブルの集計式を返す
+    - keys: 月毎の内訳（件数・金額合計）を集計するフィールド名。チェックで使う費目・フラグなどを指定する。
+    """
+    aggregates = {"count": Count("pk"), "sum": Sum(amount_field), "max_id": Max("pk"), **extra}
+    if created:
+        aggregates["max_created"] = Max("created_date")
+    breakdown = {"count": Count("pk"), "sum": Sum(amount_field)}
+    return model, date_field, aggregates, list(keys), breakdown
+
+
+# ソーステーブル: (モデル, 日付フィールド, 集計式, 内訳のキー, 内訳の集計式)
+SOURCES = {
+    "transaction": _ledger_source(
+        Transaction,
+        "transaction_date",
+        "amount",
+        keys=("himoku_id", "is_income", "calc_flg", "is_approval", "is_manualinput", "is_maeukekin"),
+        max_updated=Max("updated_date"),
+    ),
+    "reporttransaction": _ledger_source(
+        ReportTransaction,
+        "transaction_date",
+        "amount",
+        keys=("himoku_id", "calc_flg", "is_netting", "delete_flg"),
+    ),
+    "balancesheet": _ledger_source(
+        BalanceSheet, "monthly_date", "amounts", keys=("item_name_id",), created=False
+    ),
+    "claimdata": _ledger_source(ClaimData, "claim_date", "amount", keys=("claim_type",), created=False),
+    "billing": _ledger_source(Billing, "transaction_date", "billing_amount", keys=("billing_item_id",)),
+    "payment": _ledger_source(Payment, "payment_date", "payment", keys=("himoku_id",), created=False),
+}
+
+# チェック毎のソーステーブル（費目マスタは全チェックで参照する）
+CHECK_SOURCES = {
+    CHECK_INCOME: ["reporttransaction", "transaction", "claimdata", "balancesheet"],
+    CHECK_EXPENSE: ["reporttransaction", "transaction", "balancesheet"],
+    CHECK_INCONSISTENCY: ["reporttransaction", "transaction"],
+    CHECK_BILLING: ["reporttransaction", "billing", "claimdata"],
+    CHECK_APPROVAL: ["payment", "transaction", "balancesheet"],
+    CHECK_BALANCESHEET: ["reporttransaction", "balancesheet"],
+}
+
+
+def _himoku_stats():
+    """費目マスタの統計（集計フラグなどの変更を検出する）"""
+    return Himoku.objects.aggregate(
+        count=Count("pk"),
+        max_id=Max("pk"),
+        alive=Count("pk", filter=Q(alive=True)),
+        aggregate=Count("pk", filter=Q(aggregate_flag=True)),
+        approval=Count("pk", filter=Q(is_approval=True)),
+        community=Count("pk", filter=Q(is_community=True)),
+        ac_class=Sum("accounting_class_id"),
+    )
+
+
+def collect_stats(start_year, end_year):
+    """期間（前年12月から）のソーステーブル毎・年月毎の統計を返す {ソース名: {(年, 月): 統計}}
+    - ソーステーブル毎に、年月でグループ化したクエリと、年月・キーでグループ化した内訳のクエリで集計する。
+    """
+    tstart = datetime.date(int(start_year) - 1, 12, 1)
+    tend = datetime.date(int(end_year), 12, 31)
+    stats = {}
+    for name, (model, date_field, aggregates, keys, breakdown) in SOURCES.items():
+        qs = (
+            model.objects.in_period(Period.between(tstart, tend), date_field)
+            .annotate(fp_year=ExtractYear(date_field), fp_month=ExtractMonth(date_field))
+            .order_by()
+        )
+        stats[name] = {
+            (row.pop("fp_year"), row.pop("fp_month")): row
+            for row in qs.values("fp_year", "fp_month").annotate(**aggregates)
+        }
+        # キー毎の内訳（費目の付け替えや、合計では打ち消し合う変更を検出する）
+        if keys:
+            for row in qs.values("fp_year", "fp_month", *keys).annotate(**breakdown).order_by(*keys):
+                month_stats = stats[name][(row.pop("fp_year"), row.pop("fp_month"))]
+                month_stats.setdefault("breakdown", []).append(row)
+    stats["himoku"] = _himoku_stats()
+    # 請求項目と費目の対応表（請求金額チェックで使う）
+    stats["billing_alias"] = BillingItemAlias.objects.aggregate(
+        count=Count("pk"), max_id=Max("pk"), himoku=Sum("himoku_id")
+    )
+    return stats
+
+
+def fingerprint(stats, check_name, year, month):
+    """チェックの入力データ（当月・前月）のフィンガープリントを返す"""
+    last = (year - 1, 12) if month == 1 else (year, month - 1)
+    data = {
+        name: [stats[name].get((year, month)), stats[name].get(last)] for name in CHECK_SOURCES[check_name]
+    }
+    data["himoku"] = stats["himoku"]
+    if check_name == CHECK_BILLING:
+        data["billing_alias"] = stats["billing_alias"]
+    raw = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _local_compute(tasks):
+    return [audit_month(year, month, checks) for year, month, checks in tasks]
+
+
+def _stored_results(start_year, end_year):
+    """期間の保存済みのチェック結果と、再計算が必要なチェックを返す
+    - 戻り値: ({(年, 月): {チェック名: 結果}}, {(年, 月): [再計算が必要なチェック名]}, フィンガープリント)
+    - 入力データが変わったチェックは、保存済みの（古い）結果を返し、再計算が必要なチェックに含める。
+    """
+    periods = audit_months(start_year, end_year)
+    stats = collect_stats(start_year, end_year)
+    fingerprints = {
+        (year, month, name): fingerprint(stats, name, year, month)
+        for year, month in periods
+        for name in CHECKS
+    }
+    results = {period: {} for period in periods}
+    fresh = set()
+    for row in AuditResult.objects.filter(year__range=[start_year, end_year]):
+        if (row.year, row.month) in results:
+            results[(row.year, row.month)][row.check_name] = row.result
+            if fingerprints.get((row.year, row.month, row.check_name)) == row.fingerprint:
+                fresh.add((row.year, row.month, row.check_name))
+    stale = {}
+    for year, month in periods:
+        names = [name for name in CHECKS if (year, month, name) not in fresh]
+        if names:
+            stale[(year, month)] = names
+    return results, stale, fingerprints
+
+
+def get_stored_audit_results(start_year, end_year=None):
+    """期間の保存済みのチェック結果を返す（再計算・保存はしない。年間チェック結果画面のGETで使う）
+    - 戻り値: ({(年, 月): {チェック名: 結果}}, {(年, 月): [入力データが変わったか、結果がないチェック名]})
+    """
+    results, stale, _ = _stored_results(start_year, end_year or start_year)
+    return results, stale
+
+
+def get_audit_results(start_year, end_year=None, force=False, compute=None):
+    """期間のチェック結果を返す。保存済みの結果がないか、入力データが変わった月だけ再計算して保存する
+    - compute: [(年, 月, チェック名のリスト), ...]を受け取り、audit_month()の結果のリストを返す関数。
+      Noneの場合は同じプロセスで計算する（audit_sweepコマンドはプロセスプールで計算する）。
+    - force: Trueの場合は全ての月を再計算する。
+    - 戻り値: ({(年, 月): {チェック名: 結果}}, 再計算した(年, 月)のリスト, 再計算したチェックの処理時間)
+    """
+    end_year = end_year or start_year
+    results, stale, fingerprints = _stored_results(start_year, end_year)
+    if force:
+        stale = {period: list(CHECKS) for period in results}
+    tasks = [(year, month, names) for (year, month), names in stale.items()]
+
+    timings = {}
+    objs = []
+    computed_list = (compute or _local_compute)(tasks) if tasks else []
+    for computed in computed_list:
+        year, month = computed["year"], computed["month"]
+        for name, result in computed["checks"].items():
+            results[(year, month)][name] = result
+            timings[name] = timings.get(name, 0) + computed["timings"][name]
+            objs.append(
+                AuditResult(
+                    check_name=name,
+                    year=year,
+                    month=month,
+                    fingerprint=fingerprints[(year, month, name)],
+                    result=result,
+                )
+            )
+    if objs:
+        AuditResult.objects.bulk_create(
+            objs,
+            update_conflicts=True,
+            unique_fields=["check_name", "year", "month"],
+            update_fields=["fingerprint", "result", "updated_date"],
+        )
+    return results, [(year, month) for year, month, _ in tasks], timings
@@ -0,0 +1,62 @@
+from django.db.models import Case, F, When, Window
+from django.db.models.functions import Lag, Lead
+from record.models import Transaction
+
+# -----------------------------------------
+# 通帳残高の連続性チェック（全期間）
+# - Kuraselから取り込んだ入出金明細データ（手入力以外・残高あり）を、口座毎に（取引日, ID）の順に並べ、
+#   ウィンドウ関数（LAG）で直前のデータの残高を取得して「直前の残高 ± 金額 = 残高」を1回のクエリで判定する。
+# - 連続しないデータ（貼り付けの行の欠落・重複、並び順の誤り）の前後のデータは、もう1回のクエリでまとめて取得する。
+# -----------------------------------------
+
+# 口座毎に（取引日, ID）の順。同じ日のデータは取り込み時の並び（古い順）でIDが付く
+_WINDOW = {"partition_by": [F("account_id")], "order_by": [F("transaction_date").asc(), F("id").asc()]}
+_FIELDS = (
+    "id",
+    "account_id",
+    "transaction_date",
+    "is_income",
+    "amount",
+    "balance",
+    "requesters_name",
+    "description",
+)
+
+
+def get_balance_breaks(account_id=None):
+    """残高が連続しないデータのリストを返す
+    - 各要素: {"row": データ, "prev": 直前のデータ, "next": 直後のデータ（無い場合はNone）,
+      "expected": 直前の残高 ± 金額, "gap": 残高 - expected}
+    - データは_FIELDSの値のdict。口座・取引日・IDの順。
+    """
+    qs = Transaction.objects.filter(is_manualinput=False, balance__isnull=False)
+    if account_id:
+        qs = qs.filter(account_id=account_id)
+    signed = Case(When(is_income=True, then=F("amount")), default=-F("amount"))
+    breaks = list(
+        qs.annotate(
+            prev_id=Window(Lag("id"), **_WINDOW),
+            next_id=Window(Lead("id"), **_WINDOW),
+            prev_balance=Window(Lag("balance"), **_WINDOW),
+        )
+        .annotate(gap=F("balance") - F("prev_balance") - signed)
+        .filter(prev_id__isnull=False)
+        .exclude(gap=0)
+        .order_by("account_id", "transaction_date", "id")
+        .values("id", "prev_id", "next_id", "gap")
+    )
+    if not breaks:
+        return []
+
+    ids = {pk for b in breaks for pk in (b["id"], b["prev_id"], b["next_id"]) if pk}
+    rows = {row["id"]: row for row in Transaction.objects.filter(pk__in=ids).values(*_FIELDS)}
+    return [
+        {
+            "row": rows[b["id"]],
+            "prev": rows[b["prev_id"]],
+            "next": rows.get(b["next_id"]),
+            "expected": rows[b["id"]]["balance"] - b["gap"],
+            "gap": b["gap"],
+        }
+        for b in breaks
+    ]
@@ -1,58 +1,71 @@
 import logging
 
-from common.services import check_period, get_lastmonth, select_period
+from common.services import check_period, select_period
 from django.conf import settings
 from django.utils import timezone
-from monthly_report.models import BalanceSheet, ReportTransaction
-from monthly_report.services.monthly_report_services import get_monthly_report_queryset
+from monthly_report.models import BalanceSheet
+from monthly_report.services.monthly_report_services import (
+    get_monthly_report_queryset,
+    get_year_expense_summary,
+)
 from record.models import Transaction
 
+from check_record.services.audit_month import AuditMonth
+
 logger = logging.getLogger(__name__)
 
 
 # -----------------------------------------
 # expense_check_views.py用service関数
 # -----------------------------------------
+def get_expense_check_totals(m):
+    """月次支出チェックの合計と差額（チェック画面と年間監査(audit_service)で共通に使う）
+    - m: AuditMonth（読み込んだデータは年間監査の他のチェックと共有する）。
+    - total_mr: 月次報告の支出合計（集計対象の費目、相殺金額を除く）
+    - total_pb: 通帳の出金合計（集計対象・町内会以外の費目）
+    - total_diff: total_pb - total_mr - 前月の未払金（Kuraselの開始月は初期値）
+    """
+    total_mr = m.mr_expense_totals.get(True, 0)
+    total_pb = sum(
+        t.amount for t in m.pb_expense if t.himoku and t.himoku.aggregate_flag and not t.himoku.is_community
+    )
+    # Kurasel開始月の特殊処理
+    if m.is_start_month:
+        total_last_miharai = settings.MIHARAI_INITIAL
+    else:
+        _, total_last_miharai = BalanceSheet.get_miharai_bs(m.last_tstart, m.last_tend)
+    return {
+        "total_mr": total_mr,
+        "total_pb": total_pb,
+        "total_last_miharai": total_last_miharai,
+        "total_diff": total_pb - total_mr - total_last_miharai,
+    }
+
+
 def get_monthly_expense_check_data(year, month):
-    """月次支出チェックに必要なデータを集計する"""
+    """月次支出チェックに必要なデータを集計する（合計・差額はget_expense_check_totals()）"""
     year, month = check_period(year, month)
-    last_year, last_month = get_lastmonth(year, month)
-
     tstart, tend = select_period(year, month)
-    last_tstart, last_tend = select_period(last_year, last_month)
 
     # 1. 月次報告データ
     qs_mr = get_monthly_report_queryset(tstart, tend, 0, "expense", True).exclude(is_netting=True)
-    # 合計計算（集計対象外フラグを除外して計算）
-    total_mr = ReportTransaction.total_calc_flg(qs_mr.exclude(himoku__aggregate_flag=False))
 
     # 2. 通帳データ
-    qs_pb = Transaction.get_qs_pb(tstart, tend, "0", "0", "expense", True, False).order_by(
-        "himoku__code", "transaction_date"
-    )
-    # 通帳合計の計算 (特定の費目条件を考慮)
-    total_pb = sum(
-        d.amount for d in qs_pb if d.himoku and d.himoku.aggregate_flag and not d.himoku.is_community
-    )
+    m = AuditMonth(year, month)
+    qs_pb = m.pb_expense
 
     # 3. 未払金データ
     qs_this_miharai, total_this_miharai = BalanceSheet.get_miharai_bs(tstart, tend)
-    _, total_last_miharai = BalanceSheet.get_miharai_bs(last_tstart, last_tend)
-
-    # Kurasel開始月の特殊処理
-    if int(year) == settings.START_KURASEL["year"] and int(month) == settings.START_KURASEL["month"]:
-        total_last_miharai = settings.MIHARAI_INITIAL
 
     return {
         "qs_mr": qs_mr,
-        "total_mr": total_mr,
         "qs_pb": qs_pb,
-        "total_pb": total_pb,
         "qs_this_miharai": qs_this_miharai,
         "total_this_miharai": total_this_miharai,
-        "total_last_miharai": total_last_miharai,
         "year": year,
         "month": month,
+        # 合計・差額
+        **get_expense_check_totals(m),
     }
 
 
@@ -60,8 +73,8 @@ def get_yearly_expense_check_data(year):
     """年間支出チェックに必要なデータを集計する"""
     tstart, tend = select_period(year, 0)
 
-    # 1. 月次報告年間支出
-    mr_year_expense = ReportTransaction.get_year_expense(tstart, tend).exclude(amount=0)
+    # 1. 月次報告年間支出（集計テーブルから取得）
+    mr_year_expense = get_year_expense_summary(tstart, tend)
     total_mr_expense = sum(
         i["price"] for i in mr_year_expense if i["himoku__aggregate_flag"] and i["calc_flg"]
     )
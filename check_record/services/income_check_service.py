@@ -1,30 +1,50 @@
-import datetime
 import logging
 
 from common.services import check_period, get_lastmonth, select_period
 from django.conf import settings
 from django.db.models import Sum
 from django.db.models.functions import Coalesce
-from monthly_report.models import BalanceSheet, ReportTransaction
+from monthly_report.models import BalanceSheet, MonthlySummary
 from monthly_report.services.monthly_report_services import get_monthly_report_queryset
-from record.models import ClaimData, Transaction
+
+from check_record.services.audit_month import AuditMonth
 
 logger = logging.getLogger(__name__)
 
 
 def calculate_netting_total(tstart, tend):
-    """相殺項目（手数料など）の合計を計算"""
-    result = ReportTransaction.objects.filter(
-        transaction_date__range=[tstart, tend], is_netting=True
-    ).aggregate(total=Coalesce(Sum("amount"), 0))
+    """相殺項目（手数料など）の合計を集計テーブルから計算"""
+    result = MonthlySummary.filter_period(tstart, tend).aggregate(total=Coalesce(Sum("netting_amount"), 0))
     return result["total"]
 
 
 # -----------------------------------------
 # income_check_views.py用service関数
 # -----------------------------------------
+def get_income_check_totals(m):
+    """月次収入チェックの合計と差額（チェック画面と年間監査(audit_service)で共通に使う）
+    - m: AuditMonth（読み込んだデータは年間監査の他のチェックと共有する）。
+    - total_mr: 月次報告の収入合計 + 請求時点の未収金
+    - total_pb: 通帳の入金合計 + 相殺額
+    - total_diff: total_pb + 前月の前受金（請求時点） - total_mr
+    """
+    total_last_maeuke_claim, _, total_comment = m.maeuke_claim
+    total_mishuu_claim = m.mishuu_claim_total
+    total_mr = m.mr_income_total + total_mishuu_claim
+    total_pb = m.pb_income.totals()["net_deposit"] + m.netting_total
+    return {
+        "total_mr": total_mr,
+        "total_pb": total_pb,
+        "total_diff": total_pb + total_last_maeuke_claim - total_mr,
+        "total_last_maeuke_claim": total_last_maeuke_claim,
+        "total_comment": total_comment,
+        "total_mishuu_claim": total_mishuu_claim,
+        "netting_total": m.netting_total,
+    }
+
+
 def get_monthly_income_check_data(year, month):
-    """月次収入チェックに必要なデータを集計する"""
+    """月次収入チェックに必要なデータを集計する（合計・差額はget_income_check_totals()）"""
     year, month = check_period(year, month)
     last_year, last_month = get_lastmonth(year, month)
 
@@ -33,50 +53,33 @@ def get_monthly_income_check_data(year, month):
 
     # 1. 月次報告データ (MR)
     qs_mr = get_monthly_report_queryset(tstart, tend, 0, "income", True).exclude(amount=0).order_by("himoku")
-    total_mr = ReportTransaction.total_calc_flg(qs_mr)
 
     # 2. 通帳データ (PB)
-    start_limit = datetime.date(2023, 4, 1)
-    qs_pb = (
-        Transaction.get_qs_pb(tstart, tend, "0", "0", "income", True, False)
-        .filter(transaction_date__gte=start_limit, himoku__aggregate_flag=True)
-        .order_by("transaction_date", "himoku")
-    )
-    total_pb, _ = Transaction.total_without_calc_flg(qs_pb)
+    m = AuditMonth(year, month)
+    qs_pb = m.pb_income
 
     # 3. 貸借対照表から「前受金」を読み込む
     this_maeuke_bs, total_maeuke_bs = BalanceSheet.get_maeuke_bs(tstart, tend)
 
-    total_last_maeuke_claim, _, total_comment = ClaimData.get_maeuke_claim(year, month)
-    # 4. 請求データから「未収金」を読み込む
-    total_mishuu_claim, _ = ClaimData.get_mishuu_claim(year, month)
-
-    # 5. 貸借対象表から当月の「未収金」を読み込む
+    # 4. 貸借対象表から当月の「未収金」を読み込む
     this_mishuu_bs, total_mishuu_bs = BalanceSheet.get_mishuu_bs(tstart, tend)
     last_mishuu_bs, total_last_mishuu_bs = BalanceSheet.get_mishuu_bs(last_tstart, last_tend)
 
-    # 6. 特殊ルール（開始月判定）
+    # 5. 特殊ルール（開始月判定）
     if year == settings.START_KURASEL["year"] and month == settings.START_KURASEL["month"]:
         total_last_mishuu_bs = settings.MISHUU_KANRI + settings.MISHUU_SHUUZEN + settings.MISHUU_PARKING
 
-    # 7. 相殺額
-    netting_total = calculate_netting_total(tstart, tend)
-
     return {
         "qs_mr": qs_mr,
-        "total_mr": total_mr,
         "qs_pb": qs_pb,
-        "total_pb": total_pb,
-        "total_last_maeuke_claim": total_last_maeuke_claim,
-        "total_comment": total_comment,
-        "total_mishuu_claim": total_mishuu_claim,
         "this_mishuu_bs": this_mishuu_bs,
         "total_mishuu_bs": total_mishuu_bs,
         "last_mishuu_bs": last_mishuu_bs,
         "total_last_mishuu_bs": total_last_mishuu_bs,
-        "netting_total": netting_total,
         "year": year,
         "month": month,
         "this_maeuke_bs": this_maeuke_bs,
         "total_maeuke_bs": total_maeuke_bs,
+        # 合計・差額
+        **get_income_check_totals(m),
     }
@@ -0,0 +1,153 @@
+import bisect
+import datetime
+import difflib
+import functools
+import unicodedata
+from itertools import groupby
+from operator import itemgetter
+
+from common.period import Period
+from django.conf import settings
+from payment.models import Payment
+from record.models import Transaction
+
+# -----------------------------------------
+# 支払い承認データと通帳出金データの照合
+# - 金額が一致し、支払日と出金日の差が許容日数以内のデータを候補とし、
+#   支払先名と振込依頼人名・摘要の類似度が高い順（同じ場合は日数差が小さい順）に1対1で対応付ける。
+# - 候補の抽出は金額のハッシュ結合（join="hash"）またはソートマージ結合（join="merge"）で行い、
+#   全件の総当たりはしない。類似度は候補の組だけで計算する。
+# -----------------------------------------
+
+JOIN_HASH = "hash"
+JOIN_MERGE = "merge"
+
+
+@functools.lru_cache(maxsize=4096)
+def _normalize(text):
+    return "".join(unicodedata.normalize("NFKC", text or "").upper().split())
+
+
+@functools.lru_cache(maxsize=65536)
+def name_similarity(a, b):
+    """支払先名の類似度（0〜1）。全角・半角、空白の違いは無視する"""
+    a, b = _normalize(a), _normalize(b)
+    if not a or not b:
+        return 0.0
+    if a in b or b in a:
+        return 1.0
+    return difflib.SequenceMatcher(None, a, b).ratio()
+
+
+def _in_window(rows, dates, date, days):
+    """日付順のrowsから、dateとの差がdays以内のデータを返す
+    - dates: rowsの日付のリスト。探索毎に作らないよう、金額の区間毎に1回だけ作って渡す。
+    """
+    lo = bisect.bisect_left(dates, date - datetime.timedelta(days=days))
+    hi = bisect.bisect_right(dates, date + datetime.timedelta(days=days))
+    return rows[lo:hi]
+
+
+def _hash_candidates(payments, withdrawals, days):
+    """金額のハッシュ表（通帳側）を作り、支払いデータで探索する"""
+    table = {}
+    for w in sorted(withdrawals, key=itemgetter("date")):
+        table.setdefault(w["amount"], []).append(w)
+    table = {amount: (rows, [w["date"] for w in rows]) for amount, rows in table.items()}
+    for p in payments:
+        rows, dates = table.get(p["amount"], ((), ()))
+        for w in _in_window(rows, dates, p["date"], days):
+            yield p, w
+
+
+def _merge_candidates(payments, withdrawals, days):
+    """両方を(金額, 日付)でソートし、金額が一致する区間を順に突き合わせる"""
+    key = itemgetter("amount", "date")
+    ps = [(amount, list(g)) for amount, g in groupby(sorted(payments, key=key), key=itemgetter("amount"))]
+    ws = [(amount, list(g)) for amount, g in groupby(sorted(withdrawals, key=key), key=itemgetter("amount"))]
+    i = j = 0
+    while i < len(ps) and j < len(ws):
+        if ps[i][0] < ws[j][0]:
+            i += 1
+        elif ps[i][0] > ws[j][0]:
+            j += 1
+        else:
+            # 同じ金額の区間は日付順なので、許容日数の範囲を二分探索で求める
+            rows = ws[j][1]
+            dates = [w["date"] for w in rows]
+            for p in ps[i][1]:
+                for w in _in_window(rows, dates, p["date"], days):
+                    yield p, w
+            i += 1
+            j += 1
+
+
+def match_payments(payments, withdrawals, days=None, min_similarity=None, join=JOIN_HASH):
+    """支払いデータと出金データを1対1で対応付ける
+    - payments: {"id", "date", "amount", "name"}のリスト（nameは支払先名）。
+    - withdrawals: {"id", "date", "amount", "names"}のリスト（namesは振込依頼人名・摘要のタプル）。
+    - days/min_similarity: 省略時はsettingsのPAYMENT_MATCH_DAYS/PAYMENT_MATCH_SIMILARITY。
+    - 戻り値: {"matched": [{"payment", "withdrawal", "days", "similarity"}, ...],
+              "unmatched_payments": [...], "unmatched_withdrawals": [...]}
+    """
+    days = settings.PAYMENT_MATCH_DAYS if days is None else days
+    min_similarity = settings.PAYMENT_MATCH_SIMILARITY if min_similarity is None else min_similarity
+    candidates_func = _merge_candidates if join == JOIN_MERGE else _hash_candidates
+
+    candidates = []
+    for p, w in candidates_func(payments, withdrawals, days):
+        similarity = max((name_similarity(p["name"], name) for name in w["names"]), default=0.0)
+        if similarity < min_similarity:
+            continue
+        diff = abs((w["date"] - p["date"]).days)
+        candidates.append((-similarity, diff, p["date"], p["id"], w["id"], p, w))
+    # 類似度が高い順、日数差が小さい順に確定する（同順位は日付・IDの順で、結合方法によらず同じ結果になる）
+    candidates.sort(key=lambda c: c[:5])
+
+    matched = []
+    used_p = set()
+    used_w = set()
+    for neg_similarity, diff, _, p_id, w_id, p, w in candidates:
+        if p_id in used_p or w_id in used_w:
+            continue
+        used_p.add(p_id)
+        used_w.add(w_id)
+        matched.append({"payment": p, "withdrawal": w, "days": diff, "similarity": round(-neg_similarity, 3)})
+
+    matched.sort(key=lambda m: (m["payment"]["date"], m["payment"]["id"]))
+    return {
+        "matched": matched,
+        "unmatched_payments": [p for p in payments if p["id"] not in used_p],
+        "unmatched_withdrawals": [w for w in withdrawals if w["id"] not in used_w],
+    }
+
+
+def get_payment_matching(tstart, tend, days=None, join=JOIN_HASH):
+    """期間の支払い承認データと、支払い承認が必要な通帳出金データを照合する
+    - 期間の境目の支払いも対応付けるため、出金データは許容日数分だけ前後に広げて読み込む。
+      期間外の出金データは、対応付けられなかった場合も結果に含めない。
+    """
+    days = settings.PAYMENT_MATCH_DAYS if days is None else days
+    period = Period.between(tstart, tend)
+    margin = datetime.timedelta(days=days)
+
+    payments = [
+        {"id": pk, "date": date, "amount": amount, "name": destination, "summary": summary}
+        for pk, date, amount, destination, summary in Payment.objects.in_period(period)
+        .order_by("payment_date", "pk")
+        .values_list("pk", "payment_date", "payment", "payment_destination", "summary")
+    ]
+    qs_pb = Transaction.get_qs_pb(
+        period.start - margin, period.last_day + margin, "0", "0", "expense", True, False
+    )
+    withdrawals = [
+        {"id": pk, "date": date, "amount": amount, "names": (requester, description)}
+        for pk, date, amount, requester, description in qs_pb.filter(is_approval=True)
+        .order_by("transaction_date", "pk")
+        .values_list("pk", "transaction_date", "amount", "requesters_name", "description")
+    ]
+
+    result = match_payments(payments, withdrawals, days=days, join=join)
+    result["unmatched_withdrawals"] = [w for w in result["unmatched_withdrawals"] if w["date"] in period]
+    result["days"] = days
+    return result
@@ -0,0 +1,89 @@
+import datetime
+
+from common.period import Period
+from common.services import select_period
+from django.db.models import F, Sum
+from django.db.models.functions import ExtractMonth
+from monthly_report.services.monthly_report_services import get_monthly_summary_queryset
+from record.models import Transaction
+
+from check_record.models import HimokuAlias
+
+# -----------------------------------------
+# 月次報告と通帳データの年間照合表（費目×月）
+# - 月次報告（集計テーブル）と通帳データをそれぞれ月・費目名でグループ化した1回のクエリで集計する。
+# - 通帳側の費目名はHimokuAliasの対応表で月次報告側の費目名に読み替える。
+# -----------------------------------------
+
+KIND_INCOME = "income"
+KIND_EXPENSE = "expense"
+KIND_LABELS = {KIND_INCOME: "収入", KIND_EXPENSE: "支出"}
+
+
+def _mr_totals(tstart, tend, kind):
+    """月次報告の月・費目名毎の合計 {(月, 費目名): 金額}
+    - 収入は月次収入チェック、支出は不整合チェックと同じ金額（支出は相殺金額を除く）。
+    """
+    qs = get_monthly_summary_queryset(tstart, tend, 0, kind, True)
+    amount = F("amount") if kind == KIND_INCOME else F("amount") - F("netting_amount")
+    qs = qs.order_by().values("month", "himoku__himoku_name").annotate(total=Sum(amount))
+    return {(row["month"], row["himoku__himoku_name"]): row["total"] for row in qs}
+
+
+def _pb_totals(tstart, tend, kind):
+    """通帳データの月・費目名毎の合計 {(月, 費目名): 金額}
+    - 収入は月次収入チェック（計算対象・前受金以外）、支出は不整合チェックと同じ条件。
+    """
+    qs = Transaction.objects.in_period(Period.between(tstart, tend)).filter(himoku__aggregate_flag=True)
+    if kind == KIND_INCOME:
+        qs = qs.filter(
+            is_income=True,
+            calc_flg=True,
+            is_maeukekin=False,
+            transaction_date__gte=datetime.date(2023, 4, 1),
+        )
+    else:
+        qs = qs.filter(is_income=False)
+    qs = (
+        qs.annotate(pb_month=ExtractMonth("transaction_date"))
+        .order_by()
+        .values("pb_month", "himoku__himoku_name")
+        .annotate(total=Sum("amount"))
+    )
+    return {(row["pb_month"], row["himoku__himoku_name"]): row["total"] for row in qs}
+
+
+def get_reconcile_matrix(year, kind):
+    """年間照合表を返す
+    - rows: 費目毎の{"himoku_name", "cells": 月毎の{"month", "mr", "pb", "diff"}, "mr", "pb", "diff"}
+    - totals: 月毎の合計（cellsと同じ形式）と年間合計
+    - 差額は通帳 - 月次報告。
+    """
+    tstart, tend = select_period(year, 0)
+    alias_map = HimokuAlias.get_alias_map()
+    matrix = {}
+    for key, totals in (("mr", _mr_totals(tstart, tend, kind)), ("pb", _pb_totals(tstart, tend, kind))):
+        for (month, name), total in totals.items():
+            name = HimokuAlias.resolve(name or "不明", alias_map)
+            cells = matrix.setdefault(name, {m: {"mr": 0, "pb": 0} for m in range(1, 13)})
+            cells[month][key] += total or 0
+
+    def _cell(month, mr, pb):
+        return {"month": month, "mr": mr, "pb": pb, "diff": pb - mr}
+
+    rows = []
+    for name in sorted(matrix):
+        cells = [_cell(m, v["mr"], v["pb"]) for m, v in matrix[name].items()]
+        mr = sum(c["mr"] for c in cells)
+        pb = sum(c["pb"] for c in cells)
+        rows.append({"himoku_name": name, "cells": cells, **_cell(0, mr, pb)})
+
+    month_cells = [
+        _cell(m, sum(r["cells"][m - 1]["mr"] for r in rows), sum(r["cells"][m - 1]["pb"] for r in rows))
+        for m in range(1, 13)
+    ]
+    totals = {
+        "cells": month_cells,
+        **_cell(0, sum(c["mr"] for c in month_cells), sum(c["pb"] for c in month_cells)),
+    }
+    return {"rows": rows, "totals": totals}
@@ -1,15 +1,23 @@
-import difflib
 import logging
-import re
+import unicodedata
+from collections import Counter
 
 from billing.models import Billing
+from common.period import Period
 from common.services import check_period, get_lastmonth, select_period
 from django.conf import settings
-from django.db.models import Sum
-from monthly_report.models import BalanceSheet, ReportTransaction
-from monthly_report.services.monthly_report_services import get_monthly_report_queryset
+from monthly_report.models import BalanceSheet
+from monthly_report.services.monthly_report_services import (
+    get_monthly_report_queryset,
+    get_monthly_summary_queryset,
+    summary_total,
+)
 from payment.models import Payment
-from record.models import ApprovalCheckData, ClaimData, Transaction
+from record.models import ClaimData, Transaction
+
+from check_record.models import BillingItemAlias, HimokuAlias
+from check_record.services.audit_month import AuditMonth
+from check_record.services.matching_service import get_payment_matching
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +26,23 @@ logger = logging.getLogger(__name__)
 # 月次報告と通帳データの不整合チェック
 # incosistency_check_views用service関数
 # -----------------------------------------
+def _inconsistency_pb_rows(m):
+    """不整合チェックの通帳データ（手入力を含む、集計対象の費目の出金）"""
+    return [t for t in m.pb_expense if t.himoku and t.himoku.aggregate_flag]
+
+
+def get_inconsistency_totals(m):
+    """不整合チェックの合計と差額（チェック画面と年間監査(audit_service)で共通に使う）
+    - m: AuditMonth（読み込んだデータは年間監査の他のチェックと共有する）。
+    - total_mr: 月次報告の支出合計（相殺金額を除く）
+    - total_pb: 通帳の出金合計
+    - total_diff: total_pb - total_mr
+    """
+    total_mr = sum(m.mr_expense_totals.values())
+    total_pb = sum(t.amount for t in _inconsistency_pb_rows(m))
+    return {"total_mr": total_mr, "total_pb": total_pb, "total_diff": total_pb - total_mr}
+
+
 def get_expense_inconsistency_summary(year, month):
     """月次報告と通帳データの不整合チェック用データを取得"""
     year, month = check_period(year, month)
@@ -27,27 +52,18 @@ def get_expense_inconsistency_summary(year, month):
     qs_mr = get_monthly_report_queryset(tstart, tend, 0, "expense", True).order_by(
         "is_netting", "himoku__himoku_name"
     )
-    total_mr = ReportTransaction.total_calc_flg(qs_mr.exclude(is_netting=True))
-
-    # 2. 通帳データ（集計）
-    # values().annotate() でDB側で合計を算出
-    qs_pb_agg = (
-        Transaction.objects.filter(
-            transaction_date__range=[tstart, tend], is_income=False, himoku__aggregate_flag=True
-        )
-        .values("himoku__himoku_name")
-        .annotate(debt=Sum("amount"))
-        .order_by("himoku")
-    )
 
-    # 3. ビジネスルール：費目名の読み替えと合計計算
-    pb_list = list(qs_pb_agg)
-    total_pb = 0
+    # 2. 通帳データ（費目名毎の合計。合計・差額と同じAuditMonthの出金データから集計する）
+    m = AuditMonth(year, month)
+    debt = Counter()
+    for t in _inconsistency_pb_rows(m):
+        debt[t.himoku.himoku_name] += t.amount
+    pb_list = [{"himoku__himoku_name": name, "debt": amount} for name, amount in debt.items()]
+
+    # 3. 費目名の読み替え（HimokuAliasの対応表）
+    alias_map = HimokuAlias.get_alias_map()
     for item in pb_list:
-        total_pb += item["debt"]
-        # 名称の読み替えロジック
-        if item["himoku__himoku_name"] == "緑地維持管理費":
-            item["himoku__himoku_name"] = "全体利用施設管理料"
+        item["himoku__himoku_name"] = HimokuAlias.resolve(item["himoku__himoku_name"], alias_map)
 
     # 読み替え後に再ソート
     pb_list.sort(key=lambda x: x["himoku__himoku_name"])
@@ -56,9 +72,9 @@ def get_expense_inconsistency_summary(year, month):
         "year": year,
         "month": month,
         "mr_list": qs_mr,
-        "total_mr": total_mr,
         "pb_list": pb_list,
-        "total_pb": total_pb,
+        # 合計・差額
+        **get_inconsistency_totals(m),
     }
 
 
@@ -85,21 +101,18 @@ def get_billing_check_service(year, month):
     qs_mr = get_monthly_report_queryset(tstart, tend, 0, "income", True)
     # 収入のない費目は除く
     qs_mr = qs_mr.exclude(amount=0).order_by("-amount")
-    # 月次収支の収入合計
-    total_mr = ReportTransaction.total_calc_flg(qs_mr)
+    # 月次収支の収入合計（集計テーブルから計算）
+    total_mr = summary_total(get_monthly_summary_queryset(tstart, tend, 0, "income", True))
 
     # (3) 請求時点の未収金リストおよび未収金額
     total_mishuu_claim, _ = ClaimData.get_mishuu_claim(year, month)
 
     # (4) 月次収入報告と請求金額のチェック
     # 請求金額内訳データと月次報告データで金額が異なる費目名ペアを抽出する
-    list_mr = []
-    list_billing = []
-    for i in qs_mr:
-        list_mr.append([str(i.himoku), i.amount])
-    for i in qs_billing:
-        list_billing.append([str(i.billing_item), i.billing_amount])
-    mismatch_data_list = get_himoku_name_fuzzy(list_mr, list_billing, cutoff=0.4)
+    # 類似度で照合して金額が一致した組は対応表への登録候補とする（登録は確認画面で行う）
+    mismatch_data_list, alias_candidates = get_billing_match(
+        *get_billing_name_lists(qs_mr, qs_billing), cutoff=0.4
+    )
 
     # (5) チェック結果を辞書で返す
     return {
@@ -117,6 +130,8 @@ def get_billing_check_service(year, month):
         "month": month,
         # 不整合データリスト
         "mismatch_data_list": mismatch_data_list if len(mismatch_data_list) > 0 else [],
+        # 対応表への登録候補 {請求項目名: 費目名}
+        "alias_candidates": alias_candidates,
     }
 
 
@@ -146,29 +161,24 @@ def get_apploval_check_service(year, month):
 
     # 入出金明細データの取得
     qs_pb = Transaction.get_qs_pb(tstart, tend, "0", "0", "expense", True, False)
+    # 支払い承認の要否(is_approval)は取り込み時、チェック文字列・費目の変更時に更新済み
     qs_pb = qs_pb.order_by("transaction_date", "himoku__code")
-    # step1 摘要欄コメントで支払い承認の有無をチェックしてアップデートする。
-    _ = update_transaction_approval_status(qs_pb)
-    # step2 費目で支払い承認の有無をチェック。
-    _ = Transaction.set_is_approval_himoku(qs_pb)
 
     # 支出合計金額。（支払い承認が必要な費目だけの合計とする）
-    total_pb = 0
-    for d in qs_pb:
-        if d.is_approval:
-            total_pb += d.amount
+    total_pb = qs_pb.totals()["approval_withdrawals"]
 
     # 未払いデータ
     qs_this_miharai, total_miharai = BalanceSheet.get_miharai_bs(tstart, tend)
 
     # 前月の未払金
-    qs_last_miharai = BalanceSheet.objects.filter(monthly_date__range=[last_tstart, last_tend]).filter(
+    qs_last_miharai = BalanceSheet.objects.in_period(Period.between(last_tstart, last_tend)).filter(
         item_name__item_name__contains=settings.PAYABLE
     )
     # 前月の未収金合計
-    total_last_miharai = 0
-    for d in qs_last_miharai:
-        total_last_miharai += d.amounts
+    total_last_miharai = qs_last_miharai.totals()["total"]
+
+    # 支払い承認データと出金データの1件毎の照合
+    matching = get_payment_matching(tstart, tend)
 
     return {
         "mr_list": qs_payment,
@@ -180,81 +190,126 @@ def get_apploval_check_service(year, month):
         "this_miharai": qs_this_miharai,
         "this_miharai_total": total_miharai,
         "last_miharai_total": total_last_miharai,
+        "matching": matching,
         "year": year,
         "month": month,
     }
 
 
-def update_transaction_approval_status(transaction_queryset):
-    """
-    摘要欄のテキストを解析し、承認が必要かどうかを一括更新する
-    """
-    # 承認不要条件の取得
-    check_criteria = ApprovalCheckData.objects.filter(alive=True)
-    if not check_criteria:
-        return
-
-    # 正規表現パターンのリストを事前に作成（ループ内の処理を高速化）
-    patterns = [re.compile(str(c.atext)) for c in check_criteria if c.atext]
+def _ngrams(name):
+    """照合用の文字bigramの集合（1文字の名前はその文字）"""
+    key = "".join(unicodedata.normalize("NFKC", name or "").split())
+    if len(key) < 2:
+        return {key} if key else set()
+    return {key[i : i + 2] for i in range(len(key) - 1)}
 
-    updated_objs = []
 
-    for obj in transaction_queryset:
-        description = str(obj.description or "")
-        if not description:
-            continue
-
-        # いずれかのパターンにマッチするか確認
-        is_match = any(p.search(description) for p in patterns)
-
-        # 承認不要に該当し、かつ現在「承認必要」ならリストに追加
-        if is_match and obj.is_approval:
-            obj.is_approval = False
-            updated_objs.append(obj)
+class NgramIndex:
+    """名前の文字bigramの転置インデックス
+    - 類似度はbigramのDice係数（2 * 共通数 / (数 + 数)）。共通のbigramを持つ名前だけを比較する。
+    """
 
-    # まとめて更新
-    if updated_objs:
-        Transaction.objects.bulk_update(updated_objs, ["is_approval"])
+    def __init__(self, names):
+        self.grams = {}
+        self.index = {}
+        for name in names:
+            self.grams[name] = _ngrams(name)
+            for gram in self.grams[name]:
+                self.index.setdefault(gram, set()).add(name)
+
+    def scores(self, name):
+        """{名前: 類似度}を返す（共通のbigramが無い名前は含まない）"""
+        grams = _ngrams(name)
+        counts = Counter()
+        for gram in grams:
+            counts.update(self.index.get(gram, ()))
+        return {other: 2 * n / (len(grams) + len(self.grams[other])) for other, n in counts.items()}
+
+
+def get_billing_name_lists(qs_mr, qs_billing):
+    """月次収入と請求金額内訳データを照合用の[[名前, 金額], ...]のリストにする
+    - 名前は対応表（BillingItemAlias）と同じ費目名・請求項目名（会計区分の略称は付けない）。
+    """
+    list_mr = [[i.himoku.himoku_name, i.amount] for i in qs_mr]
+    list_billing = [[i.billing_item.item_name, i.billing_amount] for i in qs_billing]
+    return list_mr, list_billing
 
 
-def get_himoku_name_fuzzy(mr_list, billing_list, cutoff=0.4):
-    """
-    mr_list, billing_list: [[品名, 価格], ...] のリスト
-    戻り値: [[月次収入費目名, 収入金額, 請求費目名, 請求金額], ...]
+def _pair_billing_items(mr_list, b_dict, cutoff):
+    """月次収入の費目と請求項目を対応付ける
+    - 戻り値: ({mr_listの添字: [請求項目名, ...]}, 対応付けた請求項目名のset, {請求項目名: 費目名}
+      （類似度で照合して金額が一致した組））
     """
-    results = []
+    alias_map = BillingItemAlias.get_alias_map()
 
-    # blling_listデータを検索しやすく整理 (文字列化を徹底)
-    b_names = [str(item[0]) for item in billing_list]
-    b_dict = {str(item[0]): item[1] for item in billing_list}
+    # 1. 対応表による読み替え（費目名 → 請求項目名のリスト）
+    mapped = {}
+    for name_b in b_dict:
+        if name_b in alias_map:
+            mapped.setdefault(alias_map[name_b], []).append(name_b)
 
-    # blling_listのうち、マッチング済み（処理済み）の名前を記録するセット
+    pairs = {}
     matched_b_names = set()
+    for idx, (name_a, _) in enumerate(mr_list):
+        names_b = [b for b in mapped.get(str(name_a), []) if b not in matched_b_names]
+        if names_b:
+            pairs[idx] = names_b
+            matched_b_names.update(names_b)
+
+    # 2. 対応表にない請求項目だけを類似度で照合する
+    index = NgramIndex([b for b in b_dict if b not in alias_map])
+    candidates = []
+    for idx, (name_a, _) in enumerate(mr_list):
+        if idx in pairs:
+            continue
+        for name_b, score in index.scores(str(name_a)).items():
+            if score >= cutoff:
+                candidates.append((-score, idx, name_b))
+    candidates.sort()
+    confirmed = {}
+    for _, idx, name_b in candidates:
+        if idx in pairs or name_b in matched_b_names:
+            continue
+        pairs[idx] = [name_b]
+        matched_b_names.add(name_b)
+        if b_dict[name_b] == mr_list[idx][1]:
+            confirmed[name_b] = str(mr_list[idx][0])
+    return pairs, matched_b_names, confirmed
+
+
+def get_billing_match(mr_list, billing_list, cutoff=0.4):
+    """月次収入の費目と請求項目を照合して、金額が異なる組と対応表への登録候補を返す
+    - mr_list, billing_list: [[名前, 金額], ...] のリスト（get_billing_name_lists()）
+    - 請求項目は対応表（BillingItemAlias）で費目に読み替える。同じ費目の請求項目が複数ある場合は合計する。
+    - 対応表にない請求項目だけを、費目名とのbigram類似度（cutoff以上、高い順）で照合する。
+    - 対応表は変更しない（登録は確認画面（BillingAliasLearnView）で行う）。
+    - 戻り値: ([[月次収入費目名, 収入金額, 請求費目名, 請求金額], ...],
+      {請求項目名: 費目名}（類似度で照合して金額が一致した組。対応表への登録候補）)
+    """
+    b_dict = {str(item[0]): item[1] for item in billing_list}
+    pairs, matched_b_names, confirmed = _pair_billing_items(mr_list, b_dict, cutoff)
 
-    # 1. 月次収入報告の費目について、請求金額内訳データと照合
-    for item_a in mr_list:
-        name_a = str(item_a[0])
-        price_a = item_a[1]
-
-        # B店の中から似た名前を探す
-        matches = difflib.get_close_matches(name_a, b_names, n=1, cutoff=cutoff)
-
-        if matches:
-            name_b = matches[0]
-            price_b = b_dict[name_b]
-            matched_b_names.add(name_b)  # 処理済みとして記録
-
-            # 価格が異なる場合のみ追加
+    # 金額が異なる組と、相手の無いデータを抽出する
+    results = []
+    for idx, (name_a, price_a) in enumerate(mr_list):
+        if idx in pairs:
+            price_b = sum(b_dict[b] for b in pairs[idx])
             if price_a != price_b:
-                results.append([name_a, price_a, name_b, price_b])
+                results.append([str(name_a), price_a, "・".join(pairs[idx]), price_b])
         else:
-            # B店に存在しない場合 (B価格を0にする)
-            results.append([name_a, price_a, "（請求項目に該当なし）", 0])
-
-    # 2. B店にしか存在しない（まだマッチングしていない）商品を抽出
+            results.append([str(name_a), price_a, "（請求項目に該当なし）", 0])
     for name_b, price_b in b_dict.items():
         if name_b not in matched_b_names:
-            # A店に存在しない場合 (A価格を0にする)
             results.append(["（月次報告に該当なし）", 0, name_b, price_b])
 
-    return results
+    return results, confirmed
+
+
+def get_billing_alias_candidates(mr_list, billing_list, cutoff=0.4):
+    """対応表への登録候補 {請求項目名: 費目名} を返す（get_billing_match()の登録候補）"""
+    return get_billing_match(mr_list, billing_list, cutoff)[1]
+
+
+def get_himoku_name_fuzzy(mr_list, billing_list, cutoff=0.4):
+    """月次収入の費目と請求項目を照合して、金額が異なる組を返す（get_billing_match()の金額が異なる組）"""
+    return get_billing_match(mr_list, billing_list, cutoff)[0]
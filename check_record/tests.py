@@ -1,3 +1,306 @@
-from django.test import TestCase
+import datetime
+import io
+import json
 
-# Create your tests here.
+from billing.models import BillingItem
+from django.contrib.auth import get_user_model
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.core.management import CommandError, call_command
+from django.test import RequestFactory, TestCase
+from record.models import Account, AccountingClass, Bank, Himoku, Transaction
+
+from check_record.models import AuditResult, BillingItemAlias, HimokuAlias
+from check_record.services.audit_month import AuditMonth
+from check_record.services.audit_store import get_audit_results, get_stored_audit_results
+from check_record.services.balance_continuity_service import get_balance_breaks
+from check_record.services.expense_check_service import get_expense_check_totals
+from check_record.services.income_check_service import get_income_check_totals
+from check_record.services.matching_service import match_payments
+from check_record.services.reconcile_service import get_reconcile_matrix
+from check_record.services.services import (
+    get_billing_alias_candidates,
+    get_expense_inconsistency_summary,
+    get_himoku_name_fuzzy,
+)
+from check_record.views import AuditYearRecomputeView, AuditYearSummaryView
+
+User = get_user_model()
+
+
+class AuditSweepCommandTests(TestCase):
+    """audit_sweepコマンドのテスト"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="pass")
+        ac = AccountingClass.objects.create(code=1, accounting_name="管理費会計")
+        self.himoku = Himoku.objects.create(code=1, himoku_name="修繕費", accounting_class=ac)
+        bank = Bank.objects.create(code="0001", bank_name="銀行")
+        self.account = Account.objects.create(account_name="口座", account_number="1234567", bank=bank)
+        self._create(datetime.date(2024, 5, 10), 3000)
+
+    def _create(self, date, amount):
+        return Transaction.objects.create(
+            transaction_date=date,
+            account=self.account,
+            himoku=self.himoku,
+            amount=amount,
+            author=self.user,
+        )
+
+    def test_json_matches_check_pages(self):
+        out = io.StringIO()
+        call_command("audit_sweep", "2024", "--workers", "1", stdout=out, stderr=io.StringIO())
+        data = json.loads(out.getvalue())
+
+        self.assertEqual(len(data["months"]), 12)
+        may = next(m for m in data["months"] if m["month"] == 5)
+        summary = get_expense_inconsistency_summary(2024, 5)
+        self.assertEqual(may["checks"]["inconsistency"]["total_pb"], summary["total_pb"])
+        self.assertEqual(may["checks"]["inconsistency"]["diff"], summary["total_pb"] - summary["total_mr"])
+        self.assertEqual(may["checks"]["approval"]["total_pb"], 3000)
+        # 収入・支出チェックはチェック画面と同じservice関数の合計・差額
+        expense = get_expense_check_totals(AuditMonth(2024, 5))
+        self.assertEqual(may["checks"]["expense"]["diff"], expense["total_diff"])
+        self.assertEqual(
+            may["checks"]["income"]["total_pb"], get_income_check_totals(AuditMonth(2024, 5))["total_pb"]
+        )
+        self.assertEqual(set(data["timings"]), set(may["checks"]))
+
+    def test_csv(self):
+        out = io.StringIO()
+        call_command(
+            "audit_sweep", "2024", "--format", "csv", "--workers", "1", stdout=out, stderr=io.StringIO()
+        )
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith("year,month,check,"))
+        self.assertEqual(len(lines), 1 + 12 * 6)
+
+    def test_store_recomputes_only_stale_months(self):
+        other = Himoku.objects.create(
+            code=2, himoku_name="清掃費", accounting_class=self.himoku.accounting_class
+        )
+        results, recomputed, _ = get_audit_results(2024)
+        self.assertEqual(len(recomputed), 12)
+        self.assertEqual(AuditResult.objects.count(), 12 * 6)
+        self.assertEqual(results[(2024, 5)]["approval"]["total_pb"], 3000)
+
+        _, recomputed, _ = get_audit_results(2024)
+        self.assertEqual(recomputed, [])
+
+        # 当月と、前月のデータを参照する翌月だけを再計算する
+        obj = self._create(datetime.date(2024, 8, 1), 500)
+        results, recomputed, _ = get_audit_results(2024)
+        self.assertEqual(recomputed, [(2024, 8), (2024, 9)])
+        self.assertEqual(results[(2024, 8)]["approval"]["total_pb"], 500)
+
+        # 金額の変更も検出する
+        obj.amount = 700
+        obj.save()
+        results, recomputed, _ = get_audit_results(2024)
+        self.assertEqual(recomputed, [(2024, 8), (2024, 9)])
+        self.assertEqual(results[(2024, 8)]["approval"]["total_pb"], 700)
+
+        # 件数・金額合計が変わらない費目の付け替えも検出する（更新日時を変えないupdate()でも内訳で検出する）
+        Transaction.objects.filter(pk=obj.pk).update(himoku=other)
+        _, recomputed, _ = get_audit_results(2024)
+        self.assertEqual(recomputed, [(2024, 8), (2024, 9)])
+
+    def test_summary_page_only_reads_stored_results(self):
+        admin, _ = User.objects.get_or_create(username="admin", is_superuser=True)
+        request = RequestFactory().get("/check_record/audit_year_summary/?year=2024")
+        request.user = admin
+        response = AuditYearSummaryView.as_view()(request)
+        response.render()
+        self.assertEqual(AuditResult.objects.count(), 0)
+        self.assertEqual(response.context_data["stale_months"], list(range(1, 13)))
+
+        # 再計算はPOSTで行う
+        request = RequestFactory().post("/check_record/audit_year_recompute/", {"year": 2024})
+        request.user = admin
+        request.session = {}
+        request._messages = FallbackStorage(request)
+        AuditYearRecomputeView.as_view()(request)
+        self.assertEqual(AuditResult.objects.count(), 12 * 6)
+        _, stale = get_stored_audit_results(2024)
+        self.assertEqual(stale, {})
+
+
+class ReconcileMatrixTests(TestCase):
+    """年間照合表のテスト"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="pass")
+        ac = AccountingClass.objects.create(code=1, accounting_name="管理費会計")
+        self.himoku = Himoku.objects.create(code=1, himoku_name="緑地維持管理費", accounting_class=ac)
+        bank = Bank.objects.create(code="0001", bank_name="銀行")
+        self.account = Account.objects.create(account_name="口座", account_number="1234567", bank=bank)
+        for date, amount in [(datetime.date(2024, 5, 10), 3000), (datetime.date(2024, 7, 1), 200)]:
+            Transaction.objects.create(
+                transaction_date=date,
+                account=self.account,
+                himoku=self.himoku,
+                amount=amount,
+                author=self.user,
+            )
+
+    def test_alias_and_two_queries(self):
+        # 対応表（マイグレーションで登録済み）を読み込んでおく
+        self.assertEqual(HimokuAlias.resolve("緑地維持管理費"), "全体利用施設管理料")
+        with self.assertNumQueries(2):
+            matrix = get_reconcile_matrix(2024, "expense")
+
+        row = matrix["rows"][0]
+        self.assertEqual(row["himoku_name"], "全体利用施設管理料")
+        self.assertEqual(row["cells"][4], {"month": 5, "mr": 0, "pb": 3000, "diff": 3000})
+        self.assertEqual(matrix["totals"]["pb"], 3200)
+        self.assertEqual(matrix["totals"]["cells"][6]["diff"], 200)
+
+
+class PaymentMatchingTests(TestCase):
+    """支払い承認データと出金データの照合のテスト"""
+
+    def _payment(self, pk, date, amount, name=""):
+        return {"id": pk, "date": date, "amount": amount, "name": name}
+
+    def _withdrawal(self, pk, date, amount, *names):
+        return {"id": pk, "date": date, "amount": amount, "names": names or ("",)}
+
+    def test_match_by_amount_window_and_name(self):
+        d = datetime.date
+        payments = [
+            self._payment(1, d(2024, 5, 1), 1000, "ｶ)ﾐﾄﾞﾘｿﾞｳｴﾝ"),
+            self._payment(2, d(2024, 5, 1), 1000, "デンキコウジ"),
+            self._payment(3, d(2024, 5, 1), 5000, "遅すぎる支払い"),
+        ]
+        withdrawals = [
+            self._withdrawal(11, d(2024, 5, 3), 1000, "デンキコウジ"),
+            self._withdrawal(12, d(2024, 5, 2), 1000, "カ)ミドリゾウエン"),
+            self._withdrawal(13, d(2024, 5, 20), 5000),
+            self._withdrawal(14, d(2024, 5, 2), 700),
+        ]
+        for join in ("hash", "merge"):
+            result = match_payments(payments, withdrawals, days=7, join=join)
+            pairs = {(m["payment"]["id"], m["withdrawal"]["id"]) for m in result["matched"]}
+            self.assertEqual(pairs, {(1, 12), (2, 11)})
+            self.assertEqual([p["id"] for p in result["unmatched_payments"]], [3])
+            self.assertEqual([w["id"] for w in result["unmatched_withdrawals"]], [13, 14])
+
+    def test_hash_and_merge_agree_for_a_year(self):
+        start = datetime.date(2024, 1, 1)
+        payments = []
+        withdrawals = []
+        for i in range(3000):
+            date = start + datetime.timedelta(days=i % 365)
+            amount = (i % 97) * 1000
+            payments.append(self._payment(i, date, amount, f"支払先{i % 13}"))
+            if i % 10:
+                withdrawals.append(
+                    self._withdrawal(i, date + datetime.timedelta(days=i % 4), amount, f"支払先{i % 7}")
+                )
+
+        hashed = match_payments(payments, withdrawals, days=3, join="hash")
+        merged = match_payments(payments, withdrawals, days=3, join="merge")
+        self.assertEqual(hashed, merged)
+        self.assertEqual(
+            len(hashed["matched"]) + len(hashed["unmatched_payments"]),
+            len(payments),
+        )
+
+
+class BillingItemAliasTests(TestCase):
+    """請求項目と費目の対応表のテスト"""
+
+    def setUp(self):
+        ac = AccountingClass.objects.create(code=1, accounting_name="管理費会計")
+        Himoku.objects.create(code=1, himoku_name="駐車場使用料", accounting_class=ac, is_income=True)
+        Himoku.objects.create(code=2, himoku_name="管理費", accounting_class=ac, is_income=True)
+        BillingItem.objects.create(code=1, item_name="駐車場料金")
+        BillingItem.objects.create(code=2, item_name="管理費")
+
+    def test_learn_confirmed_matches_and_use_them(self):
+        mr = [["駐車場使用料", 1000], ["管理費", 5000]]
+        billing = [["駐車場料金", 1000], ["管理費", 4000]]
+        # 照合だけでは登録しない。金額が一致した組が登録候補になる
+        self.assertEqual(get_himoku_name_fuzzy(mr, billing), [["管理費", 5000, "管理費", 4000]])
+        self.assertFalse(BillingItemAlias.objects.exists())
+        candidates = get_billing_alias_candidates(mr, billing)
+        self.assertEqual(candidates, {"駐車場料金": "駐車場使用料"})
+
+        # 戻り値は新たに登録した件数（登録済みの請求項目は数えない）
+        self.assertEqual(BillingItemAlias.learn(candidates), 1)
+        self.assertEqual(BillingItemAlias.learn(candidates), 0)
+        self.assertEqual(BillingItemAlias.get_alias_map(), {"駐車場料金": "駐車場使用料"})
+
+        # 登録済みの請求項目は類似度に関係なく対応表で読み替え、同じ費目の請求項目は合計する
+        alias = BillingItemAlias.objects.get()
+        alias.himoku = Himoku.objects.get(himoku_name="管理費")
+        alias.save()
+        BillingItemAlias.objects.create(
+            billing_item=BillingItem.objects.get(item_name="管理費"), himoku=alias.himoku
+        )
+        result = get_himoku_name_fuzzy([["管理費", 5000]], [["駐車場料金", 1000], ["管理費", 4000]])
+        self.assertEqual(result, [])
+
+
+class BalanceContinuityTests(TestCase):
+    """通帳残高の連続性チェックのテスト"""
+
+    def setUp(self):
+        bank = Bank.objects.create(code="0001", bank_name="銀行")
+        self.account = Account.objects.create(account_name="口座", account_number="1234567", bank=bank)
+        d = datetime.date
+        rows = [
+            (d(2024, 5, 1), True, 1000, 1000),
+            (d(2024, 5, 2), False, 300, 700),
+            # 1行（出金200）が欠落している
+            (d(2024, 5, 2), True, 100, 600),
+            (d(2024, 5, 10), False, 100, 500),
+        ]
+        self.objs = [
+            Transaction.objects.create(
+                transaction_date=date,
+                account=self.account,
+                is_income=is_income,
+                amount=amount,
+                balance=balance,
+            )
+            for date, is_income, amount, balance in rows
+        ]
+        # 手入力データ（相殺・分割）は残高を元データからコピーするため判定しない
+        Transaction.objects.create(
+            transaction_date=d(2024, 5, 2),
+            account=self.account,
+            amount=-300,
+            balance=700,
+            is_manualinput=True,
+        )
+
+    def test_breaks_with_surrounding_rows(self):
+        with self.assertNumQueries(2):
+            breaks = get_balance_breaks()
+        self.assertEqual(len(breaks), 1)
+        b = breaks[0]
+        self.assertEqual(
+            (b["prev"]["id"], b["row"]["id"], b["next"]["id"]), tuple(o.pk for o in self.objs[1:])
+        )
+        self.assertEqual((b["expected"], b["gap"]), (800, -200))
+
+        with self.assertRaises(CommandError):
+            call_command("check_balance_continuity", stdout=io.StringIO(), stderr=io.StringIO())
+
+        # 欠落した行を登録すると連続する（同じ日のデータは登録順に判定する）
+        self.objs[2].delete()
+        Transaction.objects.bulk_create(
+            [
+                Transaction(
+                    transaction_date=datetime.date(2024, 5, 2),
+                    account=self.account,
+                    is_income=is_income,
+                    amount=amount,
+                    balance=balance,
+                )
+                for is_income, amount, balance in [(False, 200, 500), (True, 100, 600)]
+            ]
+        )
+        with self.assertNumQueries(1):
+            self.assertEqual(get_balance_breaks(), [])
@@ -25,8 +25,17 @@ urlpatterns = [
     ),
     # 請求金額内訳データチェック
     path("kurasel_ba_income_check/", views.BillingAmountCheckView.as_view(), name="kurasel_billing_check"),
+    # 請求項目と費目の対応表への登録（確認画面）
+    path("billing_alias_learn/", views.BillingAliasLearnView.as_view(), name="billing_alias_learn"),
     # 月次報告の年間収入データと口座収入データのチェック
     path("year_income_check/", views.YearReportIncomeCheckView.as_view(), name="year_income_check"),
     # 月次報告の年間支出データと口座支出データのチェック
     path("year_expense_check/", views.YearReportExpenseCheckView.as_view(), name="year_expense_check"),
+    # 全チェックの月別結果（保存済みの結果を使う）
+    path("audit_year_summary/", views.AuditYearSummaryView.as_view(), name="audit_year_summary"),
+    path("audit_year_recompute/", views.AuditYearRecomputeView.as_view(), name="audit_year_recompute"),
+    # 月次報告と通帳データの年間照合表（費目×月）
+    path("reconcile_matrix/", views.ReconcileMatrixView.as_view(), name="reconcile_matrix"),
+    # 通帳残高の連続性チェック（全期間）
+    path("balance_continuity/", views.BalanceContinuityView.as_view(), name="balance_continuity"),
 ]
@@ -1,6 +1,16 @@
 from .apploval_check_views import (
     ApprovalExpenseCheckView,
 )
+from .audit_summary_views import (
+    AuditYearRecomputeView,
+    AuditYearSummaryView,
+)
+from .balance_continuity_views import (
+    BalanceContinuityView,
+)
+from .billing_alias_views import (
+    BillingAliasLearnView,
+)
 from .billing_check_views import (
     BillingAmountCheckView,
 )
@@ -15,12 +25,21 @@ from .income_check_views import (
 from .inconsistency_check_views import (
     IncosistencyCheckView,
 )
+from .reconcile_views import (
+    ReconcileMatrixView,
+)
 
 # 外部からimport可能にするための定義（無くても動くが、あると便利）
 __all__ = [
     # Approval、BillingAmount
     "ApprovalExpenseCheckView",
     "BillingAmountCheckView",
+    "BillingAliasLearnView",
+    # BalanceContinuity
+    "BalanceContinuityView",
+    # AuditSummary
+    "AuditYearRecomputeView",
+    "AuditYearSummaryView",
     # Expense
     "MonthlyReportExpenseCheckView",
     "YearReportExpenseCheckView",
@@ -29,4 +48,6 @@ __all__ = [
     "YearReportIncomeCheckView",
     # Inconsistency
     "IncosistencyCheckView",
+    # Reconcile
+    "ReconcileMatrixView",
 ]
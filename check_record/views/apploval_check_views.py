@@ -1,6 +1,7 @@
 import logging
 
 from common.mixins import PeriodParamMixin
+from common.response_cache import ReportCacheMixin
 from django.contrib.auth.mixins import PermissionRequiredMixin
 from django.views.generic import TemplateView
 from passbook.forms import YearMonthForm
@@ -10,11 +11,12 @@ from check_record.services.services import get_apploval_check_service
 logger = logging.getLogger(__name__)
 
 
-class ApprovalExpenseCheckView(PermissionRequiredMixin, PeriodParamMixin, TemplateView):
+class ApprovalExpenseCheckView(ReportCacheMixin, PermissionRequiredMixin, PeriodParamMixin, TemplateView):
     """支払い承認データと入出金明細データの月別比較リスト
     - PeriodParamMixinを継承してget_year_month_params()を呼び出す。
     - 入出金データの合計では、承認不要費目（資金移動、共用部電気料等）を除外する。
     - 未払金（貸借対照表データ）の表示。
+    - 支払い承認データと出金データを1件毎に照合し、対応の無いデータを表示する。
     """
 
     template_name = "check_record/kurasel_ap_expense_check.html"
@@ -40,6 +42,7 @@ class ApprovalExpenseCheckView(PermissionRequiredMixin, PeriodParamMixin, Templa
                 "this_miharai": summary["this_miharai"],
                 "this_miharai_total": summary["this_miharai_total"],
                 "last_miharai_total": summary["last_miharai_total"],
+                "matching": summary["matching"],
                 "form": YearMonthForm(initial={"year": summary["year"], "month": summary["month"]}),
                 "yyyymm": str(year) + "年" + str(month) + "月",
                 "year": year,
@@ -0,0 +1,73 @@
+from common.mixins import PeriodParamMixin
+from django.contrib import messages
+from django.contrib.auth.mixins import PermissionRequiredMixin
+from django.shortcuts import redirect
+from django.urls import reverse
+from django.views.generic import TemplateView, View
+from passbook.forms import YearMonthForm
+
+from check_record.services.audit_service import CHECK_LABELS, CHECKS
+from check_record.services.audit_store import get_audit_results, get_stored_audit_results
+
+
+class AuditYearSummaryView(PermissionRequiredMixin, PeriodParamMixin, TemplateView):
+    """全チェックの月別の差額一覧
+    - PeriodParamMixinを継承してget_year_month_params()を呼び出す。
+    - 保存済みのチェック結果を表示するだけで、再計算はしない。
+      入力データが変わった月は「要再計算」と表示し、再計算はAuditYearRecomputeView（またはaudit_sweepコマンド）で行う。
+    """
+
+    template_name = "check_record/audit_year_summary.html"
+    permission_required = ("record.view_transaction",)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        year, _ = self.get_year_month_params()
+
+        results, stale = get_stored_audit_results(year)
+
+        # チェック毎に、月別の結果とチェック画面へのリンクを並べる
+        months = sorted(results)
+        rows = []
+        for name in CHECKS:
+            label, url_name = CHECK_LABELS[name]
+            url = reverse(url_name)
+            cells = [
+                {
+                    "month": month,
+                    "diff": results[(y, month)].get(name, {}).get("diff"),
+                    "stale": name in stale.get((y, month), []),
+                    "url": f"{url}?year={y}&month={month}",
+                }
+                for y, month in months
+            ]
+            rows.append({"label": label, "cells": cells})
+
+        context.update(
+            {
+                "year": year,
+                "months": [month for _, month in months],
+                "rows": rows,
+                "stale_months": [month for _, month in sorted(stale)],
+                "form": YearMonthForm(initial={"year": year}),
+            }
+        )
+        return context
+
+
+class AuditYearRecomputeView(PermissionRequiredMixin, View):
+    """年間チェック結果の再計算（POSTのみ）
+    - 入力データが変わった月だけ再計算して保存し、年間チェック結果画面に戻る。
+    """
+
+    permission_required = ("check_record.add_auditresult", "check_record.change_auditresult")
+
+    def post(self, request, *args, **kwargs):
+        year = int(request.POST.get("year"))
+        _, recomputed, _ = get_audit_results(year)
+        if recomputed:
+            months = ", ".join(str(month) for _, month in recomputed)
+            messages.success(request, f"{year}年のチェック結果を再計算しました（{months}月）。")
+        else:
+            messages.info(request, f"{year}年のチェック結果は最新です。")
+        return redirect(f"{reverse('check_record:audit_year_summary')}?year={year}")
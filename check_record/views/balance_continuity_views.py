@@ -0,0 +1,18 @@
+from django.contrib.auth.mixins import PermissionRequiredMixin
+from django.views.generic import TemplateView
+
+from check_record.services.balance_continuity_service import get_balance_breaks
+
+
+class BalanceContinuityView(PermissionRequiredMixin, TemplateView):
+    """通帳残高の連続性チェック（全期間）
+    - 直前のデータの残高 ± 金額が残高と一致しないデータを、前後のデータと並べて表示する。
+    """
+
+    template_name = "check_record/balance_continuity.html"
+    permission_required = ("record.view_transaction",)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["breaks"] = get_balance_breaks()
+        return context
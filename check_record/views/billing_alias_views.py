@@ -0,0 +1,42 @@
+from common.mixins import PeriodParamMixin
+from django.contrib import messages
+from django.contrib.auth.mixins import PermissionRequiredMixin
+from django.shortcuts import redirect
+from django.urls import reverse
+from django.views.generic import TemplateView
+
+from check_record.models import BillingItemAlias
+from check_record.services.services import get_billing_check_service
+
+
+class BillingAliasLearnView(PermissionRequiredMixin, PeriodParamMixin, TemplateView):
+    """請求項目と費目の対応表への登録（確認画面）
+    - 請求金額チェックで類似度で照合して金額が一致した組を表示し、選択した組だけを登録する。
+    - 請求金額チェック画面はキャッシュするため、登録はこの画面のPOSTで行う。
+    """
+
+    template_name = "check_record/billing_alias_learn.html"
+    permission_required = ("check_record.add_billingitemalias",)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        year, month = self.get_year_month_params()
+        summary = get_billing_check_service(year, month)
+        context.update(
+            {
+                "alias_candidates": sorted(summary["alias_candidates"].items()),
+                "yyyymm": summary["yyyymm"],
+                "year": summary["year"],
+                "month": summary["month"],
+            }
+        )
+        return context
+
+    def post(self, request, *args, **kwargs):
+        year = int(request.POST.get("year"))
+        month = int(request.POST.get("month"))
+        candidates = get_billing_check_service(year, month)["alias_candidates"]
+        selected = set(request.POST.getlist("billing_item"))
+        count = BillingItemAlias.learn({b: h for b, h in candidates.items() if b in selected})
+        messages.success(request, f"請求項目と費目の対応表に {count} 件登録しました。")
+        return redirect(f"{reverse('check_record:kurasel_billing_check')}?year={year}&month={month}")
@@ -1,6 +1,7 @@
 import logging
 
 from common.mixins import PeriodParamMixin
+from common.response_cache import ReportCacheMixin
 from django.contrib.auth.mixins import PermissionRequiredMixin
 from django.views.generic import TemplateView
 from passbook.forms import YearMonthForm
@@ -10,7 +11,7 @@ from check_record.services.services import get_billing_check_service
 logger = logging.getLogger(__name__)
 
 
-class BillingAmountCheckView(PermissionRequiredMixin, PeriodParamMixin, TemplateView):
+class BillingAmountCheckView(ReportCacheMixin, PermissionRequiredMixin, PeriodParamMixin, TemplateView):
     """請求金額内訳データと月次報告比較リスト
     - PeriodParamMixinを継承してget_year_month_params()を呼び出す。
     """
@@ -47,6 +48,7 @@ class BillingAmountCheckView(PermissionRequiredMixin, PeriodParamMixin, Template
                 "mismatch_data_list": summary["mismatch_data_list"],
                 "mismatch_total_mr": mismatch_total_mr,
                 "mismatch_total_billing": mismatch_total_billing,
+                "alias_candidates": summary["alias_candidates"],
             }
         )
         return context
@@ -1,6 +1,7 @@
 # check_record/views.py
 
 from common.mixins import PeriodParamMixin
+from common.response_cache import ReportCacheMixin
 from django.contrib.auth.mixins import PermissionRequiredMixin
 from django.views.generic import TemplateView
 from passbook.forms import YearMonthForm
@@ -11,7 +12,9 @@ from check_record.services.expense_check_service import (
 )
 
 
-class MonthlyReportExpenseCheckView(PermissionRequiredMixin, PeriodParamMixin, TemplateView):
+class MonthlyReportExpenseCheckView(
+    ReportCacheMixin, PermissionRequiredMixin, PeriodParamMixin, TemplateView
+):
     """月次収支の支出データと口座支出データの月別比較リスト
     - PeriodParamMixinを継承してget_year_month_params()を呼び出す。
     """
@@ -26,9 +29,6 @@ class MonthlyReportExpenseCheckView(PermissionRequiredMixin, PeriodParamMixin, T
         # Service層で集計
         data = get_monthly_expense_check_data(year, month)
 
-        # 差額の計算: (実際の出金) - (報告上の費用) - (前月からの未払解消分)
-        total_diff = data["total_pb"] - data["total_mr"] - data["total_last_miharai"]
-
         context.update(
             {
                 "year": data["year"],
@@ -38,7 +38,7 @@ class MonthlyReportExpenseCheckView(PermissionRequiredMixin, PeriodParamMixin, T
                 "pb_list": data["qs_pb"],
                 "total_mr": data["total_mr"],
                 "total_pb": data["total_pb"],
-                "total_diff": total_diff,
+                "total_diff": data["total_diff"],
                 "this_miharai": data["qs_this_miharai"],
                 "total_this_miharai": data["total_this_miharai"],
                 "total_last_miharai": data["total_last_miharai"],
@@ -48,7 +48,7 @@ class MonthlyReportExpenseCheckView(PermissionRequiredMixin, PeriodParamMixin, T
         return context
 
 
-class YearReportExpenseCheckView(PermissionRequiredMixin, PeriodParamMixin, TemplateView):
+class YearReportExpenseCheckView(ReportCacheMixin, PermissionRequiredMixin, PeriodParamMixin, TemplateView):
     """月次報告の年間支出データと口座支出データの比較リスト
     - PeriodParamMixinを継承してget_year_month_params()を呼び出す。
     """
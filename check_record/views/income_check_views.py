@@ -2,10 +2,12 @@ import datetime
 import logging
 
 from common.mixins import PeriodParamMixin
+from common.response_cache import ReportCacheMixin
 from common.services import select_period
 from django.contrib.auth.mixins import PermissionRequiredMixin
 from django.views.generic import TemplateView
-from monthly_report.models import BalanceSheet, ReportTransaction
+from monthly_report.models import BalanceSheet
+from monthly_report.services.monthly_report_services import get_year_income_summary
 from passbook.forms import YearMonthForm
 from record.models import Transaction
 
@@ -14,7 +16,7 @@ from check_record.services.income_check_service import calculate_netting_total,
 logger = logging.getLogger(__name__)
 
 
-class MonthlyReportIncomeCheckView(PermissionRequiredMixin, PeriodParamMixin, TemplateView):
+class MonthlyReportIncomeCheckView(ReportCacheMixin, PermissionRequiredMixin, PeriodParamMixin, TemplateView):
     """
     - PeriodParamMixinを継承してget_year_month_params()を呼び出す。
     """
@@ -29,12 +31,6 @@ class MonthlyReportIncomeCheckView(PermissionRequiredMixin, PeriodParamMixin, Te
         # Service層で一括集計
         data = get_monthly_income_check_data(year, month)
 
-        # 計算ロジック（差額など）を整理
-        total_mr_final = data["total_mr"] + data["total_mishuu_claim"]
-        total_pb_final = data["total_pb"] + data["netting_total"]
-
-        total_diff = (total_pb_final + data["total_last_maeuke_claim"]) - total_mr_final
-
         context.update(
             {
                 "year": data["year"],
@@ -50,9 +46,9 @@ class MonthlyReportIncomeCheckView(PermissionRequiredMixin, PeriodParamMixin, Te
                 "total_last_mishuu_bs": data["total_last_mishuu_bs"],
                 "total_last_maeuke_claim": data["total_last_maeuke_claim"],
                 "total_comment": data["total_comment"],
-                "total_mr": total_mr_final,
-                "total_pb": total_pb_final,
-                "total_diff": total_diff,
+                "total_mr": data["total_mr"],
+                "total_pb": data["total_pb"],
+                "total_diff": data["total_diff"],
                 "form": YearMonthForm(initial={"year": data["year"], "month": data["month"]}),
                 "this_maeuke_bs": data["this_maeuke_bs"],
                 "total_maeuke_bs": data["total_maeuke_bs"],
@@ -61,7 +57,7 @@ class MonthlyReportIncomeCheckView(PermissionRequiredMixin, PeriodParamMixin, Te
         return context
 
 
-class YearReportIncomeCheckView(PermissionRequiredMixin, PeriodParamMixin, TemplateView):
+class YearReportIncomeCheckView(ReportCacheMixin, PermissionRequiredMixin, PeriodParamMixin, TemplateView):
     """
     - PeriodParamMixinを継承してget_year_month_params()を呼び出す。
     """
@@ -74,8 +70,8 @@ class YearReportIncomeCheckView(PermissionRequiredMixin, PeriodParamMixin, Templ
         year, _ = self.get_year_month_params()
         tstart, tend = select_period(year, 0)
 
-        # 1. 月次報告年間合計 (Service化推奨だが、ここでは整理のみ)
-        mr_year_income = ReportTransaction.get_year_income(tstart, tend, True).exclude(amount=0)
+        # 1. 月次報告年間合計（集計テーブルから取得）
+        mr_year_income = get_year_income_summary(tstart, tend)
         total_year_income = sum(item["price"] for item in mr_year_income)
 
         # 2. 通帳年間合計
@@ -1,4 +1,5 @@
 from common.mixins import PeriodParamMixin
+from common.response_cache import ReportCacheMixin
 from django.contrib.auth.mixins import PermissionRequiredMixin
 from django.views.generic import TemplateView
 from passbook.forms import YearMonthForm
@@ -6,7 +7,7 @@ from passbook.forms import YearMonthForm
 from check_record.services.services import get_expense_inconsistency_summary
 
 
-class IncosistencyCheckView(PermissionRequiredMixin, PeriodParamMixin, TemplateView):
+class IncosistencyCheckView(ReportCacheMixin, PermissionRequiredMixin, PeriodParamMixin, TemplateView):
     """月次支出報告と通帳支払いデータの「不整合チェック
     - PeriodParamMixinを継承してget_year_month_params()を呼び出す。
     """
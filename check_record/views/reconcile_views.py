@@ -0,0 +1,37 @@
+from common.mixins import PeriodParamMixin
+from common.response_cache import ReportCacheMixin
+from django.contrib.auth.mixins import PermissionRequiredMixin
+from django.views.generic import TemplateView
+from passbook.forms import YearMonthForm
+
+from check_record.services.reconcile_service import KIND_EXPENSE, KIND_LABELS, get_reconcile_matrix
+
+
+class ReconcileMatrixView(ReportCacheMixin, PermissionRequiredMixin, PeriodParamMixin, TemplateView):
+    """月次報告と通帳データの年間照合表（費目×月）
+    - PeriodParamMixinを継承してget_year_month_params()を呼び出す。
+    - GETパラメータkindで収入（income）・支出（expense）を切り替える。
+    """
+
+    template_name = "check_record/reconcile_matrix.html"
+    permission_required = ("record.view_transaction",)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        year, _ = self.get_year_month_params()
+        kind = self.request.GET.get("kind")
+        if kind not in KIND_LABELS:
+            kind = KIND_EXPENSE
+
+        context.update(get_reconcile_matrix(year, kind))
+        context.update(
+            {
+                "year": year,
+                "kind": kind,
+                "kind_label": KIND_LABELS[kind],
+                "kind_choices": KIND_LABELS.items(),
+                "months": range(1, 13),
+                "form": YearMonthForm(initial={"year": year}),
+            }
+        )
+        return context
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class CommonConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "common"
+
+    def ready(self):
+        # 台帳データのバージョン更新用シグナルを登録する
+        from common import ledger_version  # noqa: F401
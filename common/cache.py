@@ -0,0 +1,191 @@
+# common/cache.py
+import copy
+import functools
+import threading
+import time
+import uuid
+
+from django import forms
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import EmptyResultSet, ImproperlyConfigured
+from django.db import transaction as db_transaction
+from django.db.models.signals import post_delete, post_save
+from django.forms.models import ModelChoiceIterator
+
+# -----------------------------------------------------------------------------
+# マスタデータ・コントロールレコードのプロセス内キャッシュ
+# - 値はプロセス内のdictに(バージョン, 値)で保存する。
+# - バージョンはモデル毎にDjangoのキャッシュ(CACHES)に保存し、post_save/post_deleteとそのコミット後に更新する。
+#   gunicornのworker・import_worker・管理コマンドの間で共有するため、CACHESはプロセス間で共有できる
+#   バックエンドにする（is_shared_cache()。台帳データを書き込む管理コマンドはLocMemCacheでは実行しない）。
+# -----------------------------------------------------------------------------
+
+_store = {}
+_lock = threading.Lock()
+# キャッシュ対象のモデル（"app_label.modelname"）
+_watched_labels = set()
+
+
+def _version_key(label):
+    return f"refdata:version:{label}"
+
+
+def new_version():
+    """新しいバージョン（"更新時刻(ns)-uuid"）を返す"""
+    return f"{time.time_ns()}-{uuid.uuid4().hex}"
+
+
+def version_timestamp(versions):
+    """バージョンのうち最も新しい更新時刻（UNIX時間の秒）を返す。時刻を含まないバージョンは無視する"""
+    stamps = []
+    for version in versions:
+        try:
+            stamps.append(int(str(version).split("-", 1)[0]) // 1_000_000_000)
+        except ValueError:
+            continue
+    return max(stamps, default=None)
+
+
+def get_versions(labels):
+    """モデル毎のバージョンのtupleを返す
+    - バージョンが未登録（キャッシュから消えた場合を含む）のモデルは新しいバージョンを登録する。
+    """
+    keys = [_version_key(label) for label in labels]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, new_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return tuple(versions[key] for key in keys)
+
+
+def is_shared_cache():
+    """キャッシュ(CACHES)がプロセス間で共有できるバックエンドか（LocMemCacheはプロセス毎）"""
+    return not isinstance(caches["default"], LocMemCache)
+
+
+def require_shared_cache():
+    """台帳データ・マスタデータを書き込む別プロセス（管理コマンド）の実行前に呼ぶ
+    - LocMemCacheの場合、更新したバージョンがWebサーバのプロセスに届かず、集計ページのキャッシュが古いままになる。
+    """
+    if not is_shared_cache():
+        raise ImproperlyConfigured(
+            "CACHE_URLがプロセス毎のキャッシュ(locmemcache)のため、Webサーバのキャッシュを更新できません。"
+            "ファイルなどプロセス間で共有できるキャッシュを指定してください。"
+        )
+
+
+def bump_version(label):
+    """モデルのバージョンを更新して、そのモデルに依存するキャッシュを無効にする"""
+    cache.set(_version_key(label), new_version(), timeout=None)
+
+
+def watch(*labels):
+    """labelsのモデルの変更（post_save/post_delete）でバージョンを更新するようにシグナルを登録する
+    - senderを"app_label.modelname"で指定するので、モデルの読み込み前でも登録できる。
+    - 全モデル対象のシグナルにすると、対象外のモデルもQuerySet.delete()の高速削除が無効になるため、
+      モデル毎に登録する。
+    """
+    for label in labels:
+        label = label.lower()
+        if label in _watched_labels:
+            continue
+        _watched_labels.add(label)
+        for signal in (post_save, post_delete):
+            signal.connect(_post_change_handler, sender=label, weak=False, dispatch_uid=("refdata", label))
+
+
+def _post_change_handler(sender, **kwargs):
+    """キャッシュ対象のモデルが変更されたら、バージョンを更新し、コミット後にもう一度更新する
+    - 変更したスレッドは、コミット前でも変更後のデータを読む（すぐに更新する）。
+    - 他のスレッドがコミット前のデータを読んで変更後のバージョンでキャッシュした場合も、
+      コミット後の更新で破棄する（バージョンは期限なしのため、そのままでは次の変更まで古いデータが使われる）。
+    """
+    label = sender._meta.label_lower
+    bump_version(label)
+    db_transaction.on_commit(lambda: bump_version(label))
+
+
+def get_or_set(key, labels, func):
+    """labelsのモデルが変更されるまで func() の戻り値を再利用する
+    - list/dictはコピーを返す（呼び出し側での変更がキャッシュに影響しないようにする）。
+    """
+    labels = [label.lower() for label in labels]
+    watch(*labels)
+    version = get_versions(labels)
+    with _lock:
+        hit = _store.get(key)
+    if hit is not None and hit[0] == version:
+        value = hit[1]
+    else:
+        value = func()
+        with _lock:
+            _store[key] = (version, value)
+    if isinstance(value, (list, dict)):
+        return copy.copy(value)
+    return value
+
+
+def cached_master(*labels):
+    """デコレータ: labelsのモデルが変更されるまで、引数毎に関数の戻り値を再利用する
+    - classmethod/staticmethodの内側に付ける。例外は再利用しない。
+    """
+    watch(*labels)
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (func.__module__, func.__qualname__, args, tuple(sorted(kwargs.items())))
+            return get_or_set(key, labels, lambda: func(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
+
+
+def clear():
+    """プロセス内のキャッシュを全て破棄する（テスト用）"""
+    with _lock:
+        _store.clear()
+
+
+# -----------------------------------------------------------------------------
+# 選択肢をキャッシュするModelChoiceField
+# -----------------------------------------------------------------------------
+class CachedModelChoiceIterator(ModelChoiceIterator):
+    """querysetの結果をキャッシュから取り出して選択肢を作る"""
+
+    def _objects(self):
+        qs = self.queryset
+        try:
+            sql = str(qs.query)
+        except EmptyResultSet:
+            return []
+        labels = [qs.model._meta.label_lower, *self.field.depends_on]
+        return get_or_set(("choices", qs.model._meta.label_lower, sql), labels, lambda: list(qs))
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for obj in self._objects():
+            yield self.choice(obj)
+
+    def __len__(self):
+        return len(self._objects()) + (1 if self.field.empty_label is not None else 0)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(self._objects())
+
+
+class CachedModelChoiceField(forms.ModelChoiceField):
+    """マスタデータの選択肢をキャッシュするModelChoiceField
+    - depends_on: 選択肢の表示(__str__)が参照する関連モデル（"app_label.modelname"）。
+    """
+
+    iterator = CachedModelChoiceIterator
+
+    def __init__(self, queryset, *, depends_on=(), **kwargs):
+        self.depends_on = tuple(label.lower() for label in depends_on)
+        watch(queryset.model._meta.label_lower, *self.depends_on)
+        super().__init__(queryset, **kwargs)
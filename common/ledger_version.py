@@ -0,0 +1,147 @@
+# common/ledger_version.py
+from django.core.cache import cache
+from django.db import transaction as db_transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from common.cache import get_versions, new_version, watch
+
+# -----------------------------------------------------------------------------
+# 期間（年月）毎の台帳データのバージョン
+# - 台帳データ（入出金明細・月次収支・貸借対照表など）が変更された年月のバージョンを更新する。
+# - 集計ページのレスポンスキャッシュ（common.response_cache）は、表示期間のバージョンが
+#   変わるまでレンダリング結果を再利用する。
+# - bulk_create()/update()はシグナルを送らないため、呼び出し側でbump_*()を呼ぶ。
+# - バージョンはトランザクションのコミット後に更新する。
+# -----------------------------------------------------------------------------
+
+# 台帳データのモデルと期間を表す日付フィールド
+LEDGER_DATE_FIELDS = {
+    "record.transaction": "transaction_date",
+    "record.claimdata": "claim_date",
+    "monthly_report.reporttransaction": "transaction_date",
+    "monthly_report.balancesheet": "monthly_date",
+    "payment.payment": "payment_date",
+    "billing.billing": "transaction_date",
+}
+# 年単位のデータ（予算）のモデルと年フィールド
+LEDGER_YEAR_FIELDS = {
+    "budget.expensebudget": "year",
+}
+# 集計ページが参照するマスタデータ（common.cacheのバージョンを使う）
+MASTER_LABELS = (
+    "record.accountingclass",
+    "record.himoku",
+    "record.account",
+    "record.approvalcheckdata",
+    "control.controlrecord",
+    "control.fiscallock",
+    "monthly_report.balancesheetitem",
+    "billing.billingitem",
+    "payment.paymentmethod",
+    "check_record.himokualias",
+    "check_record.billingitemalias",
+)
+
+_EPOCH_KEY = "ledger:version:epoch"
+
+
+def _month_key(year, month):
+    return f"ledger:version:{int(year):04d}-{int(month):02d}"
+
+
+def _year_key(year):
+    return f"ledger:version:{int(year):04d}"
+
+
+def _bump_keys(keys):
+    """バージョンをコミット後に更新する
+    - コミット前に更新すると、他のスレッドがコミット前のデータを新しいバージョンでキャッシュしてしまうため。
+      トランザクション外で呼ばれた場合はすぐに更新する。
+    """
+    if keys:
+        db_transaction.on_commit(lambda: cache.set_many({key: new_version() for key in keys}, timeout=None))
+
+
+def bump_dates(*dates):
+    """日付（複数可）を含む年月のバージョンを更新する"""
+    _bump_keys({_month_key(d.year, d.month) for d in dates if d})
+
+
+def bump_period(tstart, tend):
+    """期間（select_period()の戻り値など）に含まれる年月のバージョンを更新する"""
+    keys = set()
+    year, month = tstart.year, tstart.month
+    while (year, month) <= (tend.year, tend.month):
+        keys.add(_month_key(year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    _bump_keys(keys)
+
+
+def bump_years(*years):
+    """年単位のデータ（予算）のバージョンを更新する"""
+    _bump_keys({_year_key(y) for y in years if y})
+
+
+def bump_all():
+    """全期間のバージョンを更新する（期間を特定できない一括更新の後に呼ぶ）"""
+    _bump_keys({_EPOCH_KEY})
+
+
+def get_period_version(year):
+    """年間の表示（前年12月の残高を含む）が依存するバージョンのtupleを返す
+    - 年月毎・年毎・全期間のバージョンと、マスタデータのバージョンを含む。
+    - バージョンが未登録の場合は新しいバージョンを登録する。
+    """
+    year = int(year)
+    keys = [_EPOCH_KEY, _year_key(year), _month_key(year - 1, 12)]
+    keys += [_month_key(year, month) for month in range(1, 13)]
+    versions = cache.get_many(keys)
+    missing = {key: new_version() for key in keys if key not in versions}
+    if missing:
+        for key, token in missing.items():
+            cache.add(key, token, timeout=None)
+        versions.update(cache.get_many(list(missing)))
+    return tuple(versions.get(key) for key in keys) + get_versions(MASTER_LABELS)
+
+
+# --- シグナル ---
+
+
+def _pre_save_handler(sender, instance, raw=False, **kwargs):
+    """変更前の期間を保持する（期間を変更した場合は、変更前の期間も更新する）"""
+    field = LEDGER_DATE_FIELDS.get(sender._meta.label_lower) or LEDGER_YEAR_FIELDS.get(
+        sender._meta.label_lower
+    )
+    instance._ledger_old_period = None
+    if raw or instance.pk is None:
+        return
+    instance._ledger_old_period = (
+        sender._default_manager.filter(pk=instance.pk).values_list(field, flat=True).first()
+    )
+
+
+def _post_change_handler(sender, instance, **kwargs):
+    """台帳データが変更されたら、変更前後の期間のバージョンを更新する"""
+    label = sender._meta.label_lower
+    old = getattr(instance, "_ledger_old_period", None)
+    if label in LEDGER_YEAR_FIELDS:
+        bump_years(getattr(instance, LEDGER_YEAR_FIELDS[label]), old)
+    else:
+        # 文字列で代入された日付も扱えるよう、フィールドの型に変換する
+        field = sender._meta.get_field(LEDGER_DATE_FIELDS[label])
+        bump_dates(field.to_python(getattr(instance, field.attname)), old)
+
+
+def _connect():
+    """台帳データのモデル毎にシグナルを登録する
+    - 全モデル対象のシグナルにすると、対象外のモデルもQuerySet.delete()の高速削除が無効になるため、
+      モデル毎に登録する。
+    """
+    for label in [*LEDGER_DATE_FIELDS, *LEDGER_YEAR_FIELDS]:
+        pre_save.connect(_pre_save_handler, sender=label, weak=False, dispatch_uid=("ledger", label))
+        for signal in (post_save, post_delete):
+            signal.connect(_post_change_handler, sender=label, weak=False, dispatch_uid=("ledger", label))
+    watch(*MASTER_LABELS)
+
+
+_connect()
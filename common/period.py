@@ -0,0 +1,58 @@
+# common/period.py
+import calendar
+import datetime
+import functools
+from dataclasses import dataclass
+
+_ONE_DAY = datetime.timedelta(days=1)
+
+
+def _to_date(value):
+    """datetime（select_period()の旧戻り値など）をdateにする"""
+    return value.date() if isinstance(value, datetime.datetime) else value
+
+
+@dataclass(frozen=True, slots=True)
+class Period:
+    """期間（開始日を含み、終了日を含まない半開区間 [start, end)）
+    - 抽出はQuerySetのin_period()で「start以上・end未満」の範囲条件にする（列を関数で包まない）。
+    - 年月・年の期間は計算結果をキャッシュする。
+    """
+
+    start: datetime.date
+    end: datetime.date
+
+    @classmethod
+    def of(cls, year, month=0):
+        """年月の期間。month=0の場合は年初から年末（select_period()と同じ）"""
+        year, month = int(year), int(month)
+        return cls._month(year, month) if month else cls._year(year)
+
+    @classmethod
+    @functools.lru_cache(maxsize=256)
+    def _month(cls, year, month):
+        last_day = calendar.monthrange(year, month)[1]
+        return cls(datetime.date(year, month, 1), datetime.date(year, month, last_day) + _ONE_DAY)
+
+    @classmethod
+    @functools.lru_cache(maxsize=32)
+    def _year(cls, year):
+        return cls(datetime.date(year, 1, 1), datetime.date(year + 1, 1, 1))
+
+    @classmethod
+    def between(cls, first, last):
+        """開始日・最終日（どちらも含む）の期間。datetimeは日付にする"""
+        return cls(_to_date(first), _to_date(last) + _ONE_DAY)
+
+    @property
+    def last_day(self):
+        """期間の最終日（含む）"""
+        return self.end - _ONE_DAY
+
+    def previous_month(self):
+        """開始日の前月の期間"""
+        last = self.start - _ONE_DAY
+        return Period.of(last.year, last.month)
+
+    def __contains__(self, value):
+        return self.start <= _to_date(value) < self.end
@@ -0,0 +1,48 @@
+# common/querysets.py
+from django.db import models
+from django.db.models import Q, Sum
+from django.db.models.functions import Coalesce
+from django.db.models.query import ModelIterable
+
+
+class PeriodQuerySet(models.QuerySet):
+    """期間(common.period.Period)で抽出するQuerySet
+    - period_field: 期間で抽出する日付フィールド名。
+    - in_period()は「開始日以上・終了日未満」の範囲条件で抽出する。
+      __year/__month（EXTRACT）や__contains（LIKE）と違い列を関数で包まないため、日付のインデックスを使える。
+    """
+
+    period_field = None
+
+    def in_period(self, period, field=None):
+        """期間内のデータを抽出する（field: period_field以外の日付フィールドで抽出する場合に指定）"""
+        field = field or self.period_field
+        return self.filter(**{f"{field}__gte": period.start, f"{field}__lt": period.end})
+
+
+class TotalsQuerySet(models.QuerySet):
+    """合計金額を1回のaggregate()で返すQuerySet
+    - amount_field: 合計する金額フィールド名。
+    - totals_spec: {キー: {フィールド名: 値}}。条件に一致する行の金額を合計する。空のdictは全件の合計。
+    - 評価済み（テンプレートで表示済みなど）のquerysetは、再クエリせずに取得済みの行から合計する。
+    """
+
+    amount_field = "amount"
+    totals_spec = {"total": {}}
+
+    def totals(self):
+        """totals_specのキー毎の合計金額をdictで返す"""
+        if self._result_cache is not None and self._iterable_class is ModelIterable:
+            return {
+                key: sum(
+                    getattr(row, self.amount_field)
+                    for row in self._result_cache
+                    if all(getattr(row, name) == value for name, value in cond.items())
+                )
+                for key, cond in self.totals_spec.items()
+            }
+        aggregates = {
+            key: Coalesce(Sum(self.amount_field, filter=Q(**cond) if cond else None), 0)
+            for key, cond in self.totals_spec.items()
+        }
+        return self.order_by().aggregate(**aggregates)
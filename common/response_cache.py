@@ -0,0 +1,124 @@
+# common/response_cache.py
+import hashlib
+import threading
+
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from django.utils.timezone import localtime
+
+from common.cache import version_timestamp
+from common.ledger_version import get_period_version
+
+# -----------------------------------------------------------------------------
+# 集計ページ・チェックページのレスポンスキャッシュ
+# - キー: ビュー名、GETパラメータ、ユーザーの権限、表示年の台帳データのバージョン。
+# - 表示年の台帳データ（またはマスタデータ）が変更されるまでレンダリング結果を再利用する。
+# - エントリ（ビュー名・GETパラメータ）毎のヒット・ミス件数をプロセス内で集計する。
+# - キーをETag、バージョンの更新時刻をLast-Modifiedとして返し、条件付きGETには
+#   ビューの処理（集計クエリ）を実行せずに304 Not Modifiedを返す。
+# -----------------------------------------------------------------------------
+
+CACHE_TIMEOUT = 60 * 60 * 24
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _count(entry, hit):
+    with _stats_lock:
+        counter = _stats.setdefault(entry, {"hits": 0, "misses": 0})
+        counter["hits" if hit else "misses"] += 1
+
+
+def get_stats():
+    """エントリ毎のヒット・ミス件数を返す {(ビュー名, GETパラメータ): {"hits": n, "misses": n}}"""
+    with _stats_lock:
+        return {entry: dict(counter) for entry, counter in _stats.items()}
+
+
+def reset_stats():
+    """ヒット・ミス件数を破棄する（テスト用）"""
+    with _stats_lock:
+        _stats.clear()
+
+
+def _has_messages(request):
+    """表示待ちのメッセージがあるか（メッセージを含むページはキャッシュしない）"""
+    return len(get_messages(request)) > 0
+
+
+class ReportCacheMixin:
+    """GETのレンダリング結果を表示年の台帳データのバージョンが変わるまで再利用するMixin
+    - 表示専用（フォームの送信やcsrf_tokenを含まない）のTemplateViewに使う。
+    - 権限チェックの後に呼ばれるよう、get()をオーバーライドする。
+    - ETag/Last-Modifiedを返し、If-None-Match/If-Modified-Sinceが一致する場合は304を返す。
+      ブラウザは毎回再検証する（Cache-Control: private, no-cache）。
+    - 表示待ちのメッセージがある場合・レンダリング中にメッセージが追加された場合はキャッシュしない。
+    """
+
+    def get_cache_year(self):
+        """表示年（GETパラメータのyear、未指定の場合は当年）"""
+        return int(self.request.GET.get("year") or localtime(timezone.now()).year)
+
+    def get_cache_entry(self):
+        """キャッシュのエントリ（ビュー名, ソート済みのGETパラメータ）"""
+        params = tuple(sorted((k, tuple(v)) for k, v in self.request.GET.lists()))
+        return (f"{type(self).__module__}.{type(self).__qualname__}", params)
+
+    def get_cache_key(self, entry, versions, today):
+        # 当日の日付はGETパラメータ未指定時の年月に使われるため、キーに含める
+        perms = sorted(self.request.user.get_all_permissions())
+        raw = repr((entry, today, perms, versions))
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _set_validators(self, response, etag, last_modified):
+        """ETag/Last-Modifiedと再検証用のヘッダーを設定する"""
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ("Cookie",))
+        return response
+
+    def get(self, request, *args, **kwargs):
+        try:
+            year = self.get_cache_year()
+        except ValueError:
+            return super().get(request, *args, **kwargs)
+        if _has_messages(request):
+            return super().get(request, *args, **kwargs)
+
+        entry = self.get_cache_entry()
+        versions = get_period_version(year)
+        today = localtime(timezone.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+        key = self.get_cache_key(entry, versions, today.date())
+        etag = quote_etag(key)
+        # 日付が変わった場合も更新されたものとする
+        last_modified = max(version_timestamp(versions) or 0, int(today.timestamp()))
+
+        # 条件付きGET: ブラウザの表示内容が最新であれば304を返す
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            _count(entry, hit=True)
+            return self._set_validators(not_modified, etag, last_modified)
+
+        cached = cache.get("report:" + key)
+        if cached is not None:
+            _count(entry, hit=True)
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+            response["X-Report-Cache"] = "HIT"
+            return self._set_validators(response, etag, last_modified)
+
+        _count(entry, hit=False)
+        response = super().get(request, *args, **kwargs)
+        if hasattr(response, "render"):
+            response.render()
+        response["X-Report-Cache"] = "MISS"
+        if response.status_code != 200 or _has_messages(request):
+            return response
+        cache.set("report:" + key, (response.content, response["Content-Type"]), CACHE_TIMEOUT)
+        return self._set_validators(response, etag, last_modified)
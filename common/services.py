@@ -1,4 +1,3 @@
-import calendar
 import datetime
 
 # common/services.py (または register/services.py)
@@ -9,7 +8,8 @@ from urllib.parse import urlencode
 
 from django.conf import settings
 from django.urls import reverse_lazy
-from django.utils import timezone
+
+from common.period import Period
 
 
 def get_lastmonth(year, month):
@@ -28,16 +28,10 @@ def select_period(year, month):
     - end_date:月末の日付を返す。
     - 受け取り側では __range=[start_date, end_date]でfilterする。
     - month=0の場合、年初から年末を返す。
+    - DateFieldと比較するため、dateを返す（期間の計算はPeriod.of()）。
     """
-    # if str(month).isdecimal():
-    if int(month) > 0:
-        last_day = calendar.monthrange(int(year), int(month))[1]
-        tstart = timezone.datetime(int(year), int(month), 1, 0, 0, 0)
-        tend = timezone.datetime(int(year), int(month), last_day, 0, 0, 0)
-    else:
-        tstart = timezone.datetime(int(year), 1, 1, 0, 0, 0)
-        tend = timezone.datetime(int(year), 12, 31, 0, 0, 0)
-    return tstart, tend
+    period = Period.of(year, month)
+    return period.start, period.last_day
 
 
 def normalize(tmp_list, add_row_num, value):
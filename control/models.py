@@ -1,3 +1,4 @@
+from common.cache import cached_master
 from django.db import models
 from record.models import Himoku
 
@@ -30,6 +31,7 @@ class ControlRecord(models.Model):
         return cls.objects.get("tmp_user_flg")
 
     @classmethod
+    @cached_master("control.ControlRecord", "record.Himoku")
     def get_offset_himoku(cls):
         """相殺処理する費目名を返す
         - 総裁処理する費目は一つだけの想定
@@ -38,6 +40,7 @@ class ControlRecord(models.Model):
         return offset_himoku["to_offset__himoku_name"]
 
     @classmethod
+    @cached_master("control.ControlRecord")
     def get_delete_flg(cls):
         """データ削除フラグの表示/非表示を返す"""
         return cls.objects.values("delete_data_flg")[0]["delete_data_flg"]
@@ -72,6 +75,7 @@ class FiscalLock(models.Model):
         return f"{self.year}年度 ({status})"
 
     @classmethod
+    @cached_master("control.FiscalLock")
     def is_period_frozen(cls, target_year, target_month):
         """指定された日付（1月〜12月年度）がロックされているか判定する
         is_frozen = FiscalLock.is_period_frozen(int(year), int(month))
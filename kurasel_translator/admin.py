@@ -1,3 +1,30 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import ImportBatch, ImportJob
+
+
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ["pk", "kind", "period", "status", "progress", "author", "created_date", "finished_date"]
+    list_filter = ["kind", "status"]
+    ordering = ("-created_date",)
+
+
+admin.site.register(ImportJob, ImportJobAdmin)
+
+
+class ImportBatchAdmin(admin.ModelAdmin):
+    list_display = [
+        "pk",
+        "kind",
+        "period_start",
+        "period_end",
+        "inserted",
+        "updated",
+        "author",
+        "created_date",
+    ]
+    list_filter = ["kind"]
+    ordering = ("-created_date",)
+
+
+admin.site.register(ImportBatch, ImportBatchAdmin)
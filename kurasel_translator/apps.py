@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class KuraselTranslatorConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "kurasel_translator"
+
+    def ready(self):
+        # 費目判定インデックスが依存するマスタの変更を監視する（common.cacheのシグナルを登録する）
+        from kurasel_translator.services import expense_classifier  # noqa: F401
@@ -0,0 +1,92 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from kurasel_translator.services.approval_service import parse_payment_text
+from kurasel_translator.services.balans_sheet_service import parse_bs_text
+from kurasel_translator.services.billing_service import parse_billing_text
+from kurasel_translator.services.claim_service import parse_claim_text
+from kurasel_translator.services.common_service import tokenize
+from kurasel_translator.services.monthly_report_service import translate_kurasel_text
+from kurasel_translator.services.transaction_service import parse_transaction_text
+
+
+def _transaction_text(n):
+    """入出金明細（新しい順、振込依頼人の有無を交互に）"""
+    lines = []
+    for i in range(n):
+        day = f"{12 - i % 12:02}/{28 - i % 28:02}"
+        if i % 2:
+            lines += ["入金", day, f"¥{i * 10:,}", f"¥{i * 100:,}", f"ﾔﾏﾀﾞ{i}", ""]
+        else:
+            lines += ["出金", day, f"¥{i * 10:,}", f"¥{i * 100:,}", f"摘要{i}"]
+    return "\n".join(lines)
+
+
+def _monthly_text(n):
+    header = ["収入の部", "費目", "達成率", "当月実績", "年間予算", "実績累計"]
+    rows = [
+        [f"費目{i}", "50%", f"¥{i * 1000:,}（円）", f"¥{i * 12000:,}", f"¥{i * 6000:,}"] for i in range(n)
+    ]
+    return "\n".join(header + [v for row in rows for v in row])
+
+
+def _bs_text(n):
+    assets = [v for i in range(n) for v in (f"資産{i}", f"¥{i * 1000:,}")]
+    debts = [v for i in range(n) for v in (f"負債{i}", f"¥{i * 100:,}")]
+    return "\n".join(["管理費会計", "資産の部", *assets, "負債の部", *debts, "負債の部合計"])
+
+
+def _payment_text(n):
+    return "\n".join(v for i in range(n) for v in (str(i), f"摘要{i}", f"支払先{i}", f"¥{i * 1000:,}"))
+
+
+def _billing_text(n):
+    return "\n".join(v for i in range(n) for v in (f"項目{i}", f"¥{i * 1000:,}"))
+
+
+def _claim_text(n):
+    return "\n".join(v for i in range(n) for v in (str(i), f"部屋番号{i}号室", f"氏名{i}", f"¥{i * 1000:,}"))
+
+
+# パーサ名: (合成テキストの作成関数, 解析関数)
+PARSERS = {
+    "transaction": (_transaction_text, lambda text: parse_transaction_text(list(tokenize(text)))),
+    "monthly": (_monthly_text, translate_kurasel_text),
+    "balance_sheet": (_bs_text, lambda text: parse_bs_text(list(tokenize(text)))),
+    "payment": (_payment_text, parse_payment_text),
+    "billing": (_billing_text, parse_billing_text),
+    "claim": (_claim_text, parse_claim_text),
+}
+
+
+class Command(BaseCommand):
+    """Kuraselの貼り付けテキストのパーサのマイクロベンチマーク
+    - パーサ毎に合成した大きな貼り付けテキストを解析し、1秒あたりの処理行数を表示する。
+    - DBは使わない（テキストの解析のみ）。
+    """
+
+    help = "合成した貼り付けテキストで各パーサの処理速度（行/秒）を測定する"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--records", type=int, default=10000, help="1回の貼り付けのレコード数")
+        parser.add_argument("--repeat", type=int, default=5, help="測定回数（最速の値を表示する）")
+        parser.add_argument(
+            "parsers", nargs="*", help=f"測定するパーサ（{', '.join(PARSERS)}。省略時は全て）"
+        )
+
+    def handle(self, *args, **options):
+        unknown = [name for name in options["parsers"] if name not in PARSERS]
+        if unknown:
+            raise CommandError(f"不明なパーサです: {', '.join(unknown)}")
+        for name in options["parsers"] or PARSERS:
+            make_text, parse = PARSERS[name]
+            text = make_text(options["records"])
+            line_count = text.count("\n") + 1
+            best = min(self._measure(parse, text) for _ in range(max(1, options["repeat"])))
+            self.stdout.write(f"{name}: {line_count}行 {best * 1000:.1f}ms {line_count / best:,.0f}行/秒")
+
+    def _measure(self, parse, text):
+        start = time.perf_counter()
+        parse(text)
+        return time.perf_counter() - start
@@ -0,0 +1,31 @@
+import time
+
+from common.cache import require_shared_cache
+from django.core.management.base import BaseCommand
+
+from kurasel_translator.services.job_service import run_queued_jobs
+
+
+class Command(BaseCommand):
+    """待機中のKuraselデータ取り込みジョブを実行する
+    - プロセス内のスレッドプールを使わない場合（IMPORT_JOB_THREADS=0）や、
+      サーバの再起動で待機中のまま残ったジョブの実行に使う。
+    - 実行中のジョブと同じ期間のジョブは、そのジョブの終了後に実行する。
+      実行中のまま残った（中断された）ジョブは失敗にしてから実行する。
+    """
+
+    help = "待機中の取り込みジョブを古い順に実行する"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="待機中のジョブを1回実行して終了する")
+        parser.add_argument("--interval", type=float, default=2.0, help="待機中のジョブを確認する間隔（秒）")
+
+    def handle(self, *args, **options):
+        require_shared_cache()
+        while True:
+            count = run_queued_jobs()
+            if count:
+                self.stdout.write(f"{count}件のジョブを実行しました。")
+            if options["once"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,86 @@
+# Generated by Django 5.2.11 on 2026-10-18 18:45
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImportJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("transaction", "入出金明細"),
+                            ("monthly", "月次収支"),
+                            ("bs", "貸借対照表"),
+                            ("claim", "管理費等請求一覧"),
+                            ("billing", "請求合計金額内訳"),
+                            ("payment", "支払承認"),
+                        ],
+                        max_length=16,
+                        verbose_name="データ種類",
+                    ),
+                ),
+                ("period", models.CharField(max_length=16, verbose_name="期間")),
+                ("params", models.JSONField(default=dict, verbose_name="入力内容")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "待機中"),
+                            ("running", "実行中"),
+                            ("done", "完了"),
+                            ("failed", "失敗"),
+                        ],
+                        default="queued",
+                        max_length=8,
+                        verbose_name="状態",
+                    ),
+                ),
+                ("progress", models.PositiveSmallIntegerField(default=0, verbose_name="進捗(%)")),
+                ("messages", models.JSONField(default=list, verbose_name="結果メッセージ")),
+                ("errors", models.JSONField(default=list, verbose_name="エラー")),
+                (
+                    "result_url",
+                    models.CharField(blank=True, default="", max_length=255, verbose_name="結果の表示先"),
+                ),
+                (
+                    "created_date",
+                    models.DateTimeField(default=django.utils.timezone.now, verbose_name="登録日時"),
+                ),
+                ("started_date", models.DateTimeField(blank=True, null=True, verbose_name="開始日時")),
+                ("finished_date", models.DateTimeField(blank=True, null=True, verbose_name="終了日時")),
+                (
+                    "author",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="登録者",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["status", "created_date"], name="importjob_status_created_idx")
+                ],
+            },
+        ),
+    ]
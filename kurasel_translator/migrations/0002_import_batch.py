@@ -0,0 +1,68 @@
+# Generated by Django 5.2.11 on 2026-10-18 18:49
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("kurasel_translator", "0001_import_job"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImportBatch",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("transaction", "入出金明細"),
+                            ("monthly", "月次収支"),
+                            ("bs", "貸借対照表"),
+                            ("claim", "管理費等請求一覧"),
+                            ("billing", "請求合計金額内訳"),
+                            ("payment", "支払承認"),
+                        ],
+                        max_length=16,
+                        verbose_name="データ種類",
+                    ),
+                ),
+                ("period_start", models.DateField(verbose_name="期間開始日")),
+                ("period_end", models.DateField(verbose_name="期間終了日")),
+                ("content_hash", models.CharField(max_length=64, verbose_name="内容のハッシュ")),
+                ("inserted", models.IntegerField(default=0, verbose_name="追加件数")),
+                ("updated", models.IntegerField(default=0, verbose_name="更新件数")),
+                ("skipped", models.IntegerField(default=0, verbose_name="変更なし件数")),
+                (
+                    "created_date",
+                    models.DateTimeField(default=django.utils.timezone.now, verbose_name="登録日時"),
+                ),
+                (
+                    "rolled_back_date",
+                    models.DateTimeField(blank=True, null=True, verbose_name="取り消し日時"),
+                ),
+                (
+                    "author",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="登録者",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [models.Index(fields=["content_hash"], name="importbatch_hash_idx")],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.11 on 2026-10-18 19:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("kurasel_translator", "0002_import_batch"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="importjob",
+            name="worker",
+            field=models.CharField(blank=True, default="", max_length=128, verbose_name="実行プロセス"),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.11 on 2026-10-18 19:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("kurasel_translator", "0003_importjob_worker"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="importbatch",
+            name="supersedes",
+            field=models.ManyToManyField(
+                blank=True,
+                related_name="superseded_by",
+                to="kurasel_translator.importbatch",
+                verbose_name="更新・置き換えた取り込み",
+            ),
+        ),
+    ]
@@ -1 +1,235 @@
-# Create your models here.
+import hashlib
+import json
+
+from common.ledger_version import bump_period
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.db import connection, models
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+user = get_user_model()
+
+
+class ImportJob(models.Model):
+    """Kuraselデータ取り込み（登録モード）のジョブ
+    - 取り込み画面はジョブを登録するだけで、解析・検証・登録はバックグラウンドで実行する
+      （kurasel_translator.services.job_serviceのスレッドプール、またはimport_workerコマンド）。
+    - ジョブは1つずつ順番に実行する（期間(period)は表示用）。
+    - サーバの再起動などで実行中のまま残ったジョブは、job_service.fail_stale_jobs()で失敗にする。
+    """
+
+    KIND_TRANSACTION = "transaction"
+    KIND_MONTHLY = "monthly"
+    KIND_BS = "bs"
+    KIND_CLAIM = "claim"
+    KIND_BILLING = "billing"
+    KIND_PAYMENT = "payment"
+    KIND_CHOICES = [
+        (KIND_TRANSACTION, "入出金明細"),
+        (KIND_MONTHLY, "月次収支"),
+        (KIND_BS, "貸借対照表"),
+        (KIND_CLAIM, "管理費等請求一覧"),
+        (KIND_BILLING, "請求合計金額内訳"),
+        (KIND_PAYMENT, "支払承認"),
+    ]
+
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "待機中"),
+        (STATUS_RUNNING, "実行中"),
+        (STATUS_DONE, "完了"),
+        (STATUS_FAILED, "失敗"),
+    ]
+
+    kind = models.CharField(verbose_name="データ種類", max_length=16, choices=KIND_CHOICES)
+    period = models.CharField(verbose_name="期間", max_length=16)
+    params = models.JSONField(verbose_name="入力内容", default=dict)
+    status = models.CharField(
+        verbose_name="状態", max_length=8, choices=STATUS_CHOICES, default=STATUS_QUEUED
+    )
+    progress = models.PositiveSmallIntegerField(verbose_name="進捗(%)", default=0)
+    messages = models.JSONField(verbose_name="結果メッセージ", default=list)
+    errors = models.JSONField(verbose_name="エラー", default=list)
+    result_url = models.CharField(verbose_name="結果の表示先", max_length=255, blank=True, default="")
+    author = models.ForeignKey(user, verbose_name="登録者", on_delete=models.SET_NULL, null=True)
+    created_date = models.DateTimeField(verbose_name="登録日時", default=timezone.now)
+    started_date = models.DateTimeField(verbose_name="開始日時", null=True, blank=True)
+    # 実行しているプロセス（ホスト名:プロセスID:起動毎のトークン）。中断されたジョブの判定に使う
+    worker = models.CharField(verbose_name="実行プロセス", max_length=128, blank=True, default="")
+    finished_date = models.DateTimeField(verbose_name="終了日時", null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "created_date"], name="importjob_status_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.period} {self.get_status_display()}"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_DONE, self.STATUS_FAILED)
+
+
+class ImportBatch(models.Model):
+    """Kuraselデータ取り込み（登録）1回分の記録
+    - 取り込みで登録・更新した台帳データの行には、import_batch（このバッチ）を設定する。
+      更新（upsert）された行は、最後に更新したバッチのものとなる。
+      変更の無い行は更新しない（前のバッチの行のまま）。
+    - 前のバッチの行を更新・置き換えた（削除した）場合は、前のバッチをsupersedesに記録する。
+    - 取り消し(rollback)は、import_batchのインデックスを使った1回のDELETEで行う。
+      前のバッチ（取り消していないもの）の行を更新・置き換えたバッチは、前の値に戻せないため取り消せない。
+    - 同じ内容(content_hash)の取り込み済み（取り消していない、後のバッチで更新・置き換えられていない）
+      バッチがある場合は、再取り込みしない。
+    """
+
+    # データ種類毎の台帳モデル
+    MODELS = {
+        ImportJob.KIND_TRANSACTION: "record.Transaction",
+        ImportJob.KIND_MONTHLY: "monthly_report.ReportTransaction",
+        ImportJob.KIND_BS: "monthly_report.BalanceSheet",
+        ImportJob.KIND_CLAIM: "record.ClaimData",
+        ImportJob.KIND_BILLING: "billing.Billing",
+        ImportJob.KIND_PAYMENT: "payment.Payment",
+    }
+
+    kind = models.CharField(verbose_name="データ種類", max_length=16, choices=ImportJob.KIND_CHOICES)
+    period_start = models.DateField(verbose_name="期間開始日")
+    period_end = models.DateField(verbose_name="期間終了日")
+    content_hash = models.CharField(verbose_name="内容のハッシュ", max_length=64)
+    inserted = models.IntegerField(verbose_name="追加件数", default=0)
+    updated = models.IntegerField(verbose_name="更新件数", default=0)
+    skipped = models.IntegerField(verbose_name="変更なし件数", default=0)
+    author = models.ForeignKey(user, verbose_name="登録者", on_delete=models.SET_NULL, null=True)
+    created_date = models.DateTimeField(verbose_name="登録日時", default=timezone.now)
+    rolled_back_date = models.DateTimeField(verbose_name="取り消し日時", null=True, blank=True)
+    supersedes = models.ManyToManyField(
+        "self",
+        verbose_name="更新・置き換えた取り込み",
+        symmetrical=False,
+        related_name="superseded_by",
+        blank=True,
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["content_hash"], name="importbatch_hash_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.period_start}〜{self.period_end}"
+
+    @staticmethod
+    def get_content_hash(kind, params, lines):
+        """取り込み内容のハッシュ
+        - params: 年月・会計区分など、貼り付けテキスト以外の入力値（モードは含めない）。
+        - lines: クリーンアップ済みの貼り付けテキストの行（空白・空行の違いは同じ内容とする）。
+        """
+        data = {"kind": kind, "params": {k: str(v) for k, v in params.items()}, "lines": list(lines)}
+        raw = json.dumps(data, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    @classmethod
+    def find_duplicate(cls, content_hash):
+        """同じ内容の取り込み済みバッチを返す（無い場合はNone）
+        - 取り消したバッチ、後のバッチで行を更新・置き換えられたバッチは除く
+          （台帳が取り込んだ内容と異なるため、同じ内容を再度取り込めるようにする）。
+        """
+        return (
+            cls.objects.filter(content_hash=content_hash, rolled_back_date__isnull=True)
+            .exclude(superseded_by__isnull=False)
+            .first()
+        )
+
+    @property
+    def model(self):
+        return apps.get_model(self.MODELS[self.kind])
+
+    def row_count(self):
+        """このバッチの行の件数"""
+        return self.model.objects.filter(import_batch=self).count()
+
+    def months(self):
+        """期間の(年, 月)のリスト（期間開始日の月〜期間終了日の月）"""
+        first = self.period_start.year * 12 + self.period_start.month - 1
+        last = self.period_end.year * 12 + self.period_end.month - 1
+        return [(n // 12, n % 12 + 1) for n in range(first, last + 1)]
+
+    def other_row_counts(self):
+        """期間が重なる同じデータ種類の他のバッチ（取り消していないもの）の{バッチID: 行の件数}
+        - 取り込みの前後で比べて、このバッチが更新・置き換えた前のバッチを求める（record_superseded()）。
+        """
+        qs = (
+            self.model.objects.filter(
+                import_batch__kind=self.kind,
+                import_batch__rolled_back_date__isnull=True,
+                import_batch__period_start__lte=self.period_end,
+                import_batch__period_end__gte=self.period_start,
+            )
+            .exclude(import_batch=self)
+            .values("import_batch")
+            .annotate(n=models.Count("pk"))
+        )
+        return {row["import_batch"]: row["n"] for row in qs}
+
+    def record_superseded(self, before):
+        """取り込みで行が減った前のバッチを、このバッチが更新・置き換えたものとして記録する
+        - before: 取り込み前のother_row_counts()
+        """
+        after = self.other_row_counts()
+        superseded = [pk for pk, n in before.items() if after.get(pk, 0) < n]
+        if superseded:
+            self.supersedes.add(*superseded)
+
+    def get_blocking_batches(self):
+        """取り消しを妨げるバッチ（このバッチが行を更新・置き換えた、取り消していない前のバッチ）"""
+        return self.supersedes.filter(rolled_back_date__isnull=True).order_by("pk")
+
+    def get_rollback_conflicts(self):
+        """取り消すと失われる・不整合になる入出金明細データ（入出金明細のバッチだけ）
+        - 取り込み後に期間内で手入力したデータ（相殺・分割など。取り消しでは削除しない）
+        - このバッチのデータのうち、取り込み後に変更したデータ（費目・前受金・計算対象など）
+        - 戻り値: [入出金明細データ, ...]（取引日・IDの順）。無い場合は空のリスト。
+        """
+        if self.kind != ImportJob.KIND_TRANSACTION:
+            return []
+        manual = models.Q(
+            is_manualinput=True,
+            transaction_date__range=(self.period_start, self.period_end),
+            created_date__gt=self.created_date,
+        )
+        edited = models.Q(import_batch=self, updated_date__isnull=False)
+        return list(
+            self.model.objects.filter(manual | edited)
+            .select_related("himoku")
+            .order_by("transaction_date", "pk")
+        )
+
+    def rollback(self):
+        """このバッチで登録・更新した行を削除する
+        - 台帳モデルを参照する外部キーは無いため、シグナル・カスケードを使わずに1回のDELETEで削除する。
+          そのため、期間のバージョン（集計ページのキャッシュ）・月次収支の集計テーブル・口座の日毎残高はここで更新する。
+        - 戻り値: 削除件数
+        """
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        accounts = []
+        if self.kind == ImportJob.KIND_TRANSACTION:
+            accounts = list(
+                self.model.objects.filter(import_batch=self).values_list("account_id", flat=True).distinct()
+            )
+        with db_transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(f"DELETE FROM {table} WHERE import_batch_id = %s", [self.pk])
+                deleted = cursor.rowcount
+            self.rolled_back_date = timezone.now()
+            self.save(update_fields=["rolled_back_date"])
+            if self.kind == ImportJob.KIND_MONTHLY:
+                apps.get_model("monthly_report.MonthlySummary").refresh_dates(self.period_start)
+            for account_id in accounts:
+                apps.get_model("record.AccountBalance").changed(account_id, self.period_start)
+        bump_period(self.period_start, self.period_end)
+        return deleted
@@ -1,17 +1,52 @@
+import datetime
 import logging
+from dataclasses import dataclass
 
 from control.models import FiscalLock
 from payment.models import Payment
 from record.models import Himoku
 
-from .common_service import clean_kurasel_text, parse_records_by_lines
+from kurasel_translator.models import ImportJob
+
+from .batch_service import begin_batch, end_batch_with_diff
+from .common_service import RowDiff, attach_diff, group_lines, to_int, tokenize
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass(slots=True)
+class PaymentRecord:
+    """支払承認データの1レコード（4行: 番号、摘要、支払先、金額）
+    - himoku_name: 摘要から推測した費目名（guess_himoku_from_summary()で設定）
+    - line: レコード先頭の行番号
+    - diff: 登録済みデータとの差分（確認モードで設定）
+    """
+
+    no: str
+    summary: str
+    destination: str
+    amount: int
+    line: int
+    himoku_name: str = ""
+    diff: RowDiff | None = None
+
+
+def parse_payment_text(note_text):
+    """支払承認データのテキストをレコードに変換する
+    - 戻り値: (レコードのリスト, 行番号付きのエラーリスト)
+    """
+    records = []
+    errors = []
+    for no, summary, destination, amount in group_lines(tokenize(note_text), 4):
+        value = to_int(amount, errors)
+        if value is not None:
+            records.append(PaymentRecord(no.text, summary.text, destination.text, value, no.no))
+    return records, errors
+
+
 def guess_himoku_from_summary(data_list):
     """
-    摘要欄(data[1])に費目名が含まれているかチェックし、
+    摘要欄(summary)に費目名が含まれているかチェックし、
     一致すればその費目名を、なければデフォルト(不明)を付与する
     """
     himoku_list = list(Himoku.get_himoku_list())
@@ -23,9 +58,7 @@ def guess_himoku_from_summary(data_list):
     default_name = default_himoku.himoku_name
 
     for data in data_list:
-        summary = data[1]
-        matched_name = next((h for h in himoku_list if h in summary), default_name)
-        data.append(matched_name)  # data[4] に費目名を追加
+        data.himoku_name = next((h for h in himoku_list if h in data.summary), default_name)
 
     return data_list
 
@@ -45,16 +78,15 @@ def execute_payment_approval_import(user, form_data):
         return (False, {}, [f"{year}年{month}月は既に締められているためデータ読み込みはできません。"])
 
     # 1. 解析と分割 (4行で1レコード)
-    lines = clean_kurasel_text(form_data["note"])
-    data_list = parse_records_by_lines(lines, 4)
+    data_list, errors = parse_payment_text(form_data["note"])
+
+    # 2. ヘッダーチェック (金額列が数字かどうか)
+    if errors:
+        return False, {}, ["ヘッダーが含まれています。データ部分のみコピーしてください。", *errors]
 
     if not data_list:
         return False, {}, ["取り込むデータがありません。"]
 
-    # 2. ヘッダーチェック (金額列が数字かどうか)
-    if not data_list[0][3].isdigit():
-        return False, {}, ["ヘッダーが含まれています。データ部分のみコピーしてください。"]
-
     # 3. 費目推測
     try:
         data_list = guess_himoku_from_summary(data_list)
@@ -62,7 +94,7 @@ def execute_payment_approval_import(user, form_data):
         return False, {}, [str(e)]
 
     # 4. 合計計算
-    total = sum(int(d[3]) for d in data_list)
+    total = sum(d.amount for d in data_list)
 
     result_context = {
         "year": year,
@@ -74,11 +106,24 @@ def execute_payment_approval_import(user, form_data):
         "author": user.pk,
     }
 
+    # 登録済みデータとの差分（確認モードの表示と、登録モードの件数の記録に使う）
+    # 「支払先、支払い金額、摘要」が一致するデータは登録済み（get_or_create）
+    result_context["diff_summary"] = attach_diff(
+        data_list,
+        lambda d: (d.destination, d.amount, d.summary),
+        Payment.get_kurasel_amounts(year, month, day),
+        upsert=False,
+    )
     if "確認" in mode:
         return True, result_context, []
 
     # 5. 登録実行
-    success, error_list = Payment.payment_from_kurasel(result_context)
+    payment_day = datetime.date(int(year), int(month), int(day))
+    batch, errors = begin_batch(ImportJob.KIND_PAYMENT, user, form_data, payment_day, payment_day)
+    if batch is None:
+        return False, result_context, errors
+    success, error_list = Payment.payment_from_kurasel({**result_context, "import_batch": batch})
+    end_batch_with_diff(batch, success, result_context["diff_summary"])
     if success:
         return True, result_context, []
     else:
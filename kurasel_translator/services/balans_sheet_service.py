@@ -3,28 +3,34 @@ import logging
 from control.models import FiscalLock
 from monthly_report.models import BalanceSheet
 
-from .common_service import clean_amount_str, clean_kurasel_text
+from kurasel_translator.models import ImportJob
+
+from .batch_service import begin_batch, end_batch_with_diff, month_range
+from .common_service import diff_rows, to_int, tokenize
 
 logger = logging.getLogger(__name__)
 
 
-def list_to_dict(data_list):
-    """[key1, value1, key2, value2...] を辞書に変換"""
+def list_to_dict(data_list, errors):
+    """[key1, value1, key2, value2...] のLineを {項目名: 金額} の辞書に変換"""
     bs_dict = {}
     for i in range(0, len(data_list) & ~1, 2):  # 要素が奇数の場合も考慮
-        bs_dict[data_list[i]] = data_list[i + 1]
+        value = to_int(data_list[i + 1], errors)
+        if value is not None:
+            bs_dict[data_list[i].text] = value
     return bs_dict
 
 
-def parse_bs_text(msg_list):
+def parse_bs_text(lines):
     """
-    テキストリストを解析して、会計区分名とBSデータ辞書を返す
+    Lineのリストを解析して、会計区分名とBSデータ辞書を返す
+    - 金額が数値でない場合は、行番号付きのメッセージでValueErrorとする。
     """
-    if not msg_list:
+    if not lines:
         raise ValueError("データが空です。")
 
     # 1行目は会計区分名
-    ac_class_name = msg_list.pop(0)
+    ac_class_name = lines[0].text
     if ac_class_name not in ("管理費会計", "修繕積立金会計", "駐車場会計", "町内会費会計"):
         raise ValueError("タイトルの「会計区分名」から「剰余の部合計」までをコピーしてください")
 
@@ -32,24 +38,25 @@ def parse_bs_text(msg_list):
     debt_list = []
     is_asset_section = True
 
-    for line in msg_list:
-        clean_line = clean_amount_str(line)
-
-        if clean_line == "資産の部":
+    for line in lines[1:]:
+        if line.text == "資産の部":
             continue
-        if clean_line in ["負債・剰余金の部", "負債の部"]:
+        if line.text in ["負債・剰余金の部", "負債の部"]:
             is_asset_section = False
             continue
-        if clean_line == "負債の部合計":  # 取り込み終了の合図
+        if line.text == "負債の部合計":  # 取り込み終了の合図
             break
 
         if is_asset_section:
-            asset_list.append(clean_line)
+            asset_list.append(line)
         else:
-            debt_list.append(clean_line)
+            debt_list.append(line)
 
     # 辞書化して結合
-    bs_dict = {**list_to_dict(asset_list), **list_to_dict(debt_list)}
+    errors = []
+    bs_dict = {**list_to_dict(asset_list, errors), **list_to_dict(debt_list, errors)}
+    if errors:
+        raise ValueError(" / ".join(errors))
     return ac_class_name, bs_dict
 
 
@@ -70,8 +77,7 @@ def execute_bs_import(user, form_data):
 
     try:
         # 1. 解析
-        msg_list = clean_kurasel_text(form_data["note"])
-        ac_class_name, bs_dict = parse_bs_text(msg_list)
+        ac_class_name, bs_dict = parse_bs_text(list(tokenize(form_data["note"])))
 
         # 2. バリデーション（会計区分の不一致チェック）
         if str(ac_class) != ac_class_name:
@@ -86,11 +92,23 @@ def execute_bs_import(user, form_data):
             "mode": mode,
         }
 
+        # 登録済みデータとの差分（確認モードの表示と、登録モードの件数の記録に使う）
+        # (項目名, 金額, 差分)のリスト
+        diffs, result_context["diff_summary"] = diff_rows(
+            bs_dict.items(), BalanceSheet.get_kurasel_amounts(ac_class, year, month)
+        )
+        result_context["diff_list"] = [(*row, diff) for row, diff in zip(bs_dict.items(), diffs)]
         if "確認" in mode:
             return True, result_context, []
 
         # 3. 保存実行
-        success, error_list = BalanceSheet.bs_from_kurasel(ac_class, result_context)
+        batch, errors = begin_batch(ImportJob.KIND_BS, user, form_data, *month_range(year, month))
+        if batch is None:
+            return False, result_context, errors
+        success, error_list = BalanceSheet.bs_from_kurasel(
+            ac_class, {**result_context, "import_batch": batch}
+        )
+        end_batch_with_diff(batch, success, result_context["diff_summary"])
         if success:
             return True, result_context, []
         else:
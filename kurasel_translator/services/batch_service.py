@@ -0,0 +1,62 @@
+import calendar
+import datetime
+
+from django.utils.timezone import localtime
+
+from kurasel_translator.models import ImportBatch
+
+from .common_service import tokenize
+
+# -----------------------------------------
+# 取り込みバッチ（ImportBatch）の作成・記録
+# - 登録モードの取り込みは、台帳データを書き込む前にバッチを作成し、書き込む行にバッチを設定する。
+# - 同じ内容（データ種類・年月などの入力値・クリーンアップした貼り付けテキスト）の取り込み済みバッチが
+#   ある場合は、書き込まずにエラーとする。
+# - 書き込みの前後で他のバッチの行数を比べ、行が減ったバッチを更新・置き換えたバッチとして記録する。
+# -----------------------------------------
+
+
+def month_range(year, month):
+    """年月の初日と末日（date）"""
+    year, month = int(year), int(month)
+    return datetime.date(year, month, 1), datetime.date(year, month, calendar.monthrange(year, month)[1])
+
+
+def begin_batch(kind, user, form_data, period_start, period_end):
+    """取り込みバッチを作成する
+    - 戻り値: (バッチ, エラーリスト)。同じ内容の取り込み済みバッチがある場合は(None, エラーリスト)。
+    """
+    params = {k: v for k, v in form_data.items() if k not in ("mode", "note")}
+    content_hash = ImportBatch.get_content_hash(
+        kind, params, (line.text for line in tokenize(form_data["note"]))
+    )
+    duplicate = ImportBatch.find_duplicate(content_hash)
+    if duplicate:
+        created = localtime(duplicate.created_date).strftime("%Y-%m-%d %H:%M")
+        return None, [f"同じ内容のデータは{created}に取り込み済みです（取り込み番号: {duplicate.pk}）。"]
+    batch = ImportBatch.objects.create(
+        kind=kind,
+        period_start=period_start,
+        period_end=period_end,
+        content_hash=content_hash,
+        author=user,
+    )
+    batch.rows_before = batch.other_row_counts()
+    return batch, []
+
+
+def end_batch(batch, success, inserted=0, updated=0, skipped=0):
+    """取り込みの件数と、更新・置き換えた前のバッチを記録する
+    - 失敗して1行も書き込んでいない場合は、バッチを削除する（同じ内容を再度取り込めるようにする）。
+    """
+    if not success and batch.row_count() == 0:
+        batch.delete()
+        return
+    batch.record_superseded(batch.rows_before)
+    batch.inserted, batch.updated, batch.skipped = inserted, updated, skipped
+    batch.save(update_fields=["inserted", "updated", "skipped"])
+
+
+def end_batch_with_diff(batch, success, diff_summary):
+    """差分の集計（common_service.diff_rows()の戻り値）で件数を記録する"""
+    end_batch(batch, success, diff_summary["insert"], diff_summary["update"], diff_summary["noop"])
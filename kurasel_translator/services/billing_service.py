@@ -1,13 +1,40 @@
 import logging
+from dataclasses import dataclass
 
 from billing.models import Billing
 from control.models import FiscalLock
 
-from .common_service import clean_kurasel_text, parse_records_by_lines
+from kurasel_translator.models import ImportJob
+
+from .batch_service import begin_batch, end_batch_with_diff, month_range
+from .common_service import RowDiff, attach_diff, group_lines, to_int, tokenize
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass(slots=True)
+class BillingRecord:
+    """請求合計金額内訳データの1レコード（2行: 項目名、金額。line: 項目名の行番号。diff: 確認モードの差分）"""
+
+    item_name: str
+    amount: int
+    line: int
+    diff: RowDiff | None = None
+
+
+def parse_billing_text(note_text):
+    """請求合計金額内訳データのテキストをレコードに変換する
+    - 戻り値: (レコードのリスト, 行番号付きのエラーリスト)
+    """
+    records = []
+    errors = []
+    for name, amount in group_lines(tokenize(note_text), 2):
+        value = to_int(amount, errors)
+        if value is not None:
+            records.append(BillingRecord(name.text, value, name.no))
+    return records, errors
+
+
 def execute_billing_import(user, form_data):
     """
     請求合計金額内訳データの取り込みメインロジック
@@ -22,18 +49,20 @@ def execute_billing_import(user, form_data):
         return (False, {}, [f"{year}年{month}月は既に締められているためデータ読み込みはできません。"])
 
     # 1. テキスト解析 (2行で1レコード: 項目名、金額)
-    lines = clean_kurasel_text(form_data["note"])
-    data_list = parse_records_by_lines(lines, 2)
+    data_list, errors = parse_billing_text(form_data["note"])
     logger.debug(f"Parsed data_list: {data_list}")
 
+    if errors:
+        return (
+            False,
+            {},
+            ["金額部分に数値以外のデータが含まれています。コピー範囲を確認してください。", *errors],
+        )
     if not data_list:
         return False, {}, ["取り込むデータが見つかりません。2行1組の形式か確認してください。"]
 
     # 2. 合計計算
-    try:
-        total = sum(int(d[1]) for d in data_list)  # data[1]が金額
-    except (ValueError, IndexError):
-        return False, {}, ["金額部分に数値以外のデータが含まれています。コピー範囲を確認してください。"]
+    total = sum(d.amount for d in data_list)
 
     result_context = {
         "year": year,
@@ -44,11 +73,19 @@ def execute_billing_import(user, form_data):
         "author": user.pk,
     }
 
+    # 登録済みデータとの差分（確認モードの表示と、登録モードの件数の記録に使う）
+    result_context["diff_summary"] = attach_diff(
+        data_list, lambda d: d.item_name, Billing.get_kurasel_amounts(year, month)
+    )
     if "確認" in mode:
         return True, result_context, []
 
     # 3. 登録処理
-    rtn, error_list = Billing.billing_from_kurasel(result_context)
+    batch, errors = begin_batch(ImportJob.KIND_BILLING, user, form_data, *month_range(year, month))
+    if batch is None:
+        return False, result_context, errors
+    rtn, error_list = Billing.billing_from_kurasel({**result_context, "import_batch": batch})
+    end_batch_with_diff(batch, rtn, result_context["diff_summary"])
 
     if rtn > 0:
         return True, result_context, []
@@ -1,34 +1,45 @@
 import logging
+from dataclasses import dataclass
 
 from control.models import FiscalLock
 from record.models import ClaimData
 
-from .common_service import clean_kurasel_text
+from kurasel_translator.models import ImportJob
+
+from .batch_service import begin_batch, end_batch_with_diff, month_range
+from .common_service import AMOUNT_WORDS, RowDiff, attach_diff, group_lines, to_int, tokenize
 
 logger = logging.getLogger(__name__)
 
+# 「¥」「,」に加えて削除する語句
+CLAIM_WORDS = (*AMOUNT_WORDS, "部屋番号", "号室")
 
-def parse_claim_text(msg_list, rows_per_record=4):
-    """
-    テキストリストを4行ごとのレコードに分割し、
-    「¥」「部屋番号」などの不要な文字列をクリーンアップする
-    """
-    record_list = []
-    current_record = []
 
-    for line in msg_list:
-        # クレンジング処理
-        clean_line = (
-            line.replace("¥", "").replace(",", "").replace("部屋番号", "").replace("号室", "").strip()
-        )
-        current_record.append(clean_line)
+@dataclass(slots=True)
+class ClaimRecord:
+    """請求データの1レコード（4行: 番号、部屋番号、氏名、金額。line: レコード先頭の行番号。diff: 確認モードの差分）"""
 
-        # 指定行数（4行）に達したらレコードとして追加
-        if len(current_record) == rows_per_record:
-            record_list.append(current_record)
-            current_record = []
+    no: str
+    room_no: str
+    name: str
+    amount: int
+    line: int
+    diff: RowDiff | None = None
 
-    return record_list
+
+def parse_claim_text(note_text, rows_per_record=4):
+    """
+    テキストを4行ごとのレコードに分割し、
+    「¥」「部屋番号」などの不要な文字列をクリーンアップする
+    - 戻り値: (レコードのリスト, 行番号付きのエラーリスト)
+    """
+    records = []
+    errors = []
+    for no, room_no, name, amount in group_lines(tokenize(note_text, CLAIM_WORDS), rows_per_record):
+        value = to_int(amount, errors)
+        if value is not None:
+            records.append(ClaimRecord(no.text, room_no.text, name.text, value, no.no))
+    return records, errors
 
 
 def execute_claim_import(user, form_data):
@@ -46,22 +57,17 @@ def execute_claim_import(user, form_data):
     if is_frozen:
         return (False, {}, [f"{year}年{month}月は既に締められているためデータ読み込みはできません。"])
 
-    # 1. テキストをリスト化
-    lines = clean_kurasel_text(form_data["note"])
-    if not lines:
+    # 1. テキストの有無
+    if not form_data["note"].strip():
         return False, {}, ["取り込むデータが入力されていません。"]
 
-    # 2. 4行1レコードの構造に変換
-    data_list = parse_claim_text(lines, rows_per_record=4)
+    # 2. 4行1レコードの構造に変換（金額のバリデーションを含む）
+    data_list, errors = parse_claim_text(form_data["note"], rows_per_record=4)
+    if errors:
+        return False, {}, ["コピー範囲が間違っているか、金額部分に数字以外が含まれています。", *errors]
 
-    # 3. 金額のバリデーションと合計計算
-    total = 0
-    try:
-        for data in data_list:
-            # data[3] が請求金額であることを期待
-            total += int(data[3])
-    except (ValueError, IndexError):
-        return False, {}, ["コピー範囲が間違っているか、金額部分に数字以外が含まれています。"]
+    # 3. 合計計算
+    total = sum(data.amount for data in data_list)
 
     result_context = {
         "year": year,
@@ -73,11 +79,23 @@ def execute_claim_import(user, form_data):
         "author": user.pk,
     }
 
+    # 登録済みデータとの差分（確認モードの表示と、登録モードの件数の記録に使う）
+    # 同じ年月・請求種別のデータは削除してから登録するため、貼り付けに無いデータは「削除」となる
+    result_context["diff_summary"] = attach_diff(
+        data_list,
+        lambda d: (d.room_no, d.name),
+        ClaimData.get_kurasel_amounts(year, month, claim_type),
+        replace=True,
+    )
     if "確認" in mode:
         return True, result_context, []
 
     # 4. 登録処理の実行
-    success, error_list = ClaimData.claim_from_kurasel(result_context)
+    batch, errors = begin_batch(ImportJob.KIND_CLAIM, user, form_data, *month_range(year, month))
+    if batch is None:
+        return False, result_context, errors
+    success, error_list = ClaimData.claim_from_kurasel({**result_context, "import_batch": batch})
+    end_batch_with_diff(batch, success, result_context["diff_summary"])
     if success:
         return True, result_context, []
     else:
@@ -1,20 +1,122 @@
-def clean_kurasel_text(note_text):
-    return [line.strip() for line in note_text.splitlines() if line.strip()]
-
-
-def clean_amount_str(value):
-    return value.replace("¥", "").replace("（円）", "").replace(",", "").strip()
-
-
-def parse_records_by_lines(lines, rows_per_record):
-    """指定された行数ごとにリストを分割する汎用関数"""
-    records = []
-    for i in range(0, len(lines), rows_per_record):
-        chunk = lines[i : i + rows_per_record]
-        if len(chunk) == rows_per_record:
-            # ¥やカンマをクリーンアップ
-            clean_chunk = [
-                item.replace("¥", "").replace("（円）", "").replace(",", "").strip() for item in chunk
-            ]
-            records.append(clean_chunk)
-    return records
+from dataclasses import dataclass
+
+# -----------------------------------------
+# Kuraselの貼り付けテキストの共通トークナイザ
+# - 各行を1回の走査で「前後の空白除去・¥とカンマの削除（str.translate）・不要語句の削除」する。
+# - 行は元の貼り付けの行番号付き(Line)で渡し、解析エラーは「n行目: ...」の形で返す。
+# - 各取り込みサービスは、行をレコード（slots付きdataclass）に変換する。
+# -----------------------------------------
+
+# 1文字単位で削除する文字（¥と3桁区切りのカンマ）
+_DELETE_TABLE = str.maketrans("", "", "¥,")
+# 削除する語句
+AMOUNT_WORDS = ("（円）",)
+
+
+@dataclass(slots=True)
+class Line:
+    """貼り付けテキストの1行（no: 元の行番号、1から）"""
+
+    no: int
+    text: str
+
+
+def tokenize(note_text, words=AMOUNT_WORDS):
+    """貼り付けテキストを、空行を除いたクリーンアップ済みのLineに順に変換する"""
+    for no, raw in enumerate(note_text.splitlines(), 1):
+        text = raw.strip()
+        if not text:
+            continue
+        text = text.translate(_DELETE_TABLE)
+        for word in words:
+            if word in text:
+                text = text.replace(word, "")
+        yield Line(no, text.strip())
+
+
+def group_lines(lines, rows_per_record):
+    """Lineを指定行数ごとのtupleに分割する（行数に満たない末尾は捨てる）"""
+    lines = list(lines)
+    end = len(lines) - len(lines) % rows_per_record
+    return [tuple(lines[i : i + rows_per_record]) for i in range(0, end, rows_per_record)]
+
+
+def to_int(line, errors, label="金額"):
+    """Lineの文字列を整数に変換する。変換できない場合はerrorsに行番号付きのメッセージを追加してNoneを返す"""
+    try:
+        return int(line.text)
+    except ValueError:
+        errors.append(line_error(line, f"{label}が数値ではありません（{line.text}）"))
+        return None
+
+
+def line_error(line, message):
+    """行番号付きのエラーメッセージ"""
+    return f"{line.no}行目: {message}"
+
+
+# -----------------------------------------
+# 確認モードの差分表示
+# - 取り込み予定の行を、登録済みデータ（取り込み毎に1回のクエリで取得した{キー: 金額}）と比較して、
+#   行毎に「追加」「更新（旧金額 → 新金額）」「変更なし」を判定する。
+# -----------------------------------------
+
+DIFF_INSERT = "insert"
+DIFF_UPDATE = "update"
+DIFF_NOOP = "noop"
+DIFF_DELETE = "delete"
+DIFF_LABELS = {DIFF_INSERT: "追加", DIFF_UPDATE: "更新", DIFF_NOOP: "変更なし", DIFF_DELETE: "削除"}
+
+
+@dataclass(slots=True)
+class RowDiff:
+    """1行の差分（old_amount: 登録済みの金額、new_amount: 取り込む金額）"""
+
+    status: str
+    old_amount: int | None
+    new_amount: int | None
+
+    @property
+    def label(self):
+        return DIFF_LABELS[self.status]
+
+
+def diff_rows(rows, existing, upsert=True, replace=False):
+    """取り込み予定の行と登録済みデータを比較する
+    - rows: 貼り付け順の(キー, 金額)のリスト。existing: 登録済みデータの{キー: 金額}。
+    - upsert: キーが一致する登録済みデータの金額を更新する取り込み（update_or_create等）の場合はTrue。
+      Falseの場合（キーが一致するデータはスキップする取り込み）は、キーが一致すれば「変更なし」とする。
+    - replace: 取り込み前に同じ期間のデータを削除する取り込みの場合はTrue。貼り付けに無い登録済みデータを「削除」とする。
+    - 同じ貼り付け内で同じキーが複数ある場合は、先の行を登録済みとして後の行を判定する。
+    - 戻り値: (行毎のRowDiffのリスト, {status: 件数, "removed": 削除される(キー, 金額)のリスト})
+    """
+    current = dict(existing)
+    diffs = []
+    summary = dict.fromkeys(DIFF_LABELS, 0)
+    for key, amount in rows:
+        if key not in current:
+            status = DIFF_INSERT
+        elif not upsert or current[key] == amount:
+            status = DIFF_NOOP
+        else:
+            status = DIFF_UPDATE
+        diffs.append(RowDiff(status, current.get(key), amount))
+        summary[status] += 1
+        if upsert or key not in current:
+            current[key] = amount
+
+    removed = []
+    if replace:
+        keys = {key for key, _ in rows}
+        removed = [(key, amount) for key, amount in existing.items() if key not in keys]
+    summary[DIFF_DELETE] = len(removed)
+    summary["removed"] = removed
+    return diffs, summary
+
+
+def attach_diff(records, key_func, existing, upsert=True, replace=False):
+    """各レコード（amount, diff属性を持つ）にRowDiffを設定して、差分の集計を返す（引数はdiff_rows()と同じ）"""
+    diffs, summary = diff_rows([(key_func(rec), rec.amount) for rec in records], existing, upsert, replace)
+    for rec, diff in zip(records, diffs, strict=True):
+        rec.diff = diff
+    return summary
@@ -0,0 +1,138 @@
+import unicodedata
+from collections import deque
+
+from common.cache import get_or_set, watch
+from payment.models import PaymentMethod
+from record.models import TransferRequester
+
+# --- 出金データの費目判定用インデックス ---
+
+# 優先順位3: 銀行手数料とするキーワード
+BANKING_FEE_KEYWORDS = ["トリアツカイリヨウ", "フリコミテスウリヨウ"]
+
+# 判定に使われたルール（確認画面に表示する）
+RULE_REQUESTER = "振込依頼人"
+RULE_DESCRIPTION = "支払い方法"
+RULE_KEYWORD = "手数料キーワード"
+RULE_DEFAULT = "デフォルト"
+
+
+def normalize_key(text):
+    """照合用のキー（NFKC正規化して前後の空白を除去）を返す"""
+    return unicodedata.normalize("NFKC", text or "").strip()
+
+
+class KeywordAutomaton:
+    """複数キーワードを1回の走査で検索するオートマトン（Aho-Corasick法）
+    - 検索コストは文字列の長さに比例し、キーワード数には依存しない。
+    """
+
+    def __init__(self, keywords):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [None]
+        for word in keywords:
+            self._add(normalize_key(word))
+        self._build()
+
+    def _add(self, word):
+        if not word:
+            return
+        state = 0
+        for ch in word:
+            if ch not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(None)
+                self.goto[state][ch] = len(self.goto) - 1
+            state = self.goto[state][ch]
+        if self.output[state] is None:
+            self.output[state] = word
+
+    def _build(self):
+        """失敗遷移を幅優先で設定する"""
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                if self.output[nxt] is None:
+                    self.output[nxt] = self.output[self.fail[nxt]]
+
+    def search(self, text):
+        """最初に見つかったキーワードを返す。見つからない場合はNone"""
+        state = 0
+        for ch in text:
+            while state and ch not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(ch, 0)
+            if self.output[state] is not None:
+                return self.output[state]
+        return None
+
+
+class ExpenseClassifier:
+    """出金データの費目を優先順位に従って判定する
+    - 優先順位1: 振込依頼人名の完全一致（TransferRequester）
+    - 優先順位2: 摘要欄の完全一致（PaymentMethod.account_description）
+    - 優先順位3: 手数料系キーワードを含む場合は銀行手数料
+    - どれにも当てはまらない場合はデフォルトの費目
+    """
+
+    def __init__(self, requester_map, description_map, automaton, default_himoku, banking_fee_himoku):
+        self.requester_map = requester_map
+        self.description_map = description_map
+        self.automaton = automaton
+        self.default_himoku = default_himoku
+        self.banking_fee_himoku = banking_fee_himoku
+
+    def classify(self, name, desc):
+        """(費目, 判定に使われたルール名)を返す"""
+        himoku = self.requester_map.get(normalize_key(name))
+        if himoku is not None:
+            return himoku, RULE_REQUESTER
+
+        key = normalize_key(desc)
+        himoku = self.description_map.get(key)
+        if himoku is not None:
+            return himoku, RULE_DESCRIPTION
+
+        keyword = self.automaton.search(key)
+        if keyword is not None:
+            return self.banking_fee_himoku, f"{RULE_KEYWORD}({keyword})"
+
+        return self.default_himoku, RULE_DEFAULT
+
+
+# ルールテーブル（振込依頼人・支払い方法・費目）が変更されるまでインデックスを再利用する（common.cache）
+INDEX_LABELS = ("record.transferrequester", "payment.paymentmethod", "record.himoku")
+watch(*INDEX_LABELS)
+
+
+def _build_index():
+    """振込依頼人・支払い方法の照合用dictとキーワードのオートマトンを作成する
+    - 同じキーが複数ある場合は先に登録されたデータを優先する。
+    """
+    requester_map = {}
+    for r in TransferRequester.objects.select_related("himoku").order_by("pk"):
+        key = normalize_key(r.requester)
+        if key and r.himoku is not None:
+            requester_map.setdefault(key, r.himoku)
+
+    description_map = {}
+    for p in PaymentMethod.objects.select_related("himoku_name").order_by("pk"):
+        key = normalize_key(p.account_description)
+        if key:
+            description_map.setdefault(key, p.himoku_name)
+
+    return requester_map, description_map, KeywordAutomaton(BANKING_FEE_KEYWORDS)
+
+
+def get_expense_classifier(default_himoku, banking_fee_himoku):
+    """取り込み1回分の費目判定オブジェクトを返す"""
+    index = get_or_set(("expense_classifier", "index"), INDEX_LABELS, _build_index)
+    return ExpenseClassifier(*index, default_himoku, banking_fee_himoku)
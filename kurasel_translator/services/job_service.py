@@ -0,0 +1,317 @@
+import datetime
+import logging
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Exists
+from django.db import transaction as db_transaction
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import urlencode
+from record.models import AccountingClass
+
+from kurasel_translator.models import ImportJob
+
+from .approval_service import execute_payment_approval_import
+from .balans_sheet_service import execute_bs_import
+from .billing_service import execute_billing_import
+from .claim_service import execute_claim_import
+from .monthly_report_service import execute_monthly_import
+from .transaction_service import execute_transaction_import
+
+logger = logging.getLogger(__name__)
+
+# -----------------------------------------
+# Kuraselデータ取り込みのジョブ実行
+# - 登録モードの取り込みはImportJobとして登録し、リクエストのスレッドでは実行しない。
+# - ジョブはプロセス内のスレッドプール（settings.IMPORT_JOB_THREADS）で実行する。
+#   0の場合、またはサーバの再起動で残った待機中のジョブは、import_workerコマンドで実行する。
+# - ジョブは期間に関係なく1つずつ実行する（書き込みのロックは1つ）。
+#   SQLiteの書き込みは1つずつのため期間毎に並行しても速くならず、入出金明細は年をまたぐ貼り付けもあるため。
+#   プロセス内はロックで、プロセス間は「実行中のジョブが無い場合だけ」の条件付きのUPDATEで順番にする。
+# - サーバの再起動で実行中のまま残ったジョブは失敗にし、待機中のまま残ったジョブは
+#   次のジョブの登録時（またはジョブの状態の確認時）にスレッドプールへ登録し直す。
+# -----------------------------------------
+
+
+@dataclass(frozen=True)
+class Importer:
+    """取り込みの種類毎の設定
+    - execute: execute_*_import関数。(user, form_data)を受け取り(成功, 結果context, エラーリスト)を返す。
+    - done: 結果contextから(完了メッセージのリスト, 結果の表示先URL)を返す関数。
+    - form_url: 取り込み画面のURL名。
+    - has_progress: executeが進捗を通知する（progress引数を受け取る）場合はTrue。
+    """
+
+    execute: object
+    done: object
+    form_url: str
+    has_progress: bool = False
+
+
+def _url(name, **params):
+    return f"{reverse(name)}?{urlencode(params)}"
+
+
+def _transaction_done(ctx):
+    msgs = [
+        f"データの取り込みが完了しました。（登録: {ctx['inserted']}件、登録済みのためスキップ: {ctx['skipped']}件）",
+        *(
+            f"{m['year']}年{m['month']}月: 登録{m['inserted']}件、スキップ{m['skipped']}件"
+            for m in ctx["import_months"]
+            if not m["error"]
+        ),
+    ]
+    url = _url("record:transaction_list", year=ctx["year"], month=ctx["month"], list_order=0, himoku_id=0)
+    return msgs, url
+
+
+def _monthly_done(ctx):
+    url = _url("kurasel_translator:create_monthly", year=ctx["year"], month=ctx["month"])
+    return ["月次収支データの取り込みが完了しました。"], url
+
+
+def _bs_done(ctx):
+    msg = f"{ctx['year']}年{ctx['month']}月度の「{ctx['ac_class']}」貸借対照表を取り込みました。"
+    return [msg], _url("kurasel_translator:create_bs", year=ctx["year"], month=ctx["month"])
+
+
+def _claim_done(ctx):
+    msg = f"{ctx['year']}年{ctx['month']}月度の{ctx['claim_type']} のデータ取り込みが完了しました。"
+    return [msg], _url("kurasel_translator:create_claim", year=ctx["year"], month=ctx["month"])
+
+
+def _billing_done(ctx):
+    msg = f"{ctx['year']}年{ctx['month']}月度の, 請求合計金額内訳データの取り込みが完了しました。"
+    return [msg], _url("billing:billing_list", year=ctx["year"], month=ctx["month"])
+
+
+def _payment_done(ctx):
+    msg = f"{ctx['year']}-{ctx['month']}-{ctx['day']}の承認済みデータの取り込みが完了しました。"
+    url = _url(
+        "kurasel_translator:create_payment", year=ctx["year"], month=ctx["month"], day=10, list_order=0
+    )
+    return [msg], url
+
+
+IMPORTERS = {
+    ImportJob.KIND_TRANSACTION: Importer(
+        execute_transaction_import, _transaction_done, "kurasel_translator:create_deposit", has_progress=True
+    ),
+    ImportJob.KIND_MONTHLY: Importer(
+        execute_monthly_import, _monthly_done, "kurasel_translator:create_monthly"
+    ),
+    ImportJob.KIND_BS: Importer(execute_bs_import, _bs_done, "kurasel_translator:create_bs"),
+    ImportJob.KIND_CLAIM: Importer(execute_claim_import, _claim_done, "kurasel_translator:create_claim"),
+    ImportJob.KIND_BILLING: Importer(
+        execute_billing_import, _billing_done, "kurasel_translator:create_billing"
+    ),
+    ImportJob.KIND_PAYMENT: Importer(
+        execute_payment_approval_import, _payment_done, "kurasel_translator:create_payment"
+    ),
+}
+
+# フォームの値のうちモデルオブジェクトのもの（ジョブにはpkで保存する）
+MODEL_PARAMS = {"ac_class": AccountingClass}
+
+
+def job_period(form_data):
+    """ジョブの期間（表示用）。入出金明細は年、その他は年月"""
+    if "month" not in form_data:
+        return str(form_data["year"])
+    return f"{form_data['year']}-{int(form_data['month']):02}"
+
+
+def _dump_params(form_data):
+    return {k: (v.pk if k in MODEL_PARAMS and v is not None else v) for k, v in form_data.items()}
+
+
+def _load_params(params):
+    return {k: (MODEL_PARAMS[k].objects.get(pk=v) if k in MODEL_PARAMS else v) for k, v in params.items()}
+
+
+# スレッドプールと書き込みのロック、このプロセスのスレッドプールに登録したジョブ
+_executor = None
+_executor_lock = threading.Lock()
+_writer_lock = threading.Lock()
+_submitted = set()
+
+# このプロセスの識別子（ImportJob.worker）。再起動で同じプロセスIDになっても区別できるようトークンを付ける
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMPORT_JOB_THREADS, thread_name_prefix="import-job"
+            )
+        return _executor
+
+
+def enqueue_import(kind, user, form_data):
+    """取り込みのジョブを登録する
+    - settings.IMPORT_JOB_THREADSが1以上の場合は、登録のコミット後にスレッドプールで実行する。
+      再起動などで待機中のまま残ったジョブも一緒に登録し直す（resubmit_jobs()）。
+    """
+    job = ImportJob.objects.create(
+        kind=kind, period=job_period(form_data), params=_dump_params(form_data), author=user
+    )
+    if settings.IMPORT_JOB_THREADS > 0:
+        db_transaction.on_commit(resubmit_jobs)
+    return job
+
+
+def _submit(job_id):
+    with _executor_lock:
+        if job_id in _submitted:
+            return
+        _submitted.add(job_id)
+    _get_executor().submit(_run_in_thread, job_id)
+
+
+def _run_in_thread(job_id):
+    try:
+        run_job(job_id)
+    finally:
+        with _executor_lock:
+            _submitted.discard(job_id)
+        # ワーカースレッドのDB接続はリクエストの終了で閉じられないため、ここで閉じる
+        connection.close()
+
+
+def _is_worker_alive(worker):
+    """ジョブを実行しているプロセスが動いているか
+    - 他のホストのプロセスは確認できないためNoneを返す（開始からの経過時間で判定する）。
+    """
+    parts = worker.split(":")
+    if len(parts) != 3 or parts[0] != socket.gethostname() or not parts[1].isdigit():
+        return None
+    pid = int(parts[1])
+    if pid == os.getpid():
+        return worker == WORKER_ID
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def fail_stale_jobs():
+    """実行中のまま残ったジョブを失敗にする
+    - このホストのジョブは、実行していたプロセスが終了している場合だけ失敗にする（長いジョブは待つ）。
+    - 他のホストのジョブは、開始からsettings.IMPORT_JOB_TIMEOUT秒を過ぎた場合に失敗にする。
+    - 戻り値: 失敗にしたジョブ数
+    """
+    limit = timezone.now() - datetime.timedelta(seconds=settings.IMPORT_JOB_TIMEOUT)
+    stale = []
+    running = ImportJob.objects.filter(status=ImportJob.STATUS_RUNNING)
+    for pk, worker, started_date in running.values_list("pk", "worker", "started_date"):
+        alive = _is_worker_alive(worker)
+        if alive is False or (alive is None and (started_date is None or started_date < limit)):
+            stale.append(pk)
+    if not stale:
+        return 0
+    logger.warning(f"Import jobs interrupted: {stale}")
+    return ImportJob.objects.filter(pk__in=stale, status=ImportJob.STATUS_RUNNING).update(
+        status=ImportJob.STATUS_FAILED,
+        progress=100,
+        errors=[
+            "取り込みが中断されました（サーバの再起動など）。取り込み結果を確認して、もう一度実行してください。"
+        ],
+        finished_date=timezone.now(),
+    )
+
+
+def resubmit_jobs():
+    """中断されたジョブを失敗にし、待機中のジョブをこのプロセスのスレッドプールに登録する
+    - 他のプロセスが登録済みのジョブも登録するが、実行は条件付きのUPDATEで1回だけになる（run_job()）。
+    - 戻り値: 登録したジョブ数
+    """
+    if settings.IMPORT_JOB_THREADS <= 0:
+        return 0
+    fail_stale_jobs()
+    queued = list(
+        ImportJob.objects.filter(status=ImportJob.STATUS_QUEUED)
+        .order_by("created_date", "pk")
+        .values_list("pk", flat=True)
+    )
+    for job_id in queued:
+        _submit(job_id)
+    return len(queued)
+
+
+def _set_progress(job_id, done, total):
+    """進捗を10%（開始）〜99%の範囲で更新する"""
+    ImportJob.objects.filter(pk=job_id).update(progress=10 + 89 * done // max(total, 1))
+
+
+def run_job(job_id):
+    """待機中のジョブを実行する
+    - 待機中から実行中への変更は条件付きのUPDATEで行い、他のスレッド・プロセスが実行を始めたジョブは実行しない。
+      他のジョブが実行中の場合も実行しない（待機中のまま残し、resubmit_jobs()・import_workerで再実行する）。
+    - 終了時の更新は、このプロセスが実行中のままの場合だけ行う（中断として失敗にされたジョブは上書きしない）。
+    - 戻り値: ジョブを実行した場合はTrue
+    """
+    job = ImportJob.objects.get(pk=job_id)
+    with _writer_lock:
+        running = ImportJob.objects.filter(status=ImportJob.STATUS_RUNNING)
+        claimed = (
+            ImportJob.objects.filter(pk=job_id, status=ImportJob.STATUS_QUEUED)
+            .exclude(Exists(running))
+            .update(
+                status=ImportJob.STATUS_RUNNING, progress=10, started_date=timezone.now(), worker=WORKER_ID
+            )
+        )
+        if not claimed:
+            return False
+
+        importer = IMPORTERS[job.kind]
+        msgs, errors, url = [], [], ""
+        try:
+            kwargs = {"progress": lambda done, total: _set_progress(job_id, done, total)}
+            success, ctx, errors = importer.execute(
+                job.author, _load_params(job.params), **(kwargs if importer.has_progress else {})
+            )
+            if success:
+                msgs, url = importer.done(ctx)
+        except Exception as e:
+            logger.exception(f"Import job error: {job_id}")
+            success, errors = False, [str(e)]
+
+        finished = ImportJob.objects.filter(
+            pk=job_id, status=ImportJob.STATUS_RUNNING, worker=WORKER_ID
+        ).update(
+            status=ImportJob.STATUS_DONE if success else ImportJob.STATUS_FAILED,
+            progress=100,
+            messages=msgs,
+            errors=errors,
+            result_url=url,
+            finished_date=timezone.now(),
+        )
+        if not finished:
+            logger.warning(f"Import job {job_id} was marked as interrupted while running")
+    return True
+
+
+def run_queued_jobs():
+    """待機中のジョブを古い順に1つずつ実行する（他のプロセスのジョブが実行中の場合は実行しない）
+    - 中断されて実行中のまま残ったジョブは、先に失敗にする（待機中のジョブが実行されなくならないよう）。
+    - 戻り値: 実行したジョブ数
+    """
+    fail_stale_jobs()
+    queued = (
+        ImportJob.objects.filter(status=ImportJob.STATUS_QUEUED)
+        .order_by("created_date", "pk")
+        .values_list("pk", flat=True)
+    )
+    return sum(run_job(job_id) for job_id in list(queued))
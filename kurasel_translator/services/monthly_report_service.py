@@ -1,43 +1,68 @@
 import logging
+from dataclasses import dataclass
 
 from common.services import select_period
 from control.models import ControlRecord, FiscalLock
 from django.conf import settings
-from monthly_report.models import ReportTransaction
+from monthly_report.models import MonthlySummary, ReportTransaction
 from record.models import Himoku
 
+from kurasel_translator.models import ImportJob
+
+from .batch_service import begin_batch, end_batch_with_diff, month_range
+from .common_service import RowDiff, attach_diff, group_lines, line_error, to_int, tokenize
+
 logger = logging.getLogger(__name__)
 
 
-def translate_kurasel_text(note_text, rows_per_record=5):
-    """テキストをクリーンアップし、指定行数ごとのリストに変換する"""
+@dataclass(slots=True)
+class MonthlyRecord:
+    """月次収支データの1レコード（5行: 費目、達成率、当月実績、年間予算、実績累計）
+    - line: 費目の行番号
+    - diff: 登録済みデータとの差分（確認モードで設定）
+    """
+
+    himoku_name: str
+    rate: str
+    amount: int
+    budget: str
+    cumulative: str
+    line: int
+    diff: RowDiff | None = None
 
-    # note_textを行ごとに分割して、空行と文字前後の空白を除去したリストを作成
-    lines = [s for line in note_text.splitlines() if (s := line.strip())]
+
+def translate_kurasel_text(note_text, rows_per_record=5):
+    """テキストをクリーンアップし、指定行数ごとのレコードに変換する
+    - 戻り値: (収支区分, レコードのリスト)
+    - 形式の誤り・当月実績が数値でない場合は、行番号付きのメッセージでValueErrorとする。
+    """
+    lines = list(tokenize(note_text))
+    if not lines:
+        raise ValueError("取り込むデータが入力されていません。")
 
     # データの種類判定とヘッダ除去
-    first_line = lines[0]
+    first_line = lines[0].text
     if first_line not in ("収入の部", "支出の部"):
         raise ValueError("ヘッダの「収入の部」または「支出の部」の行からコピーしてください")
 
     data_kind = "収入" if first_line == "収入の部" else "支出"
 
     # 「合計行」が含まれていないかのチェック
-    if any("合計" in line for line in lines):
-        raise ValueError("「合計」の行は含めないでください")
-
-    # 実データ部分の抽出（ヘッダ6要素をスキップ）
-    core_data = lines[6:]
+    total_line = next((line for line in lines if "合計" in line.text), None)
+    if total_line is not None:
+        raise ValueError(line_error(total_line, "「合計」の行は含めないでください"))
 
-    # クリーンアップとグループ化
+    # 実データ部分（ヘッダ6要素をスキップ）をグループ化
     record_list = []
-    current_record = []
-    for item in core_data:
-        clean_item = item.replace("¥", "").replace("（円）", "").replace(",", "").strip()
-        current_record.append(clean_item)
-        if len(current_record) == rows_per_record:
-            record_list.append(current_record)
-            current_record = []
+    errors = []
+    for name, rate, amount, budget, cumulative in group_lines(lines[6:], rows_per_record):
+        value = to_int(amount, errors, label="当月実績")
+        if value is not None:
+            record_list.append(
+                MonthlyRecord(name.text, rate.text, value, budget.text, cumulative.text, name.no)
+            )
+    if errors:
+        raise ValueError(" / ".join(errors))
 
     return data_kind, record_list
 
@@ -45,12 +70,12 @@ def translate_kurasel_text(note_text, rows_per_record=5):
 def check_accountingclass(data_list, ac_name):
     """会計区分とデータ内容の整合性チェック
     - ac_nameの費目リストを作成
-    - data_listの各要素の0番目（費目名）と比較
+    - data_listの各レコードの費目名と比較
     """
     himoku_list = Himoku.get_himoku_list(ac_name)
 
     for d in data_list:
-        if d[0] not in himoku_list:
+        if d.himoku_name not in himoku_list:
             return False
     return True
 
@@ -61,7 +86,7 @@ def filter_community_himoku(data_list, ac_name):
         return data_list
 
     himoku_names = set(Himoku.get_without_community().values_list("himoku_name", flat=True))
-    return [d for d in data_list if d[0] in himoku_names]
+    return [d for d in data_list if d.himoku_name in himoku_names]
 
 
 def execute_monthly_import(user, form_data):
@@ -96,7 +121,7 @@ def execute_monthly_import(user, form_data):
         data_list = filter_community_himoku(data_list, ac_name)
 
         # 5. 合計計算
-        total = sum(int(d[2]) for d in data_list)
+        total = sum(d.amount for d in data_list)
 
         context_result = {
             "year": year,
@@ -107,12 +132,22 @@ def execute_monthly_import(user, form_data):
             "total": total,
         }
 
+        # 登録済みデータとの差分（確認モードの表示と、登録モードの件数の記録に使う）
+        context_result["diff_summary"] = attach_diff(
+            data_list,
+            lambda d: d.himoku_name,
+            ReportTransaction.get_kurasel_amounts(ac_name, year, month),
+        )
         if "確認" in mode:
             return True, context_result, []
 
         # 6. 登録処理
-        import_context = {**context_result, "author": user.pk}
+        batch, errors = begin_batch(ImportJob.KIND_MONTHLY, user, form_data, *month_range(year, month))
+        if batch is None:
+            return False, context_result, errors
+        import_context = {**context_result, "author": user.pk, "import_batch": batch}
         success, error_list = ReportTransaction.monthly_from_kurasel(ac_name, import_context)
+        end_batch_with_diff(batch, success, context_result["diff_summary"])
 
         if success:
             # 相殺フラグ処理
@@ -120,6 +155,8 @@ def execute_monthly_import(user, form_data):
             if offset_himoku:
                 tstart, tend = select_period(year, month)
                 ReportTransaction.set_offset_flag(offset_himoku, tstart, tend)
+            # 集計テーブルの更新
+            MonthlySummary.refresh(year, month)
             return True, context_result, []
         else:
             return False, context_result, [f"取り込み失敗: {e}" for e in error_list]
@@ -1,85 +1,183 @@
 import datetime
 import logging
 import unicodedata
+from dataclasses import dataclass
 
+from common.ledger_version import bump_dates
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from payment.models import PaymentMethod
-from record.models import Account, Himoku, Transaction, TransferRequester
+from django.db import transaction as db_transaction
+from record.models import Account, AccountBalance, ApprovalCheckData, Himoku, Transaction
 
-from .common_service import clean_amount_str, clean_kurasel_text
+from kurasel_translator.models import ImportJob
+
+from .batch_service import begin_batch, end_batch
+from .common_service import RowDiff, attach_diff, line_error, to_int, tokenize
+from .expense_classifier import get_expense_classifier
 
 logger = logging.getLogger(__name__)
 
 user = get_user_model()
 
-# --- 入出金明細固有ロジック ---
+# 確認画面・登録結果に表示する明細の最大件数
+PREVIEW_LIMIT = 1000
 
+# --- 入出金明細固有ロジック ---
 
-def parse_transaction_text(msg_list):
-    """入出金テキストを解析してレコードごとのリストに分割する"""
+# レコードの区切りとなる行
+KINDS = ("入金", "出金")
 
-    line_list = []
-    for item in msg_list:
-        if item == "ホーム":  # 全体コピーの誤混入チェック
-            return None
-        line_list.append(clean_amount_str(item))
 
-    # 「入金」「出金」を区切り文字としてレコードを分割
-    pos_list = [i for i, v in enumerate(line_list) if v in ["入金", "出金"]]
+@dataclass(slots=True)
+class TransactionRecord:
+    """入出金明細の1レコード
+    - Kuraselの1レコードは「種別、月日、金額、残高、（振込依頼人）、摘要」の5〜6行。
+    - dateはnormalize_transaction_records()で年を推定して設定する。
+    - line: レコード先頭の行番号
+    - diff: 登録済みデータとの差分（確認モードで設定）
+    """
 
-    record_list = []
-    end = None
-    for start in pos_list[::-1]:  # 後ろからスライスして分割
-        record_list.append(line_list[start:end])
-        end = start
-    return record_list
+    kind: str
+    month_day: str
+    amount: int
+    balance: int | None
+    requester: str
+    description: str
+    line: int
+    date: datetime.date | None = None
+    diff: RowDiff | None = None
+
+
+def parse_transaction_text(lines):
+    """入出金テキスト(Lineのリスト)を解析してレコードに分割する
+    - 「入金」「出金」の行をレコードの区切りとする。Kuraselの並び（新しい順）を古い順にして返す。
+    - 戻り値: (レコードのリスト, 行番号付きのエラーリスト)。「ホーム」を含む場合はNone。
+    """
+    chunks = []
+    for line in lines:
+        if line.text == "ホーム":  # 全体コピーの誤混入チェック
+            return None
+        if line.text in KINDS:
+            chunks.append([line])
+        elif chunks:
+            chunks[-1].append(line)
+
+    records = []
+    errors = []
+    for chunk in reversed(chunks):
+        if len(chunk) < 4:
+            errors.append(line_error(chunk[0], "月日・金額・残高が足りません"))
+            continue
+        amount = to_int(chunk[2], errors)
+        balance = to_int(chunk[3], errors, label="残高")
+        # 振込依頼人が無い場合は、5行目が摘要となる
+        texts = [unicodedata.normalize("NFKC", line.text) for line in chunk[4:6]]
+        requester, description = texts if len(texts) == 2 else ("", texts[0] if texts else "")
+        if amount is None:
+            continue
+        records.append(
+            TransactionRecord(
+                kind=chunk[0].text,
+                month_day=chunk[1].text,
+                amount=amount,
+                balance=balance,
+                requester=requester,
+                description=description,
+                line=chunk[0].no,
+            )
+        )
+    return records, errors
 
 
-def normalize_transaction_records(data_list, year):
+def infer_years(month_days, year):
+    """古い順の(月, 日)のリストに年を付ける
+    - yearは最新のデータ（Kuraselの貼り付けの先頭）の年。
+    - 新しい順に見て、月日が1つ新しいデータの月日より後になった位置で前年に戻す（12月→1月の年跨ぎ）。
+    - 戻り値: 年のリスト
     """
-    日付の変換とUnicode正規化を行う
+    years = [year] * len(month_days)
+    newer = None
+    for i in range(len(month_days) - 1, -1, -1):
+        if newer is not None and month_days[i] > newer:
+            year -= 1
+        years[i] = year
+        newer = month_days[i]
+    return years
+
+
+def find_balance_breaks(records):
+    """残高が連続しないデータ（古い順で直前のデータとの間に欠落・並び順の誤りがある）の日付リストを返す
+    - 連続の条件: 直前の残高 + 入金額（出金は - 出金額） = 残高。
+    - 残高が数値でないデータは判定しない。
     """
-    rtn_list = []
-    for item in data_list:
-        # 日付: "01/04" -> datetime.date(2026, 1, 4)
-        m, d = item[1].split("/")
-        item[1] = datetime.date(year, int(m), int(d))
-
-        # 摘要・依頼人名の正規化 (NFKC)
-        # item[4]: 摘要, item[5]: 依頼人名 (存在しない場合は補完)
-        if len(item) > 5:
-            item[4] = unicodedata.normalize("NFKC", item[4])
-            item[5] = unicodedata.normalize("NFKC", item[5])
-        else:
-            # 依頼人名がない場合は空文字を入れつつ摘要を正規化
-            memo = unicodedata.normalize("NFKC", item[4])
-            item.append(memo)  # item[5] に正規化した摘要
-            item[4] = ""  # item[4] は空
+    breaks = []
+    for older, newer in zip(records, records[1:]):
+        if older.balance is None or newer.balance is None:
+            continue
+        amount = newer.amount if newer.kind == "入金" else -newer.amount
+        if older.balance + amount != newer.balance:
+            breaks.append(newer.date)
+    return breaks
+
+
+def summarize_by_month(records):
+    """年月毎の件数・入金合計・出金合計のリストを返す（古い順）"""
+    summary = {}
+    for rec in records:
+        entry = summary.setdefault(
+            (rec.date.year, rec.date.month),
+            {"year": rec.date.year, "month": rec.date.month, "count": 0, "deposit": 0, "withdrawal": 0},
+        )
+        entry["count"] += 1
+        entry["deposit" if rec.kind == "入金" else "withdrawal"] += rec.amount
+    return list(summary.values())
+
+
+def normalize_transaction_records(records, year):
+    """
+    日付を設定する
+    - recordsは古い順。yearは最新のデータの年で、年跨ぎはinfer_years()で判定する。
+    - 日付として不正なデータ（年を推定した結果の2/29など）はValueErrorとする。
+    """
+    month_days = []
+    for rec in records:
+        m, d = rec.month_day.split("/")
+        month_days.append((int(m), int(d)))
+    years = infer_years(month_days, year)
 
-        rtn_list.append(item)
-    return rtn_list
+    for rec, (m, d), y in zip(records, month_days, years):
+        # 日付: "01/04" -> datetime.date(2026, 1, 4)
+        rec.date = datetime.date(y, m, d)
+    return records
 
 
-def execute_transaction_import(user, form_data):
+def execute_transaction_import(user, form_data, progress=None):
     """
     入出金取り込みのメイン実行関数
+    - progress: 登録モードで、年月毎の登録が終わる度に(登録済みの月数, 全月数)で呼ばれる関数（省略可）
     """
     year = form_data["year"]
     note = form_data["note"]
     mode = form_data["mode"]
 
     # 1. テキスト解析
-    msg_list = clean_kurasel_text(note)
-    if not msg_list or msg_list[0] not in ["出金", "入金"]:
+    lines = list(tokenize(note))
+    if not lines or lines[0].text not in KINDS:
         return False, {}, ["データ形式が正しくありません。データ範囲のみをコピーしてください。"]
 
-    raw_records = parse_transaction_text(msg_list)
-    if raw_records is None:
+    parsed = parse_transaction_text(lines)
+    if parsed is None:
         return False, {}, ["「ホーム」等の不要な文字が含まれています。"]
+    raw_records, parse_errors = parsed
+    if parse_errors:
+        return False, {}, parse_errors
 
-    # 2. データ正規化
-    data_list = normalize_transaction_records(raw_records, year)
+    # 2. データ正規化（年跨ぎの判定を含む）
+    try:
+        data_list = normalize_transaction_records(raw_records, year)
+    except ValueError as e:
+        logger.error(f"Transaction date error: {e}")
+        return False, {}, ["日付が正しくありません。「西暦」（最新のデータの年）を確認してください。"]
 
     # 3. 必要なマスタデータの取得 (Viewから分離)
     default_himoku = Himoku.get_default_himoku()
@@ -97,122 +195,164 @@ def execute_transaction_import(user, form_data):
         "mode": mode,
         "data_list": data_list,
         "author": user.pk,
+        "month_summary": summarize_by_month(data_list),
+        "balance_breaks": find_balance_breaks(data_list),
     }
 
-    # 4. 登録処理
-    payment_method_list = PaymentMethod.get_paymentmethod_obj()
-    # 請求者リスト
-    requester_list = TransferRequester.get_requester_obj()
+    # 4. 費目判定（振込依頼人・支払い方法・手数料キーワードのインデックス）
+    classifier = get_expense_classifier(default_himoku, banking_fee_himoku)
 
-    # 確認モードの場合
+    # 確認モードの場合は、出金データの判定結果（費目と判定ルール）を合わせて表示する
+    # 表示する明細はPREVIEW_LIMIT件まで（大量の貼り付けでも画面を応答させるため）
+    preview_limit = PREVIEW_LIMIT if len(data_list) > PREVIEW_LIMIT else 0
     if "確認" in mode:
+        # 種類、日付、金額、振り込み依頼人が一致するデータは登録済みとしてスキップされる
+        context_result["diff_summary"] = attach_diff(
+            data_list,
+            lambda rec: (rec.date, rec.amount, rec.requester),
+            {key: key[1] for key in _load_existing_keys(data_list)},
+            upsert=False,
+        )
+        context_result["preview_list"] = [
+            (rec, *classifier.classify(rec.requester, rec.description))
+            if rec.kind == "出金"
+            else (rec, default_himoku, "")
+            for rec in data_list[:PREVIEW_LIMIT]
+        ]
+        context_result["preview_limit"] = preview_limit
         return True, context_result, []
 
     # 登録モード
-    rtn_month, error_list = import_transaction_service(
-        context_result,
-        payment_method_list,
-        requester_list,
-        default_himoku,
-        banking_fee_himoku,
+    dates = [rec.date for rec in data_list]
+    batch, errors = begin_batch(ImportJob.KIND_TRANSACTION, user, form_data, min(dates), max(dates))
+    if batch is None:
+        return False, context_result, errors
+    months, counts, error_list = import_transaction_service(
+        {**context_result, "import_batch": batch}, classifier, progress
+    )
+    end_batch(batch, not error_list, inserted=counts["inserted"], skipped=counts["skipped"])
+    context_result.update(
+        {"data_list": data_list[:PREVIEW_LIMIT], "preview_limit": preview_limit, "import_months": months}
     )
+    errors = [f"失敗: {e}" for e in error_list]
 
-    if rtn_month > 0:
-        return True, {"month": rtn_month, **context_result}, []
+    # 登録した最初の年月の明細一覧へ移動する
+    done = [m for m in months if not m["error"]]
+    if done:
+        return True, {**context_result, "year": done[0]["year"], "month": done[0]["month"], **counts}, errors
     else:
-        return False, context_result, [f"失敗: {e}" for e in error_list]
+        return False, context_result, errors
 
 
-def import_transaction_service(data, paymentmethod_list, requester_list, default_himoku, banking_fee_himoku):
+def import_transaction_service(data, classifier, progress=None):
     """外部データから取引明細を取り込むメインのサービス関数
-    - 戻り値：取り込んだ「月」(int型)。エラーの場合は0を返す。
-    - 種類、日付、金額、振り込み依頼人でget_or_createする。
-    - 口座は管理会計に決め打ち(id=3)。
-    - 費目はdefaultの費目オブジェクト。
+    - data["data_list"]はTransactionRecordのリスト（日付設定済み、古い順）。
+    - 戻り値：(年月毎の結果リスト, 件数dict, エラーリスト)。
+    - 年月毎の結果は {"year", "month", "inserted", "skipped", "error"} のdict（古い順）。
+    - 件数dictは {"inserted": 登録件数, "skipped": 重複スキップ件数}。
+    - 種類、日付、金額、振り込み依頼人が一致するデータは登録済みとしてスキップする。
+    - 期間内の登録済みキーを1回のクエリで取得して差分を取り、新規分だけをbulk_createする。
+    - 金額が数値でないデータはparse_transaction_text()で検出し、取り込み前に中止する。
+    - 登録は年月毎のatomicブロックで行う。ある月の登録に失敗した場合はその月だけロールバックし、
+      他の月の登録は残す（同じデータを再度貼り付けると、登録済みの月はスキップされる）。
+    - progress: 年月毎の登録が終わる度に(登録済みの月数, 全月数)で呼ばれる関数（省略可）。
+    - 入金の費目はdefaultの費目オブジェクト。出金の費目はclassifier(ExpenseClassifier)で判定する。
+    - 出金データの支払い承認の要否(is_approval)は登録時に判定する。
     - 勘定科目・費目は手入力となる。
+    - data["import_batch"]: 登録する明細に設定する取り込みバッチ（省略可）。
+    - 口座の日毎残高(AccountBalance)は、登録した最も古い日から計算し直す。
     """
+    counts = {"inserted": 0, "skipped": 0}
     data_list = data.get("data_list", [])
     if not data_list:
-        return 0, []
+        return [], counts, []
 
     # 記録者の取得（エラーハンドリング含む）
     try:
         author_obj = user.objects.get(id=data["author"])
     except user.DoesNotExist:
         logger.error(f"User ID {data['author']} not found.")
-        return 0, ["システムエラー: 記録者が見つかりません"]
+        return [], counts, ["システムエラー: 記録者が見つかりません"]
 
-    error_list = []
-    # 最初のデータの月をデフォルトの戻り値にする
-    target_month = data_list[0][1].month
+    # 年月毎の新規データとスキップ件数
+    months = {}
 
     # 処理の高速化と安全性のために一括して口座を取得
     target_account = Account.objects.first()
 
-    for item in data_list:
-        # itemの中身を名前付きで定義（可読性向上）
-        # [0:種別, 1:日付, 2:金額, 3:残高, 4:振込依頼人, 5:摘要]
-        kind, date, amount, balance, requester_name, description = item
+    # 貼り付けた期間の登録済みキーを1回のクエリで取得する
+    existing_keys = _load_existing_keys(data_list)
+    # 支払い承認が不要な摘要欄のチェック文字列
+    approval_pattern = ApprovalCheckData.get_pattern()
 
-        # 1. 費目の特定
-        is_income = kind == "入金"
+    error_list = []
+    for rec in data_list:
+        month = months.setdefault((rec.date.year, rec.date.month), {"objs": [], "skipped": 0})
+
+        # 登録済み（または同じ貼り付け内で重複）のデータはスキップ
+        key = (rec.date, rec.amount, rec.requester)
+        if key in existing_keys:
+            month["skipped"] += 1
+            continue
+        existing_keys.add(key)
+
+        # 費目の特定
+        is_income = rec.kind == "入金"
+        is_approval = True
         if is_income:
-            himoku_obj = default_himoku
+            himoku_obj = classifier.default_himoku
         else:
-            himoku_obj = _resolve_expense_himoku(
-                requester_name,
-                description,
-                requester_list,
-                paymentmethod_list,
-                default_himoku,
-                banking_fee_himoku,
+            himoku_obj, _ = classifier.classify(rec.requester, rec.description)
+            # 支払い承認の要否は取り込み時に判定する
+            is_approval = Transaction.is_approval_required(himoku_obj, rec.description, approval_pattern)
+
+        month["objs"].append(
+            Transaction(
+                transaction_date=rec.date,
+                amount=rec.amount,
+                requesters_name=rec.requester,
+                account=target_account,
+                is_income=is_income,
+                himoku=himoku_obj,
+                balance=rec.balance,
+                description=rec.description,
+                author=author_obj,
+                is_approval=is_approval,
+                import_batch=data.get("import_batch"),
             )
-
-        # 2. 保存処理（1件ごとのエラーハンドリング）
+        )
+
+    # 保存処理（年月毎に1トランザクションで登録）
+    results = []
+    first_date = None
+    for (year, month), chunk in sorted(months.items()):
+        result = {"year": year, "month": month, "inserted": 0, "skipped": chunk["skipped"], "error": ""}
+        counts["skipped"] += chunk["skipped"]
         try:
-            # get_or_createは副作用があるため慎重に
-            _, created = Transaction.objects.get_or_create(
-                transaction_date=date,
-                amount=amount,
-                requesters_name=requester_name,
-                defaults={
-                    "account": target_account,
-                    "is_income": is_income,
-                    "himoku": himoku_obj,
-                    "balance": balance,
-                    "description": description,
-                    "author": author_obj,
-                },
-            )
+            with db_transaction.atomic():
+                Transaction.objects.bulk_create(chunk["objs"])
+            bump_dates(*(obj.transaction_date for obj in chunk["objs"]))
+            if chunk["objs"] and first_date is None:
+                first_date = chunk["objs"][0].transaction_date
+            result["inserted"] = len(chunk["objs"])
+            counts["inserted"] += len(chunk["objs"])
         except Exception as e:
-            logger.error(f"Transaction save error: {e}, Data: {requester_name}")
-            error_list.append(requester_name)
-            target_month = 0
-
-    return target_month, error_list
-
-
-def _resolve_expense_himoku(
-    name, desc, requester_list, paymentmethod_list, default_himoku, banking_fee_himoku
-):
-    """
-    出金時の費目を優先順位に従って判定する内部関数
-    """
-    # 優先順位1: 振込依頼人名での完全一致
-    for r in requester_list:
-        if name == r.requester:
-            return r.himoku
-
-    # 優先順位2: 支払い方法（摘要欄）での一致
-    for p in paymentmethod_list:
-        if desc == p.account_description:
-            return p.himoku_name
-
-    logger.debug(desc)
-    # 優先順位3: 特定のキーワード（手数料系）
-    keywords = ["トリアツカイリヨウ", "フリコミテスウリヨウ"]
-    if any(word in desc for word in keywords):
-        return banking_fee_himoku
-
-    # どれにも当てはまらない場合はデフォルト
-    return default_himoku
+            logger.error(f"Transaction bulk save error: {year}-{month}: {e}")
+            result["error"] = str(e)
+            error_list.append(f"{year}年{month}月: {e}")
+        results.append(result)
+        if progress:
+            progress(len(results), len(months))
+    # bulk_createはシグナルを送らないため、口座の日毎残高は登録した最も古い日から計算し直す
+    if first_date and target_account:
+        AccountBalance.changed(target_account.pk, first_date)
+    return results, counts, error_list
+
+
+def _load_existing_keys(data_list):
+    """取り込みデータの期間内にある登録済みの（取引日, 金額, 振込依頼人）キーをsetで返す"""
+    dates = [rec.date for rec in data_list]
+    qs = Transaction.objects.filter(transaction_date__range=[min(dates), max(dates)]).values_list(
+        "transaction_date", "amount", "requesters_name"
+    )
+    return set(qs)
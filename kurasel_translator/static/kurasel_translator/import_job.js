@@ -0,0 +1,31 @@
+//
+// 取込みジョブの進捗表示用JavaScript
+// - 状態のエンドポイントを1秒毎にポーリングし、ジョブが終了したら画面を再表示する。
+(function () {
+    const job = document.getElementById('import-job');
+    if (!job) {
+        return;
+    }
+    const statusLabel = document.getElementById('import-job-status');
+    const progress = document.getElementById('import-job-progress');
+
+    async function poll() {
+        try {
+            const response = await fetch(job.dataset.statusUrl, { headers: { 'Accept': 'application/json' } });
+            if (response.ok) {
+                const data = await response.json();
+                statusLabel.textContent = data.status_label;
+                progress.value = data.progress;
+                progress.textContent = `${data.progress}%`;
+                if (data.finished) {
+                    window.location.reload();
+                    return;
+                }
+            }
+        } catch (e) {
+            // 通信エラーの場合は次のポーリングで再試行する
+        }
+        setTimeout(poll, 1000);
+    }
+    setTimeout(poll, 1000);
+})();
@@ -1,3 +1,533 @@
-from django.test import TestCase
+import datetime
+import json
+from unittest import mock
 
-# Create your tests here.
+from common.cache import bump_version
+from control.models import ControlRecord, FiscalLock
+from django.contrib.auth import get_user_model
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from monthly_report.models import ReportTransaction
+from payment.models import PaymentCategory, PaymentMethod
+from record.models import AccountingClass, Himoku, Transaction, TransferRequester
+from record.services.transaction import create_offset_transaction
+
+from kurasel_translator.models import ImportBatch, ImportJob
+from kurasel_translator.services.common_service import diff_rows, group_lines, tokenize
+from kurasel_translator.services.expense_classifier import (
+    RULE_DEFAULT,
+    RULE_DESCRIPTION,
+    RULE_KEYWORD,
+    RULE_REQUESTER,
+    KeywordAutomaton,
+    get_expense_classifier,
+)
+from kurasel_translator.services.job_service import (
+    WORKER_ID,
+    fail_stale_jobs,
+    resubmit_jobs,
+    run_job,
+    run_queued_jobs,
+)
+from kurasel_translator.services.monthly_report_service import execute_monthly_import
+from kurasel_translator.services.transaction_service import (
+    TransactionRecord,
+    execute_transaction_import,
+    find_balance_breaks,
+    import_transaction_service,
+    infer_years,
+    parse_transaction_text,
+)
+from kurasel_translator.views.import_job_views import ImportBatchRollbackView, ImportJobStatusView
+from kurasel_translator.views.transaction_transform import TransactionImportView
+
+User = get_user_model()
+
+
+class ImportTransactionServiceTests(TestCase):
+    """import_transaction_service の単体テスト"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="pass")
+        self.ac = AccountingClass.objects.create(code=1, accounting_name="管理費会計")
+        self.himoku = Himoku.objects.create(
+            code=999, himoku_name="不明", accounting_class=self.ac, is_default=True
+        )
+        Transaction.objects.create(
+            transaction_date=datetime.date(2025, 1, 10),
+            amount=1000,
+            requesters_name="ヤマダ",
+            himoku=self.himoku,
+        )
+        self.classifier = get_expense_classifier(self.himoku, None)
+
+    def _data(self, data_list):
+        return {"data_list": data_list, "author": self.user.pk}
+
+    def _record(self, kind, date, amount, balance, requester="", description=""):
+        month_day = date.strftime("%m/%d")
+        return TransactionRecord(kind, month_day, amount, balance, requester, description, 1, date)
+
+    def test_insert_and_skip_duplicates(self):
+        data_list = [
+            self._record("入金", datetime.date(2025, 1, 10), 1000, 5000, "ヤマダ"),
+            self._record("入金", datetime.date(2025, 1, 11), 2000, 7000, "スズキ"),
+            self._record("入金", datetime.date(2025, 1, 11), 2000, 7000, "スズキ"),
+            self._record("出金", datetime.date(2025, 1, 12), 500, 6500, "", "テスト"),
+        ]
+        months, counts, errors = import_transaction_service(self._data(data_list), self.classifier)
+
+        self.assertEqual(months, [{"year": 2025, "month": 1, "inserted": 2, "skipped": 2, "error": ""}])
+        self.assertEqual(errors, [])
+        self.assertEqual(counts, {"inserted": 2, "skipped": 2})
+        self.assertEqual(Transaction.objects.count(), 3)
+
+    def test_invalid_row_writes_nothing(self):
+        note = "\n".join(
+            ["入金", "01/12", "abc", "7000", "サトウ", "", "入金", "01/11", "2000", "7000", "スズキ"]
+        )
+        success, _, errors = execute_transaction_import(
+            self.user, {"year": 2025, "note": note, "mode": "登録"}
+        )
+
+        self.assertFalse(success)
+        self.assertEqual(errors, ["3行目: 金額が数値ではありません（abc）"])
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_tokenize(self):
+        lines = list(tokenize("  出金\n\n01/06\n¥1,000（円）\n¥500\nデンキ\n入金\n01/05"))
+        self.assertEqual(
+            [(line.no, line.text) for line in lines[:4]], [(1, "出金"), (3, "01/06"), (4, "1000"), (5, "500")]
+        )
+        self.assertEqual(len(group_lines(lines, 3)), 2)
+
+        # 古い順に並べ替え、月日・金額・残高が無いレコードはエラー、振込依頼人が無い場合は5行目が摘要
+        records, errors = parse_transaction_text(lines)
+        self.assertEqual(errors, ["7行目: 月日・金額・残高が足りません"])
+        self.assertEqual(
+            (records[0].amount, records[0].requester, records[0].description), (1000, "", "デンキ")
+        )
+
+    def test_infer_years(self):
+        # 古い順の(月, 日)。最新のデータの年を2025年とする
+        month_days = [(11, 30), (12, 1), (12, 31), (1, 5), (1, 5), (2, 1), (1, 10), (3, 1)]
+        self.assertEqual(infer_years(month_days, 2025), [2023, 2023, 2023, 2024, 2024, 2024, 2025, 2025])
+
+    def test_paste_across_years(self):
+        # Kuraselの入出金明細は新しい順に並ぶ
+        note = "\n".join(
+            [
+                "入金", "01/05", "¥3,000", "¥10,000", "スズキ", "",
+                "出金", "12/28", "¥1,000", "¥7,000", "", "デンキ",
+                "入金", "12/01", "¥2,000", "¥8,000", "サトウ", "",
+            ]
+        )  # fmt: skip
+        form_data = {"year": 2025, "note": note, "mode": "登録"}
+        success, ctx, errors = execute_transaction_import(self.user, form_data)
+
+        self.assertTrue(success)
+        self.assertEqual(errors, [])
+        self.assertEqual((ctx["year"], ctx["month"]), (2024, 12))
+        self.assertEqual(
+            [(m["year"], m["month"], m["inserted"]) for m in ctx["import_months"]],
+            [(2024, 12, 2), (2025, 1, 1)],
+        )
+        self.assertEqual(ctx["balance_breaks"], [])
+        self.assertTrue(Transaction.objects.filter(transaction_date=datetime.date(2024, 12, 28)).exists())
+
+    def test_balance_breaks(self):
+        data_list = [
+            self._record("入金", datetime.date(2024, 12, 1), 2000, 8000),
+            self._record("出金", datetime.date(2024, 12, 28), 1000, 7000),
+            self._record("入金", datetime.date(2025, 1, 5), 3000, 11000),
+        ]
+        self.assertEqual(find_balance_breaks(data_list), [datetime.date(2025, 1, 5)])
+
+
+class ImportDiffTests(TestCase):
+    """確認モードの差分表示のテスト"""
+
+    def test_diff_rows(self):
+        existing = {"a": 100, "b": 200, "c": 300}
+        rows = [("a", 100), ("b", 250), ("d", 50), ("d", 60)]
+        diffs, summary = diff_rows(rows, existing, replace=True)
+        self.assertEqual([d.status for d in diffs], ["noop", "update", "insert", "update"])
+        self.assertEqual((diffs[1].old_amount, diffs[1].new_amount), (200, 250))
+        self.assertEqual(summary["removed"], [("c", 300)])
+
+        # キーが一致するデータをスキップする取り込み
+        diffs, summary = diff_rows(rows, existing, upsert=False)
+        self.assertEqual([d.status for d in diffs], ["noop", "noop", "insert", "noop"])
+        self.assertEqual(summary["delete"], 0)
+
+    def test_monthly_confirm_shows_changes(self):
+        user = User.objects.create_user(username="testuser", password="pass")
+        ac = AccountingClass.objects.create(code=1, accounting_name="管理費会計")
+        kanrihi = Himoku.objects.create(code=1, himoku_name="管理費", accounting_class=ac, is_income=True)
+        Himoku.objects.create(code=2, himoku_name="駐車場使用料", accounting_class=ac, is_income=True)
+        ReportTransaction.objects.create(
+            transaction_date=datetime.date(2025, 1, 1), himoku=kanrihi, accounting_class=ac, amount=1000
+        )
+        header = ["収入の部", "費目", "達成率", "当月実績", "年間予算", "実績累計"]
+        rows = [
+            "管理費",
+            "10%",
+            "¥1,200",
+            "¥12,000",
+            "¥1,200",
+            "駐車場使用料",
+            "10%",
+            "¥500",
+            "¥6,000",
+            "¥500",
+        ]
+        form_data = {
+            "year": 2025,
+            "month": 1,
+            "ac_class": ac,
+            "kind": "収入",
+            "mode": "確認",
+            "note": "\n".join(header + rows),
+        }
+        success, ctx, errors = execute_monthly_import(user, form_data)
+
+        self.assertTrue(success, errors)
+        diffs = [(d.himoku_name, d.diff.label, d.diff.old_amount) for d in ctx["data_list"]]
+        self.assertEqual(diffs, [("管理費", "更新", 1000), ("駐車場使用料", "追加", None)])
+        self.assertEqual(ReportTransaction.objects.get().amount, 1000)
+
+
+@override_settings(IMPORT_JOB_THREADS=0)
+class ImportJobTests(TestCase):
+    """登録モードの取り込みジョブのテスト"""
+
+    def setUp(self):
+        self.user = User.objects.create_superuser(username="admin", password="pass")
+        ac = AccountingClass.objects.create(code=1, accounting_name="管理費会計")
+        Himoku.objects.create(code=999, himoku_name="不明", accounting_class=ac, is_default=True)
+
+    def _post(self, note):
+        data = {"year": 2025, "mode": "登録", "note": note}
+        request = RequestFactory().post("/kurasel/create_deposit/", data)
+        request.user = self.user
+        return TransactionImportView.as_view()(request)
+
+    def _status(self, job):
+        request = RequestFactory().get(f"/kurasel/jobs/{job.pk}/status/")
+        request.user = self.user
+        return json.loads(ImportJobStatusView.as_view()(request, pk=job.pk).content)
+
+    def test_register_runs_as_job(self):
+        response = self._post("\n".join(["入金", "01/05", "¥3,000", "¥10,000", "スズキ"]))
+        job = ImportJob.objects.get()
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.url, f"/kurasel/jobs/{job.pk}/")
+        # リクエストでは登録しない
+        self.assertEqual((job.status, job.period, job.params["year"]), ("queued", "2025", 2025))
+        self.assertFalse(Transaction.objects.exists())
+        self.assertEqual(self._status(job)["finished"], False)
+
+        self.assertEqual(run_queued_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.progress, job.errors), ("done", 100, []))
+        self.assertIn("登録: 1件", job.messages[0])
+        self.assertTrue(job.result_url.startswith("/record/"))
+        self.assertEqual(Transaction.objects.count(), 1)
+        self.assertEqual(
+            self._status(job), {"status": "done", "status_label": "完了", "progress": 100, "finished": True}
+        )
+
+        # 実行済みのジョブは再実行しない
+        self.assertFalse(run_job(job.pk))
+
+    def test_failed_job_keeps_errors(self):
+        self._post("\n".join(["入金", "01/05", "abc", "¥10,000", "スズキ"]))
+        job = ImportJob.objects.get()
+        run_job(job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, "failed")
+        self.assertEqual(job.errors, ["3行目: 金額が数値ではありません（abc）"])
+        self.assertFalse(Transaction.objects.exists())
+
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+    def test_worker_requires_shared_cache(self):
+        # プロセス毎のキャッシュでは、ワーカーで更新したバージョンがWebサーバに届かないため実行しない
+        with self.assertRaises(ImproperlyConfigured):
+            call_command("import_worker", "--once")
+
+    def test_running_job_blocks_other_periods(self):
+        # ジョブは期間に関係なく1つずつ実行する（年をまたぐ入出金明細の貼り付けもあるため）
+        self._post("\n".join(["入金", "01/05", "¥3,000", "¥10,000", "スズキ"]))
+        queued = ImportJob.objects.get()
+        running = ImportJob.objects.create(
+            kind=ImportJob.KIND_BS,
+            period="2026-01",
+            status=ImportJob.STATUS_RUNNING,
+            started_date=timezone.now(),
+            worker=WORKER_ID,
+        )
+        self.assertEqual(run_queued_jobs(), 0)
+        self.assertFalse(run_job(queued.pk))
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, "queued")
+
+        ImportJob.objects.filter(pk=running.pk).update(status=ImportJob.STATUS_DONE)
+        self.assertEqual(run_queued_jobs(), 1)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, "done")
+
+    def test_stale_running_job_does_not_block_queue(self):
+        self._post("\n".join(["入金", "01/05", "¥3,000", "¥10,000", "スズキ"]))
+        queued = ImportJob.objects.get()
+        # 再起動前のプロセス（同じプロセスIDで別のトークン）が実行中のまま残したジョブ
+        stale = ImportJob.objects.create(
+            kind=ImportJob.KIND_TRANSACTION,
+            period="2025",
+            status=ImportJob.STATUS_RUNNING,
+            started_date=timezone.now(),
+            worker=WORKER_ID.rsplit(":", 1)[0] + ":old",
+        )
+
+        self.assertEqual(run_queued_jobs(), 1)
+        stale.refresh_from_db()
+        queued.refresh_from_db()
+        self.assertEqual((stale.status, queued.status), ("failed", "done"))
+        self.assertIn("中断", stale.errors[0])
+
+        # 確認できない他のホストのジョブは、開始からIMPORT_JOB_TIMEOUT秒を過ぎたら失敗にする
+        remote = ImportJob.objects.create(
+            kind=ImportJob.KIND_BS,
+            period="2025-01",
+            status=ImportJob.STATUS_RUNNING,
+            worker="otherhost:1:abc",
+        )
+        ImportJob.objects.filter(pk=remote.pk).update(
+            started_date=timezone.now() - datetime.timedelta(hours=2)
+        )
+        self._post("\n".join(["入金", "01/06", "¥1,000", "¥11,000", "タナカ"]))
+        # 待機中のジョブは、登録時・状態の確認時にスレッドプールへ登録し直す
+        with (
+            override_settings(IMPORT_JOB_THREADS=1),
+            mock.patch("kurasel_translator.services.job_service._submit") as submit,
+        ):
+            self.assertEqual(resubmit_jobs(), 1)
+        submit.assert_called_once_with(ImportJob.objects.get(status="queued").pk)
+        self.assertEqual(ImportJob.objects.get(pk=remote.pk).status, "failed")
+
+    def test_long_running_job_is_not_timed_out(self):
+        # このホストで動いているプロセスのジョブは、時間を過ぎても失敗にしない
+        live = ImportJob.objects.create(
+            kind=ImportJob.KIND_BS, period="2025-01", status=ImportJob.STATUS_RUNNING, worker=WORKER_ID
+        )
+        ImportJob.objects.filter(pk=live.pk).update(started_date=timezone.now() - datetime.timedelta(hours=2))
+        self.assertEqual(fail_stale_jobs(), 0)
+
+        # 実行中に中断として失敗にされたジョブは、終了時に上書きしない
+        ImportJob.objects.filter(pk=live.pk).update(status=ImportJob.STATUS_DONE)
+        self._post("\n".join(["入金", "01/05", "¥3,000", "¥10,000", "スズキ"]))
+        job = ImportJob.objects.get(status="queued")
+
+        def interrupted(params):
+            ImportJob.objects.filter(pk=job.pk).update(status=ImportJob.STATUS_FAILED, errors=["中断"])
+            return params
+
+        with mock.patch("kurasel_translator.services.job_service._load_params", side_effect=interrupted):
+            self.assertTrue(run_job(job.pk))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.errors), ("failed", ["中断"]))
+
+
+class ImportBatchTests(TestCase):
+    """取り込みバッチ（重複取り込みの防止・取り消し）のテスト"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="pass")
+        ac = AccountingClass.objects.create(code=1, accounting_name="管理費会計")
+        Himoku.objects.create(code=999, himoku_name="不明", accounting_class=ac, is_default=True)
+
+    def _import(self, note):
+        return execute_transaction_import(self.user, {"year": 2025, "note": note, "mode": "登録"})
+
+    def test_duplicate_and_rollback(self):
+        note = "\n".join(
+            ["入金", "01/05", "¥3,000", "¥10,000", "スズキ", "入金", "01/04", "¥1,000", "¥7,000"]
+        )
+        success, _, _ = self._import(note)
+        batch = ImportBatch.objects.get()
+        self.assertTrue(success)
+        self.assertEqual((batch.kind, batch.inserted, batch.row_count()), ("transaction", 2, 2))
+        self.assertEqual(
+            (batch.period_start, batch.period_end), (datetime.date(2025, 1, 4), datetime.date(2025, 1, 5))
+        )
+
+        # 空白・空行だけが違う同じ内容の貼り付けは取り込まない
+        success, _, errors = self._import(f"  {note}\n\n")
+        self.assertFalse(success)
+        self.assertIn(f"（取り込み番号: {batch.pk}）", errors[0])
+        self.assertEqual(ImportBatch.objects.count(), 1)
+
+        # 手入力のデータは取り消しで削除しない
+        Transaction.objects.create(transaction_date=datetime.date(2025, 1, 6), amount=500)
+        self.assertEqual(batch.rollback(), 2)
+        self.assertEqual(Transaction.objects.count(), 1)
+        self.assertIsNotNone(batch.rolled_back_date)
+
+        # 取り消した後は同じ内容を再度取り込める
+        success, _, _ = self._import(note)
+        self.assertTrue(success)
+        self.assertEqual(Transaction.objects.count(), 3)
+
+    def _rollback(self, batch):
+        request = RequestFactory().post(f"/kurasel/batches/{batch.pk}/rollback/")
+        request.user, _ = User.objects.get_or_create(username="admin", is_superuser=True)
+        request.session = {}
+        request._messages = FallbackStorage(request)
+        ImportBatchRollbackView.as_view()(request, pk=batch.pk)
+        return [str(m) for m in request._messages]
+
+    def test_revised_monthly_import(self):
+        ac = AccountingClass.objects.get()
+        Himoku.objects.create(code=1, himoku_name="管理費", accounting_class=ac, is_income=True)
+        Himoku.objects.create(code=2, himoku_name="駐車場使用料", accounting_class=ac, is_income=True)
+        ControlRecord.objects.create()
+
+        def import_monthly(kanrihi):
+            header = ["収入の部", "費目", "達成率", "当月実績", "年間予算", "実績累計"]
+            rows = [
+                "管理費",
+                "10%",
+                kanrihi,
+                "¥12,000",
+                kanrihi,
+                "駐車場使用料",
+                "10%",
+                "¥500",
+                "¥6,000",
+                "¥500",
+            ]
+            note = "\n".join(header + rows)
+            form_data = {
+                "year": 2025,
+                "month": 1,
+                "ac_class": ac,
+                "kind": "収入",
+                "mode": "登録",
+                "note": note,
+            }
+            return execute_monthly_import(self.user, form_data)
+
+        def amounts():
+            return dict(ReportTransaction.objects.values_list("himoku__himoku_name", "amount"))
+
+        self.assertTrue(import_monthly("¥1,000")[0])
+        first = ImportBatch.objects.get()
+        # 修正後の内容の取り込みは、変更のある行だけを更新する
+        self.assertTrue(import_monthly("¥1,200")[0])
+        revised = ImportBatch.objects.latest("pk")
+        self.assertEqual((first.row_count(), revised.row_count()), (1, 1))
+        self.assertEqual(list(revised.supersedes.all()), [first])
+
+        # 前の取り込みのデータを更新した取り込みは取り消せない
+        self.assertIn("取り消せません", self._rollback(revised)[0])
+        self.assertEqual(amounts(), {"管理費": 1200, "駐車場使用料": 500})
+
+        # 元の内容は、更新された取り込みと重複とせずに取り込み直せる
+        self.assertIsNone(ImportBatch.find_duplicate(first.content_hash))
+        self.assertTrue(import_monthly("¥1,000")[0])
+        self.assertEqual(amounts(), {"管理費": 1000, "駐車場使用料": 500})
+
+    def test_rollback_refused_after_offset_or_edit(self):
+        note = "\n".join(["出金", "01/05", "¥3,000", "¥7,000", "スズキ"])
+        self.assertTrue(self._import(note)[0])
+        batch = ImportBatch.objects.get()
+        base = Transaction.objects.get()
+        self.assertEqual(batch.get_rollback_conflicts(), [])
+
+        # 取り込み後に相殺したデータは、取り消しで削除されず残高が合わなくなるため取り消せない
+        offset = create_offset_transaction(base_transaction=base, user=self.user)
+        msgs = self._rollback(batch)
+        self.assertIn("手入力・変更したデータが 1 件", msgs[0])
+        self.assertIn("手入力: 2025-01-05 -3,000円", msgs[1])
+        self.assertEqual(Transaction.objects.count(), 2)
+        batch.refresh_from_db()
+        self.assertIsNone(batch.rolled_back_date)
+
+        # 取り込んだデータの変更も、取り消すと失われるため取り消せない
+        offset.delete()
+        base.is_maeukekin = True
+        base.save()
+        self.assertEqual(batch.get_rollback_conflicts(), [base])
+        self.assertIn("変更:", self._rollback(batch)[1])
+
+        # 変更を取り消し前の状態に戻した場合（更新日時なし）は取り消せる
+        Transaction.objects.filter(pk=base.pk).update(updated_date=None)
+        self.assertIn("取り消し、1 件削除しました", self._rollback(batch)[0])
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_rollback_checks_every_month(self):
+        batch = ImportBatch.objects.create(
+            kind=ImportJob.KIND_TRANSACTION,
+            period_start=datetime.date(2024, 12, 20),
+            period_end=datetime.date(2025, 2, 10),
+            content_hash="x",
+        )
+        self.assertEqual(batch.months(), [(2024, 12), (2025, 1), (2025, 2)])
+        # 期間の途中の月（2025年1月）だけが締め済み
+        lock = FiscalLock.objects.create(year=2025, last_closed_month=1)
+        self.assertIn("締められている", self._rollback(batch)[0])
+        batch.refresh_from_db()
+        self.assertIsNone(batch.rolled_back_date)
+        # 締めの判定はプロセス内にキャッシュされるため、削除して他のテストに残さない
+        lock.delete()
+
+
+class ExpenseClassifierTests(TestCase):
+    """出金データの費目判定インデックスの単体テスト"""
+
+    def setUp(self):
+        self.ac = AccountingClass.objects.create(code=1, accounting_name="管理費会計")
+        self.default = Himoku.objects.create(code=999, himoku_name="不明", accounting_class=self.ac)
+        self.fee = Himoku.objects.create(code=1, himoku_name="銀行手数料", accounting_class=self.ac)
+        self.denki = Himoku.objects.create(code=2, himoku_name="電気料金", accounting_class=self.ac)
+        self.itaku = Himoku.objects.create(code=3, himoku_name="委託費", accounting_class=self.ac)
+        TransferRequester.objects.create(requester="ｶﾝﾘｶｲｼﾔ", himoku=self.itaku)
+        category = PaymentCategory.objects.create(payment_name="口座振替")
+        PaymentMethod.objects.create(
+            payment_category=category, himoku_name=self.denki, account_description="デンキ "
+        )
+
+    def test_rule_priority(self):
+        classifier = get_expense_classifier(self.default, self.fee)
+        # NFKC正規化したキーで照合する
+        self.assertEqual(classifier.classify("カンリカイシヤ", "デンキ"), (self.itaku, RULE_REQUESTER))
+        self.assertEqual(classifier.classify("", "デンキ"), (self.denki, RULE_DESCRIPTION))
+        himoku, rule = classifier.classify("", "ﾌﾘｺﾐﾃｽｳﾘﾖｳ")
+        self.assertEqual(himoku, self.fee)
+        self.assertTrue(rule.startswith(RULE_KEYWORD))
+        self.assertEqual(classifier.classify("", "その他"), (self.default, RULE_DEFAULT))
+
+    def test_cache_cleared_on_rule_change(self):
+        # インデックスはcommon.cacheのマスタのバージョンで管理する（他のプロセスの変更も検出する）
+        with self.assertNumQueries(2):
+            get_expense_classifier(self.default, self.fee)
+        with self.assertNumQueries(0):
+            get_expense_classifier(self.default, self.fee)
+        TransferRequester.objects.create(requester="デンキ", himoku=self.denki)
+        classifier = get_expense_classifier(self.default, self.fee)
+        self.assertEqual(classifier.classify("デンキ", ""), (self.denki, RULE_REQUESTER))
+
+        # シグナルを受け取らない別のプロセスでの変更（共有キャッシュのバージョンの更新）も検出する
+        get_expense_classifier(self.default, self.fee)
+        PaymentMethod.objects.filter(himoku_name=self.denki).update(account_description="スイドウ")
+        bump_version("payment.paymentmethod")
+        classifier = get_expense_classifier(self.default, self.fee)
+        self.assertEqual(classifier.classify("", "スイドウ"), (self.denki, RULE_DESCRIPTION))
+
+    def test_keyword_automaton(self):
+        automaton = KeywordAutomaton(["he", "she", "his", "hers"])
+        self.assertEqual(automaton.search("ushers"), "she")
+        self.assertEqual(automaton.search("ahis"), "his")
+        self.assertIsNone(automaton.search("xyz"))
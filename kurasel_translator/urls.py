@@ -4,6 +4,7 @@ from .views import (
     balans_sheet_transform,
     billing_transform,
     claim_transform,
+    import_job_views,
     monthly_report_transform,
     payment_approval_transform,
     transaction_transform,
@@ -23,4 +24,13 @@ urlpatterns = [
     path("create_bs/", balans_sheet_transform.BalanceSheetTransformView.as_view(), name="create_bs"),
     path("create_claim/", claim_transform.ClaimTransformView.as_view(), name="create_claim"),
     path("create_billing/", billing_transform.BillingTransformView.as_view(), name="create_billing"),
+    path("jobs/", import_job_views.ImportJobListView.as_view(), name="import_job_list"),
+    path("jobs/<int:pk>/", import_job_views.ImportJobDetailView.as_view(), name="import_job"),
+    path("jobs/<int:pk>/status/", import_job_views.ImportJobStatusView.as_view(), name="import_job_status"),
+    path("batches/", import_job_views.ImportBatchListView.as_view(), name="import_batch_list"),
+    path(
+        "batches/<int:pk>/rollback/",
+        import_job_views.ImportBatchRollbackView.as_view(),
+        name="import_batch_rollback",
+    ),
 ]
@@ -3,13 +3,13 @@ import logging
 from django.contrib import messages
 from django.contrib.auth.mixins import PermissionRequiredMixin
 from django.shortcuts import redirect
-from django.urls import reverse
 from django.utils import timezone
-from django.utils.http import urlencode
 from django.utils.timezone import localtime
 from django.views.generic.edit import FormView
 from kurasel_translator.forms import BalanceSheetTranslateForm
+from kurasel_translator.models import ImportJob
 from kurasel_translator.services.balans_sheet_service import execute_bs_import
+from kurasel_translator.services.job_service import enqueue_import
 
 logger = logging.getLogger(__name__)
 
@@ -33,29 +33,13 @@ class BalanceSheetTransformView(PermissionRequiredMixin, FormView):
         }
 
     def form_valid(self, form):
-        # Serviceの実行
-        success, result_ctx, errors = execute_bs_import(self.request.user, form.cleaned_data)
-        context = self.get_context_data(form=form, **result_ctx)
-
-        if not success:
-            for msg in errors:
-                messages.error(self.request, msg)
-            return self.render_to_response(context)
-
-        if "確認" in result_ctx["mode"]:
-            # 会計区分の警告などはService側で判定済みだが、必要に応じてここで追加メッセージも可能
-            return self.render_to_response(context)
-
-        # 登録成功時
-        messages.success(
-            self.request,
-            f"{result_ctx['year']}年{result_ctx['month']}月度の「{result_ctx['ac_class']}」貸借対照表を取り込みました。",
-        )
-        # GETパラメータを付与してリダイレクト
-        params = urlencode(
-            {
-                "year": result_ctx["year"],
-                "month": result_ctx["month"],
-            }
-        )
-        return redirect(f"{reverse('kurasel_translator:create_bs')}?{params}")
+        # 登録はバックグラウンドのジョブで実行し、ジョブの画面へ移動する
+        if "確認" not in form.cleaned_data["mode"]:
+            job = enqueue_import(ImportJob.KIND_BS, self.request.user, form.cleaned_data)
+            return redirect("kurasel_translator:import_job", pk=job.pk)
+
+        # 確認モード: Serviceの実行
+        _, result_ctx, errors = execute_bs_import(self.request.user, form.cleaned_data)
+        for msg in errors:
+            messages.error(self.request, msg)
+        return self.render_to_response(self.get_context_data(form=form, **result_ctx))
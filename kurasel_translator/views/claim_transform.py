@@ -3,13 +3,13 @@ import logging
 from django.contrib import messages
 from django.contrib.auth.mixins import PermissionRequiredMixin
 from django.shortcuts import redirect
-from django.urls import reverse
 from django.utils import timezone
-from django.utils.http import urlencode
 from django.utils.timezone import localtime
 from django.views.generic.edit import FormView
 from kurasel_translator.forms import ClaimTranslateForm
+from kurasel_translator.models import ImportJob
 from kurasel_translator.services.claim_service import execute_claim_import
+from kurasel_translator.services.job_service import enqueue_import
 
 logger = logging.getLogger(__name__)
 
@@ -27,25 +27,13 @@ class ClaimTransformView(PermissionRequiredMixin, FormView):
         }
 
     def form_valid(self, form):
-        # Serviceの実行
-        success, result_ctx, errors = execute_claim_import(self.request.user, form.cleaned_data)
-
-        if not success:
-            for msg in errors:
-                messages.error(self.request, msg)
-            return self.render_to_response(self.get_context_data(form=form, **result_ctx))
-
-        if "確認" in result_ctx["mode"]:
-            return self.render_to_response(self.get_context_data(form=form, **result_ctx))
-
-        # 登録成功時
-        msg = f"{result_ctx['year']}年{result_ctx['month']}月度の{result_ctx['claim_type']} のデータ取り込みが完了しました。"
-        messages.success(self.request, msg)
-        # GETパラメータを付与してリダイレクト
-        params = urlencode(
-            {
-                "year": result_ctx["year"],
-                "month": result_ctx["month"],
-            }
-        )
-        return redirect(f"{reverse('kurasel_translator:create_claim')}?{params}")
+        # 登録はバックグラウンドのジョブで実行し、ジョブの画面へ移動する
+        if "確認" not in form.cleaned_data["mode"]:
+            job = enqueue_import(ImportJob.KIND_CLAIM, self.request.user, form.cleaned_data)
+            return redirect("kurasel_translator:import_job", pk=job.pk)
+
+        # 確認モード: Serviceの実行
+        _, result_ctx, errors = execute_claim_import(self.request.user, form.cleaned_data)
+        for msg in errors:
+            messages.error(self.request, msg)
+        return self.render_to_response(self.get_context_data(form=form, **result_ctx))
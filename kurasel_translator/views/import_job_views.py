@@ -0,0 +1,116 @@
+from control.models import FiscalLock
+from django.contrib import messages
+from django.contrib.auth.mixins import PermissionRequiredMixin
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404, redirect
+from django.urls import reverse
+from django.views import View
+from django.views.generic import DetailView, ListView
+from kurasel_translator.models import ImportBatch, ImportJob
+from kurasel_translator.services.job_service import IMPORTERS, resubmit_jobs
+
+
+class ImportJobListView(PermissionRequiredMixin, ListView):
+    """取り込みジョブの一覧（新しい順）"""
+
+    template_name = "kurasel_translator/import_job_list.html"
+    permission_required = "record.add_transaction"
+    paginate_by = 50
+
+    def get_queryset(self):
+        return ImportJob.objects.select_related("author").defer("params").order_by("-created_date", "-pk")
+
+
+class ImportJobDetailView(PermissionRequiredMixin, DetailView):
+    """取り込みジョブの結果画面
+    - 待機中・実行中の間は、状態のエンドポイントをポーリングして進捗を表示する。
+    """
+
+    template_name = "kurasel_translator/import_job_detail.html"
+    permission_required = "record.add_transaction"
+    model = ImportJob
+
+    def get_queryset(self):
+        return ImportJob.objects.select_related("author").defer("params")
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["form_url"] = reverse(IMPORTERS[self.object.kind].form_url)
+        return context
+
+
+class ImportJobStatusView(PermissionRequiredMixin, View):
+    """取り込みジョブの状態・進捗（JSON）
+    - 終了していないジョブは、再起動などで取り残されていないか確認する（resubmit_jobs()）。
+    """
+
+    permission_required = "record.add_transaction"
+
+    def get(self, request, pk):
+        job = get_object_or_404(ImportJob.objects.only("status", "progress"), pk=pk)
+        if not job.is_finished:
+            resubmit_jobs()
+            job.refresh_from_db(fields=["status", "progress"])
+        return JsonResponse(
+            {
+                "status": job.status,
+                "status_label": job.get_status_display(),
+                "progress": job.progress,
+                "finished": job.is_finished,
+            }
+        )
+
+
+class ImportBatchListView(PermissionRequiredMixin, ListView):
+    """取り込みバッチ（登録の履歴）の一覧（新しい順）"""
+
+    template_name = "kurasel_translator/import_batch_list.html"
+    permission_required = "record.delete_transaction"
+    paginate_by = 50
+
+    def get_queryset(self):
+        return ImportBatch.objects.select_related("author").order_by("-created_date", "-pk")
+
+
+class ImportBatchRollbackView(PermissionRequiredMixin, View):
+    """取り込みバッチの取り消し（バッチで登録・更新したデータを削除する）
+    - 取り消し済みのバッチ、締め済みの月を含むバッチは取り消せない（期間の全ての月を確認する）。
+    - 前の取り込み（取り消していないもの）のデータを更新・置き換えたバッチは、前の値に戻せないため取り消せない。
+    - 取り込み後に手入力（相殺・分割など）・変更したデータがある入出金明細のバッチは、
+      取り消すと残高・集計が合わなくなる、または変更が失われるため取り消せない（該当データを表示する）。
+    """
+
+    permission_required = "record.delete_transaction"
+
+    def post(self, request, pk):
+        batch = get_object_or_404(ImportBatch, pk=pk)
+        blocking = [str(b.pk) for b in batch.get_blocking_batches()]
+        conflicts = batch.get_rollback_conflicts()
+        if batch.rolled_back_date:
+            messages.error(request, f"取り込み番号 {batch.pk} は取り消し済みです。")
+        elif any(FiscalLock.is_period_frozen(year, month) for year, month in batch.months()):
+            messages.error(request, f"取り込み番号 {batch.pk} の期間は既に締められているため取り消せません。")
+        elif blocking:
+            messages.error(
+                request,
+                f"取り込み番号 {batch.pk} は前の取り込み（取り込み番号: {'・'.join(blocking)}）のデータを"
+                "更新・置き換えているため取り消せません。元の内容を取り込み直してください。",
+            )
+        elif conflicts:
+            messages.error(
+                request,
+                f"取り込み番号 {batch.pk} の取り込み後に手入力・変更したデータが {len(conflicts)} 件あるため"
+                "取り消せません。該当データを削除・元に戻してから取り消してください。",
+            )
+            for tx in conflicts:
+                kind = "手入力" if tx.is_manualinput else "変更"
+                messages.error(
+                    request,
+                    f"{kind}: {tx.transaction_date:%Y-%m-%d} {tx.amount:,}円 {tx.himoku or ''} {tx.description}",
+                )
+        else:
+            count = batch.rollback()
+            messages.success(
+                request, f"取り込み番号 {batch.pk}（{batch}）を取り消し、{count} 件削除しました。"
+            )
+        return redirect("kurasel_translator:import_batch_list")
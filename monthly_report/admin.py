@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import BalanceSheet, BalanceSheetItem, ReportTransaction
+from .models import BalanceSheet, BalanceSheetItem, MonthlySummary, ReportTransaction
 
 
 class ReportTransactionAdmin(admin.ModelAdmin):
@@ -18,6 +18,19 @@ class ReportTransactionAdmin(admin.ModelAdmin):
     ordering = ("transaction_date",)
 
 
+class MonthlySummaryAdmin(admin.ModelAdmin):
+    list_display = [
+        "year",
+        "month",
+        "accounting_class",
+        "himoku",
+        "amount",
+        "netting_amount",
+        "row_count",
+    ]
+    ordering = ("year", "month")
+
+
 class BalanceSheetItemAdmin(admin.ModelAdmin):
     list_display = [
         "code",
@@ -37,5 +50,6 @@ class BalanceSheetAdmin(admin.ModelAdmin):
 
 
 admin.site.register(ReportTransaction, ReportTransactionAdmin)
+admin.site.register(MonthlySummary, MonthlySummaryAdmin)
 admin.site.register(BalanceSheetItem, BalanceSheetItemAdmin)
 admin.site.register(BalanceSheet, BalanceSheetAdmin)
@@ -0,0 +1,28 @@
+from common.cache import require_shared_cache
+from django.core.management.base import BaseCommand
+
+from monthly_report.models import MonthlySummary
+
+
+class Command(BaseCommand):
+    """月次収支の集計テーブル(MonthlySummary)を作り直す
+    - 引数なしの場合は全期間を作り直す。
+    - --year/--monthを指定した場合はその年月（monthを省略すると1年分）だけを作り直す。
+    """
+
+    help = "月次収支の集計テーブルを月次収支データから作り直す"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--year", type=int, help="作り直す年")
+        parser.add_argument("--month", type=int, help="作り直す月（--yearと一緒に指定する）")
+
+    def handle(self, *args, **options):
+        require_shared_cache()
+        year = options["year"]
+        month = options["month"]
+        if year is None:
+            count = MonthlySummary.rebuild()
+        else:
+            months = [month] if month else range(1, 13)
+            count = sum(MonthlySummary.refresh(year, m) for m in months)
+        self.stdout.write(self.style.SUCCESS(f"集計データを {count} 件作成しました。"))
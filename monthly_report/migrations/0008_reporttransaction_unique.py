@@ -0,0 +1,43 @@
+# Generated by Django 5.2.11 on 2026-10-18 18:03
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_duplicates(apps, schema_editor):
+    """ユニーク制約を追加する前に、(取引月, 費目, 会計区分)の重複データが無いことを確認する
+    - 重複データがある場合はデータを削除せずにエラーとする。管理画面で整理してから再実行する。
+    """
+    ReportTransaction = apps.get_model("monthly_report", "ReportTransaction")
+    duplicates = (
+        ReportTransaction.objects.filter(himoku__isnull=False, accounting_class__isnull=False)
+        .values("transaction_date", "himoku", "accounting_class")
+        .annotate(cnt=Count("id"))
+        .filter(cnt__gt=1)
+    )
+    if duplicates.exists():
+        rows = ", ".join(
+            f"{d['transaction_date']}/費目id={d['himoku']}/会計区分id={d['accounting_class']}"
+            for d in duplicates
+        )
+        raise RuntimeError(f"月次収支データに重複があります。整理してから再実行してください: {rows}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("monthly_report", "0007_rename_ammount_reporttransaction_amount"),
+        ("record", "0018_himoku_is_unbilled_income"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="reporttransaction",
+            constraint=models.UniqueConstraint(
+                fields=("transaction_date", "himoku", "accounting_class"),
+                name="reporttransaction_unique",
+            ),
+        ),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 5.2.11 on 2026-10-18 18:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce, ExtractMonth, ExtractYear
+
+
+def build_summary(apps, schema_editor):
+    """既存の月次収支データから集計テーブルを作成する（MonthlySummary.rebuild()と同じ処理）"""
+    ReportTransaction = apps.get_model("monthly_report", "ReportTransaction")
+    MonthlySummary = apps.get_model("monthly_report", "MonthlySummary")
+    grouped = (
+        ReportTransaction.objects.filter(delete_flg=False, himoku__isnull=False)
+        .exclude(amount=0)
+        .annotate(sum_year=ExtractYear("transaction_date"), sum_month=ExtractMonth("transaction_date"))
+        .order_by()
+        .values("sum_year", "sum_month", "accounting_class", "himoku", "himoku__is_income")
+        .annotate(
+            sum_amount=Sum("amount"),
+            sum_calc=Coalesce(Sum("amount", filter=Q(calc_flg=True)), 0),
+            sum_netting=Coalesce(Sum("amount", filter=Q(is_netting=True)), 0),
+            sum_miharai=Coalesce(Sum("amount", filter=Q(is_miharai=True)), 0),
+            cnt=Count("id"),
+        )
+    )
+    MonthlySummary.objects.bulk_create(
+        [
+            MonthlySummary(
+                year=item["sum_year"],
+                month=item["sum_month"],
+                accounting_class_id=item["accounting_class"],
+                himoku_id=item["himoku"],
+                is_income=item["himoku__is_income"],
+                amount=item["sum_amount"],
+                calc_amount=item["sum_calc"],
+                netting_amount=item["sum_netting"],
+                miharai_amount=item["sum_miharai"],
+                row_count=item["cnt"],
+            )
+            for item in grouped
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("monthly_report", "0008_reporttransaction_unique"),
+        ("record", "0018_himoku_is_unbilled_income"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MonthlySummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("year", models.IntegerField(verbose_name="年")),
+                ("month", models.IntegerField(verbose_name="月")),
+                ("is_income", models.BooleanField(default=False, verbose_name="収入")),
+                ("amount", models.IntegerField(default=0, verbose_name="合計金額")),
+                ("calc_amount", models.IntegerField(default=0, verbose_name="計算対象金額")),
+                ("netting_amount", models.IntegerField(default=0, verbose_name="相殺金額")),
+                ("miharai_amount", models.IntegerField(default=0, verbose_name="未払金額")),
+                ("row_count", models.IntegerField(default=0, verbose_name="件数")),
+                (
+                    "accounting_class",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="record.accountingclass",
+                        verbose_name="会計区分",
+                    ),
+                ),
+                (
+                    "himoku",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="record.himoku", verbose_name="費目名"
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("year", "month", "accounting_class", "himoku", "is_income"),
+                        name="monthly_summary_unique",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(build_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.11 on 2026-10-18 18:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("monthly_report", "0009_monthlysummary"),
+        ("record", "0019_transaction_claimdata_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="balancesheet",
+            index=models.Index(fields=["monthly_date", "item_name"], name="balancesheet_date_item_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="reporttransaction",
+            index=models.Index(
+                condition=models.Q(("delete_flg", False)),
+                fields=["transaction_date", "himoku"],
+                name="reporttransaction_alive_idx",
+            ),
+        ),
+    ]
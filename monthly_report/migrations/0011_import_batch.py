@@ -0,0 +1,25 @@
+# Generated by Django 5.2.11 on 2026-10-18 18:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kurasel_translator', '0002_import_batch'),
+        ('monthly_report', '0010_ledger_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='balancesheet',
+            name='import_batch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='kurasel_translator.importbatch', verbose_name='取り込みバッチ'),
+        ),
+        migrations.AddField(
+            model_name='reporttransaction',
+            name='import_batch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='kurasel_translator.importbatch', verbose_name='取り込みバッチ'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.11 on 2026-10-18 19:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("kurasel_translator", "0002_import_batch"),
+        ("monthly_report", "0011_import_batch"),
+        ("record", "0022_account_balance"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterConstraint(
+            model_name="reporttransaction",
+            name="reporttransaction_unique",
+            constraint=models.UniqueConstraint(
+                fields=("transaction_date", "himoku", "accounting_class"),
+                name="reporttransaction_unique",
+                violation_error_message="同じ取引月・費目・会計区分のデータが既にあります。",
+            ),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.11 on 2026-10-18 19:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("monthly_report", "0012_reporttransaction_unique_message"),
+        ("record", "0022_account_balance"),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="monthlysummary",
+            name="monthly_summary_unique",
+        ),
+        migrations.RemoveField(
+            model_name="monthlysummary",
+            name="is_income",
+        ),
+        migrations.AddConstraint(
+            model_name="monthlysummary",
+            constraint=models.UniqueConstraint(
+                fields=("year", "month", "accounting_class", "himoku"), name="monthly_summary_unique"
+            ),
+        ),
+    ]
@@ -1,17 +1,43 @@
 import calendar
 import datetime
 import logging
+import threading
 
+from common.ledger_version import bump_dates, bump_period
+from common.period import Period
+from common.querysets import PeriodQuerySet, TotalsQuerySet
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import models
-from django.db.models import Q, Sum
+from django.db import transaction as db_transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce, ExtractMonth, ExtractYear
+from django.dispatch import receiver
 from django.utils import timezone
 from record.models import Account, AccountingClass, Himoku
 
 user = get_user_model()
 logger = logging.getLogger(__name__)
 
+# コミット後に集計データを作り直す年月（MonthlySummary.refresh_on_commit）
+_summary_pending = threading.local()
+
+# 月次収支データの(取引月, 費目, 会計区分)が重複する場合のエラーメッセージ
+DUPLICATE_REPORT_MESSAGE = "同じ取引月・費目・会計区分のデータが既にあります。"
+
+
+class ReportTransactionQuerySet(PeriodQuerySet, TotalsQuerySet):
+    """月次収支データのQuerySet
+    - total: 合計。calc_total: calc_flgがONの合計。netting: 相殺処理(is_netting)の合計。
+    """
+
+    totals_spec = {
+        "total": {},
+        "calc_total": {"calc_flg": True},
+        "netting": {"is_netting": True},
+    }
+    period_field = "transaction_date"
+
 
 class ReportTransaction(models.Model):
     """月次収支データモデル"""
@@ -35,6 +61,39 @@ class ReportTransaction(models.Model):
     is_netting = models.BooleanField(verbose_name="相殺処理", default=False)
     is_miharai = models.BooleanField(verbose_name="未払い", default=False)
     is_manualinput = models.BooleanField(default=False)
+    # Kuraselからの取り込みで登録・更新したバッチ（取り込みの取り消しに使う）
+    import_batch = models.ForeignKey(
+        "kurasel_translator.ImportBatch",
+        verbose_name="取り込みバッチ",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+
+    objects = ReportTransactionQuerySet.as_manager()
+
+    class Meta:
+        """ユニーク制約・インデックス
+        - Kuraselからの取り込みは(取引月, 費目, 会計区分)でupsertするため、ユニークとする。
+          手入力・編集画面のフォームでも検証し、重複する場合はフォームのエラーとする。
+        - get_monthly_report_queryset()は削除フラグOFFのデータだけを期間で抽出するので部分インデックスとする。
+        """
+
+        constraints = [
+            models.UniqueConstraint(
+                fields=["transaction_date", "himoku", "accounting_class"],
+                name="reporttransaction_unique",
+                violation_error_message=DUPLICATE_REPORT_MESSAGE,
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["transaction_date", "himoku"],
+                condition=models.Q(delete_flg=False),
+                name="reporttransaction_alive_idx",
+            ),
+        ]
 
     def __str__(self):
         if self.himoku is None:
@@ -50,14 +109,12 @@ class ReportTransaction(models.Model):
         - is_income: 収入・支出フラグ (bool: True=収入、False=支出)
         - return: 削除件数
         """
-        deleted_count, _ = cls.objects.filter(
-            transaction_date__year=year,
-            transaction_date__month=month,
-            accounting_class=ac_class,
-            himoku__is_income=is_income,
-            amount__gt=0,
-        ).delete()
-
+        deleted_count, _ = (
+            cls.objects.in_period(Period.of(year, month))
+            .filter(accounting_class=ac_class, himoku__is_income=is_income, amount__gt=0)
+            .delete()
+        )
+        # 集計データは削除のシグナルでコミット後に更新する
         return deleted_count
 
     # def delete(self):
@@ -67,65 +124,86 @@ class ReportTransaction(models.Model):
     #     self.delete_flg = True
     #     self.save()
 
-    @staticmethod
-    def total_calc_flg(sql):
-        """ReportTransactionクラスの合計計算"""
-        total_withdrawals = 0
-        for row in sql:
-            total_withdrawals += row.amount
-
-        return total_withdrawals
-
     @classmethod
     def monthly_from_kurasel(cls, ac_class, data):
         """月次収支データの保存処理を行う
         - 会計区分を指定して取り込む。
+        - 費目・会計区分・口座はそれぞれ1回のクエリでまとめて取得する。
+        - (取引月, 費目, 会計区分)のユニーク制約で、1回のbulk_create(upsert)で登録・更新する。
+          登録済みで変更の無い行は含めない（取り込みバッチを付け替えないため）。
+        - data["data_list"]は月次収支のレコード（kurasel_translatorのMonthlyRecord）のリスト。
+        - data["import_batch"]: 登録・更新するデータに設定する取り込みバッチ（省略可）。
         """
         # 取引月
         date_str = str(data["year"]) + "-" + str(data["month"]) + "-" + "01"
-        ymd = datetime.datetime.strptime(date_str, "%Y-%m-%d")
+        ymd = datetime.datetime.strptime(date_str, "%Y-%m-%d").date()
         # 記録者
         author_obj = user.objects.get(id=data["author"])
-        # error flag
-        error_list = []
-        rtn = True
+        # Kuraselの費目名と一致する費目オブジェクトをまとめて得る
+        himoku_dict = Himoku.get_himoku_dict([item.himoku_name for item in data["data_list"]], ac_class)
         for item in data["data_list"]:
-            # Kuraselの費目名と一致する費目オブジェクトを得る
-            himoku_id = Himoku.get_himoku_obj(item[0], ac_class)
-            if himoku_id is None:
+            if himoku_dict.get(item.himoku_name) is None:
                 return False, [
-                    "費目名「" + item[0] + "」が費目リストに登録されていません。",
+                    "費目名「" + item.himoku_name + "」が費目リストに登録されていません。",
                 ]
-            try:
-                ac_class_obj = AccountingClass.get_accountingclass_obj(ac_class)
-                cls.objects.update_or_create(
+        try:
+            ac_class_obj = AccountingClass.get_accountingclass_obj(ac_class)
+            # 口座は1つだけなので、first()で取得できる。
+            account_obj = Account.objects.all().first()
+            existing = {
+                himoku_id: (account_id, amount, calc_flg)
+                for himoku_id, account_id, amount, calc_flg in cls.objects.filter(
+                    transaction_date=ymd, accounting_class=ac_class_obj
+                ).values_list("himoku_id", "account_id", "amount", "calc_flg")
+            }
+            objs = {}
+            for item in data["data_list"]:
+                himoku_obj = himoku_dict[item.himoku_name]
+                # 同じ費目が複数行ある場合は、update_or_createと同様に後の行を優先する
+                objs[himoku_obj.pk] = cls(
                     transaction_date=ymd,
-                    himoku=himoku_id,
+                    himoku=himoku_obj,
                     accounting_class=ac_class_obj,
-                    defaults={
-                        # 口座は1つだけなので、first()で取得できる。
-                        "account": Account.objects.all().first(),
-                        "amount": int(item[2]),
-                        "calc_flg": True,
-                        "author": author_obj,
-                    },
+                    account=account_obj,
+                    amount=item.amount,
+                    calc_flg=True,
+                    author=author_obj,
+                    import_batch=data.get("import_batch"),
                 )
-            except Exception as e:
-                logger.error(e)
-                error_list.append(item[0])
-                rtn = False
-        return rtn, error_list
+            changed = [
+                obj
+                for pk, obj in objs.items()
+                if existing.get(pk) != (obj.account_id, obj.amount, obj.calc_flg)
+            ]
+            with db_transaction.atomic():
+                cls.objects.bulk_create(
+                    changed,
+                    update_conflicts=True,
+                    unique_fields=["transaction_date", "himoku", "accounting_class"],
+                    update_fields=["account", "amount", "calc_flg", "author", "import_batch"],
+                )
+            bump_dates(ymd)
+        except Exception as e:
+            logger.error(e)
+            return False, [str(e)]
+        return True, []
+
+    @classmethod
+    def get_kurasel_amounts(cls, ac_class, year, month):
+        """取引月・会計区分の登録済みデータの{費目名: 金額}を返す（確認モードの差分表示用）"""
+        ymd = datetime.date(int(year), int(month), 1)
+        qs = cls.objects.filter(transaction_date=ymd, accounting_class__accounting_name=str(ac_class))
+        return dict(qs.values_list("himoku__himoku_name", "amount"))
 
     @classmethod
     def set_offset_flag(cls, himoku, tstart, tend):
-        """設定された費目名のレコードにis_nettingをセットする"""
-        # 指定された年月の月次収支データで処理を行う。
-        qs = cls.objects.filter(transaction_date__range=[tstart, tend])
-        for data in qs:
-            if data.himoku and data.himoku.himoku_name == himoku:
-                update_obj = cls.objects.get(pk=data.pk)
-                update_obj.is_netting = True
-                update_obj.save()
+        """設定された費目名のレコードにis_nettingをセットする
+        - 指定された期間の月次収支データを1回のUPDATEで処理する。
+        """
+        cls.objects.in_period(Period.between(tstart, tend)).filter(himoku__himoku_name=himoku).update(
+            is_netting=True
+        )
+        bump_period(tstart, tend)
         return True
 
     @classmethod
@@ -133,7 +211,7 @@ class ReportTransaction(models.Model):
         """未払金リストを返す"""
         qs = (
             cls.objects.all()
-            .filter(transaction_date__range=[start, end])
+            .in_period(Period.between(start, end))
             .filter(is_miharai=True)
             .order_by("-transaction_date", "accounting_class")
         )
@@ -147,7 +225,7 @@ class ReportTransaction(models.Model):
         """
         qs = (
             cls.objects.all()
-            .filter(transaction_date__range=[start, end])
+            .in_period(Period.between(start, end))
             .filter(Q(calc_flg=False) | Q(himoku__aggregate_flag=False))
             .filter(amount__gt=0)
             .order_by("accounting_class", "himoku", "transaction_date")
@@ -166,7 +244,7 @@ class ReportTransaction(models.Model):
             cls.objects.select_related("himoku").values("himoku__himoku_name").annotate(price=Sum("amount"))
         )
         # (1) 期間でfiler
-        qs_year_income = qs_year_income.filter(transaction_date__range=[tstart, tend])
+        qs_year_income = qs_year_income.in_period(Period.between(tstart, tend))
         # (2) 削除フラグをチェック
         qs_year_income = qs_year_income.filter(delete_flg=False)
         # (3) 収入でfilter
@@ -193,7 +271,7 @@ class ReportTransaction(models.Model):
             .annotate(price=Sum("amount"))
         )
         # (1) 期間でfiler
-        qs_year_expense = qs_year_expense.filter(transaction_date__range=[tstart, tend])
+        qs_year_expense = qs_year_expense.in_period(Period.between(tstart, tend))
         # (2) 収入でfilter
         qs_year_expense = qs_year_expense.filter(himoku__is_income=False)
         # (3) 有効で支出のある費目でfilter
@@ -204,6 +282,135 @@ class ReportTransaction(models.Model):
         return qs_year_expense.order_by("himoku")
 
 
+class MonthlySummary(models.Model):
+    """月次収支データ(ReportTransaction)の月別・会計区分別・費目別の集計テーブル
+    - 年間表示やチェック画面は、月次収支データを毎回集計せずにこのテーブルを読む。
+    - 削除フラグがOFFのデータだけを集計する。費目が未設定のデータ、金額0のデータは含めない。
+    - amount: 合計金額、calc_amount: 計算対象(calc_flg)の合計、
+      netting_amount: 相殺処理(is_netting)の合計、miharai_amount: 未払い(is_miharai)の合計。
+    - 収入・支出(is_income)、集計フラグ(aggregate_flag)、有効フラグは費目マスタの値を読み出し時に
+      himoku経由でfilterする（費目マスタの変更で集計データを作り直す必要はない）。
+    - 月次収支データの保存・削除（管理画面を含む）では、シグナルでコミット後にその年月を作り直す。
+      シグナルを送らない一括処理（bulk_create・update）では、処理した箇所でrefresh()を呼び出す。
+      全件の再作成は「python manage.py rebuild_monthly_summary」で行う。
+    """
+
+    year = models.IntegerField(verbose_name="年")
+    month = models.IntegerField(verbose_name="月")
+    accounting_class = models.ForeignKey(
+        AccountingClass,
+        verbose_name="会計区分",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+    )
+    himoku = models.ForeignKey(Himoku, verbose_name="費目名", on_delete=models.CASCADE)
+    amount = models.IntegerField(verbose_name="合計金額", default=0)
+    calc_amount = models.IntegerField(verbose_name="計算対象金額", default=0)
+    netting_amount = models.IntegerField(verbose_name="相殺金額", default=0)
+    miharai_amount = models.IntegerField(verbose_name="未払金額", default=0)
+    row_count = models.IntegerField(verbose_name="件数", default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["year", "month", "accounting_class", "himoku"],
+                name="monthly_summary_unique",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.year}-{self.month} {self.himoku.himoku_name}"
+
+    @staticmethod
+    def _grouped(qs, *keys):
+        """月次収支データのquerysetをkeysと費目で集計したvaluesを返す"""
+        return (
+            qs.filter(delete_flg=False, himoku__isnull=False)
+            .exclude(amount=0)
+            .order_by()
+            .values(*keys, "accounting_class", "himoku")
+            .annotate(
+                sum_amount=Sum("amount"),
+                sum_calc=Coalesce(Sum("amount", filter=Q(calc_flg=True)), 0),
+                sum_netting=Coalesce(Sum("amount", filter=Q(is_netting=True)), 0),
+                sum_miharai=Coalesce(Sum("amount", filter=Q(is_miharai=True)), 0),
+                cnt=Count("id"),
+            )
+        )
+
+    @classmethod
+    def _build(cls, year, month, item):
+        return cls(
+            year=year,
+            month=month,
+            accounting_class_id=item["accounting_class"],
+            himoku_id=item["himoku"],
+            amount=item["sum_amount"],
+            calc_amount=item["sum_calc"],
+            netting_amount=item["sum_netting"],
+            miharai_amount=item["sum_miharai"],
+            row_count=item["cnt"],
+        )
+
+    @classmethod
+    def refresh(cls, year, month):
+        """指定された年月の集計データを月次収支データから作り直す"""
+        year = int(year)
+        month = int(month)
+        qs = ReportTransaction.objects.in_period(Period.of(year, month))
+        objs = [cls._build(year, month, item) for item in cls._grouped(qs)]
+        with db_transaction.atomic():
+            cls.objects.filter(year=year, month=month).delete()
+            cls.objects.bulk_create(objs)
+        return len(objs)
+
+    @classmethod
+    def refresh_dates(cls, *dates):
+        """日付（複数可）を含む年月の集計データを作り直す"""
+        for year, month in {(d.year, d.month) for d in dates if d}:
+            cls.refresh(year, month)
+
+    @classmethod
+    def refresh_on_commit(cls, *dates):
+        """日付（複数可）を含む年月の集計データを、コミット後に作り直す
+        - 同じトランザクション内の変更（QuerySet.delete()の各行のシグナルなど）は、年月毎に1回だけ作り直す。
+        """
+        pending = getattr(_summary_pending, "months", None)
+        if pending is None:
+            pending = _summary_pending.months = set()
+        pending.update((d.year, d.month) for d in dates if d)
+
+        def _refresh():
+            months, _summary_pending.months = _summary_pending.months or set(), set()
+            for year, month in sorted(months):
+                cls.refresh(year, month)
+
+        db_transaction.on_commit(_refresh)
+
+    @classmethod
+    def rebuild(cls):
+        """全期間の集計データを作り直す"""
+        qs = ReportTransaction.objects.annotate(
+            sum_year=ExtractYear("transaction_date"), sum_month=ExtractMonth("transaction_date")
+        )
+        objs = [
+            cls._build(item["sum_year"], item["sum_month"], item)
+            for item in cls._grouped(qs, "sum_year", "sum_month")
+        ]
+        with db_transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(objs, batch_size=1000)
+        return len(objs)
+
+    @classmethod
+    def filter_period(cls, tstart, tend):
+        """select_period()の期間（月単位）に含まれる集計データのquerysetを返す"""
+        after_start = Q(year__gt=tstart.year) | Q(year=tstart.year, month__gte=tstart.month)
+        before_end = Q(year__lt=tend.year) | Q(year=tend.year, month__lte=tend.month)
+        return cls.objects.filter(after_start & before_end)
+
+
 class BalanceSheetItem(models.Model):
     """貸借対照表の項目
     - 管理会計 未収金/前受金/前払金/未払金
@@ -227,6 +434,13 @@ class BalanceSheetItem(models.Model):
         return self.item_name
 
 
+class BalanceSheetQuerySet(PeriodQuerySet, TotalsQuerySet):
+    """貸借対照表データのQuerySet"""
+
+    amount_field = "amounts"
+    period_field = "monthly_date"
+
+
 class BalanceSheet(models.Model):
     """貸借対照表(Kurasel)の未収金、前受金保存モデル"""
 
@@ -234,6 +448,26 @@ class BalanceSheet(models.Model):
     amounts = models.IntegerField(verbose_name="金額", default=0)
     item_name = models.ForeignKey(BalanceSheetItem, on_delete=models.CASCADE, null=True, blank=True)
     comment = models.CharField(verbose_name="備考", max_length=64, null=True, blank=True)
+    # Kuraselからの取り込みで登録・更新したバッチ（取り込みの取り消しに使う）
+    import_batch = models.ForeignKey(
+        "kurasel_translator.ImportBatch",
+        verbose_name="取り込みバッチ",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+
+    objects = BalanceSheetQuerySet.as_manager()
+
+    class Meta:
+        """インデックス
+        - get_bs()の月度の期間と項目での抽出用。
+        """
+
+        indexes = [
+            models.Index(fields=["monthly_date", "item_name"], name="balancesheet_date_item_idx"),
+        ]
 
     def __int__(self):
         return self.amounts
@@ -243,6 +477,14 @@ class BalanceSheet(models.Model):
             return ""
         return self.item_name.item_name
 
+    @classmethod
+    def by_yearmonth(cls, year, month, ac_class):
+        """指定された年月（月度）・会計区分のデータのquerysetを返す（ac_classがNoneの場合は全会計区分）"""
+        qs = cls.objects.in_period(Period.of(year, month))
+        if ac_class:
+            qs = qs.filter(item_name__ac_class=ac_class)
+        return qs
+
     @classmethod
     def delete_by_yearmonth(cls, year, month, ac_class):
         """指定された年月のデータを一括削除する
@@ -251,12 +493,7 @@ class BalanceSheet(models.Model):
         - ac_class: 会計区分
         - return: 削除件数
         """
-        deleted_count, _ = cls.objects.filter(
-            transaction_date__year=year,
-            transaction_date__month=month,
-            accounting_class=ac_class,
-            amount__gt=0,
-        ).delete()
+        deleted_count, _ = cls.by_yearmonth(year, month, ac_class).delete()
 
         return deleted_count
 
@@ -267,7 +504,7 @@ class BalanceSheet(models.Model):
         """
         qs_bs = cls.objects.all().select_related("item_name").filter(item_name__is_asset=is_asset)
         # 期間でfiler
-        qs_bs = qs_bs.filter(monthly_date__range=[tstart, tend])
+        qs_bs = qs_bs.in_period(Period.between(tstart, tend))
         if ac_class:
             qs_bs = qs_bs.filter(item_name__ac_class=ac_class)
         else:
@@ -275,10 +512,19 @@ class BalanceSheet(models.Model):
 
         return qs_bs
 
+    @classmethod
+    def get_kurasel_amounts(cls, ac_class, year, month):
+        """月度・会計区分の登録済みデータの{項目名: 金額}を返す（確認モードの差分表示用）"""
+        last_day = calendar.monthrange(int(year), int(month))[1]
+        monthly_date = datetime.date(int(year), int(month), last_day)
+        qs = cls.objects.filter(monthly_date=monthly_date, item_name__ac_class=ac_class)
+        return dict(qs.values_list("item_name__item_name", "amounts"))
+
     @classmethod
     def bs_from_kurasel(cls, ac_class, data):
         """kuraselから貸借対照表データを取り込む
-        - 日付、項目名でupdate_or_createする
+        - 日付、項目名でupdate_or_createする（金額が同じ登録済みのデータは更新しない）
+        - data["import_batch"]: 登録・更新するデータに設定する取り込みバッチ（省略可）。
         """
         # 月度 日付は末日とする。
         last_day = calendar.monthrange(int(data["year"]), int(data["month"]))[1]
@@ -292,11 +538,16 @@ class BalanceSheet(models.Model):
         for item_name, amounts in data["bs_dict"].items():
             try:
                 item_name_obj = BalanceSheetItem.objects.filter(ac_class=ac_class).get(item_name=item_name)
+                if cls.objects.filter(
+                    monthly_date=monthly_date, item_name=item_name_obj, amounts=amounts
+                ).exists():
+                    continue
                 cls.objects.update_or_create(
                     monthly_date=monthly_date,
                     item_name=item_name_obj,
                     defaults={
                         "amounts": amounts,
+                        "import_batch": data.get("import_batch"),
                     },
                 )
             except Exception as e:
@@ -309,41 +560,52 @@ class BalanceSheet(models.Model):
     def get_mishuu_bs(cls, tstart, tend):
         """指定期間の貸借対照表の未収金を返す"""
         qs_mishuu_bs = (
-            cls.objects.filter(monthly_date__range=[tstart, tend])
+            cls.objects.in_period(Period.between(tstart, tend))
             .filter(item_name__item_name__contains=settings.RECIVABLE)
             .order_by("item_name")
         )
-        # 貸借対照表上の未収金合計
-        total_mishuu = 0
-        for d in qs_mishuu_bs:
-            total_mishuu += d.amounts
-
-        return qs_mishuu_bs, total_mishuu
+        return qs_mishuu_bs, qs_mishuu_bs.totals()["total"]
 
     @classmethod
     def get_miharai_bs(cls, tstart, tend):
         """期間の貸借対照表の未払金を返す"""
-        qs_miharai = BalanceSheet.objects.filter(monthly_date__range=[tstart, tend]).filter(
+        qs_miharai = BalanceSheet.objects.in_period(Period.between(tstart, tend)).filter(
             item_name__item_name__contains=settings.PAYABLE
         )
-        # 未払金合計
-        total_miharai = 0
-        for d in qs_miharai:
-            total_miharai += d.amounts
-
-        return qs_miharai, total_miharai
+        return qs_miharai, qs_miharai.totals()["total"]
 
     @classmethod
     def get_maeuke_bs(cls, tstart, tend):
         """指定期間の貸借対照表の前受金を返す"""
         qs_maeuke_bs = (
-            cls.objects.filter(monthly_date__range=[tstart, tend])
+            cls.objects.in_period(Period.between(tstart, tend))
             .filter(item_name__item_name__contains=settings.MAEUKE)
             .order_by("item_name")
         )
-        # 貸借対照表上の未収金合計
-        total_maeuke = 0
-        for d in qs_maeuke_bs:
-            total_maeuke += d.amounts
+        return qs_maeuke_bs, qs_maeuke_bs.totals()["total"]
+
+
+@receiver(models.signals.pre_save, sender=ReportTransaction)
+def pre_save_report_transaction_handler(sender, instance, raw=False, **kwargs):
+    """変更前の取引月を保持する（取引月が変わった場合は変更前の年月の集計データも作り直す）"""
+    instance._summary_old_date = None
+    if raw or instance.pk is None:
+        return
+    instance._summary_old_date = (
+        sender.objects.filter(pk=instance.pk).values_list("transaction_date", flat=True).first()
+    )
+
+
+@receiver(models.signals.post_save, sender=ReportTransaction)
+def post_save_report_transaction_handler(sender, instance, raw=False, **kwargs):
+    """月次収支データの登録・変更で、変更前後の年月の集計データをコミット後に作り直す"""
+    if raw:
+        return
+    date = sender._meta.get_field("transaction_date").to_python(instance.transaction_date)
+    MonthlySummary.refresh_on_commit(date, getattr(instance, "_summary_old_date", None))
+
 
-        return qs_maeuke_bs, total_maeuke
+@receiver(models.signals.post_delete, sender=ReportTransaction)
+def post_delete_report_transaction_handler(sender, instance, **kwargs):
+    """月次収支データの削除で、その年月の集計データをコミット後に作り直す"""
+    MonthlySummary.refresh_on_commit(instance.transaction_date)
@@ -4,14 +4,17 @@ import logging
 
 from common.services import get_lastmonth, select_period
 from django.conf import settings
-from monthly_report.models import BalanceSheet, ReportTransaction
+from monthly_report.models import BalanceSheet
 from monthly_report.services.monthly_report_services import get_monthly_report_queryset
+from record.models import AccountBalance
 
 logger = logging.getLogger(__name__)
 
 
 def check_balancesheet(year, month, ac_class):
-    """銀行残高整合チェック"""
+    """銀行残高整合チェック
+    - 「通帳残高」は前月末・当月末の入出金明細データの残高（口座の日毎残高を1行読むだけで得る）。
+    """
     previous = {}
     current = {}
 
@@ -41,12 +44,13 @@ def check_balancesheet(year, month, ac_class):
     previous[settings.MAEBARAI] = pick(prev_asset, settings.MAEBARAI)
     previous[settings.PAYABLE] = pick(prev_debt, settings.PAYABLE)
     previous[settings.MAEUKE] = pick(prev_debt, settings.MAEUKE)
+    previous["通帳残高"] = AccountBalance.total_at(last_tend)
 
     income_qs = get_monthly_report_queryset(tstart, tend, ac_class, "income", True)
     expense_qs = get_monthly_report_queryset(tstart, tend, ac_class, "expense", True)
 
-    current["当月収入"] = ReportTransaction.total_calc_flg(income_qs)
-    current["当月支出"] = ReportTransaction.total_calc_flg(expense_qs)
+    current["当月収入"] = income_qs.totals()["total"]
+    current["当月支出"] = expense_qs.totals()["total"]
 
     curr_asset = BalanceSheet.get_bs(tstart, tend, ac_class, True).values_list(
         "item_name__item_name", "amounts"
@@ -59,6 +63,7 @@ def check_balancesheet(year, month, ac_class):
     current[settings.MAEBARAI] = pick(curr_asset, settings.MAEBARAI)
     current[settings.PAYABLE] = pick(curr_debt, settings.PAYABLE)
     current[settings.MAEUKE] = pick(curr_debt, settings.MAEUKE)
+    current["通帳残高"] = AccountBalance.total_at(tend)
 
     current["計算現金残高"] = (
         previous[settings.BANK_NAME]  # 前月銀行残高
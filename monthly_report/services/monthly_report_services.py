@@ -1,27 +1,80 @@
-import calendar
-
+from common.period import Period
 from django.conf import settings
-from django.db.models import Case, IntegerField, Sum, When
-from django.db.models.functions import Coalesce
+from django.db.models import F, Sum
+from django.db.models.functions import Coalesce, ExtractMonth
 from django.utils import timezone
 from django.utils.timezone import localtime
-from monthly_report.models import AccountingClass, ReportTransaction
+from monthly_report.models import AccountingClass, MonthlySummary, ReportTransaction
 
 
-def monthly_total(qs, year, item_name):
-    """指定された1年間の月毎の集計関数
-    - 与えられたquerysetからitem_name項目の合計をDictで返す。
-    - aggregateでの集約合計の結果がNoneの場合にデフォルトの0を返すためにCoalwsce()を使う。
+def monthly_pivot(qs, year, item_name="amount"):
+    """指定された1年間の費目毎・月毎の集計（ピボット）を返す
+    - 与えられたquerysetを(費目, 月)でGROUP BYする1回のクエリで集計し、Python側で行・列に組み替える。
+    - ReportTransaction、Transactionのどちらのquerysetでも使える。
+    - rows: 費目毎のdictのリスト。キーは「himoku__himoku_name」「himoku__accounting_class__accounting_name」
+      「month1」〜「month12」「total」。会計区分コード・費目コード順に並べる。
+    - col_total: 月別合計のdict。キーは「total1」〜「total12」。
     """
-    rtn = {}
-    for month in range(1, 13):
-        day = calendar.monthrange(year, month)[1]
-        sdate = timezone.datetime(year, month, 1, 0, 0, 0)
-        edate = timezone.datetime(year, month, day, 0, 0, 0)
-        rtn["total" + str(month)] = qs.filter(transaction_date__range=[sdate, edate]).aggregate(
-            tmp=Coalesce(Sum(item_name), 0)
-        )["tmp"]
-    return rtn
+    grouped = (
+        qs.in_period(Period.of(year))
+        .order_by()
+        .values(
+            "himoku",
+            "himoku__himoku_name",
+            "himoku__code",
+            "himoku__accounting_class__accounting_name",
+            "himoku__accounting_class__code",
+            month=ExtractMonth("transaction_date"),
+        )
+        .annotate(price=Sum(item_name))
+    )
+
+    return _pivot_rows(grouped)
+
+
+def summary_pivot(qs):
+    """集計テーブル(MonthlySummary)のquerysetから費目毎・月毎の集計（ピボット）を返す
+    - 戻り値はmonthly_pivot()と同じ。
+    """
+    grouped = (
+        qs.order_by()
+        .values(
+            "himoku",
+            "himoku__himoku_name",
+            "himoku__code",
+            "himoku__accounting_class__accounting_name",
+            "himoku__accounting_class__code",
+            "month",
+        )
+        .annotate(price=Sum("amount"))
+    )
+    return _pivot_rows(grouped)
+
+
+def _pivot_rows(grouped):
+    """(費目, 月)で集計したvaluesを費目毎の行と月別合計に組み替える"""
+    col_total = {f"total{m}": 0 for m in range(1, 13)}
+    # {費目id: (並べ替えキー, 行dict)}
+    row_dict = {}
+    for item in grouped:
+        if item["himoku"] not in row_dict:
+            sort_key = (item["himoku__accounting_class__code"] or 0, item["himoku__code"] or 0)
+            row = {
+                "himoku__himoku_name": item["himoku__himoku_name"],
+                "himoku__accounting_class__accounting_name": item[
+                    "himoku__accounting_class__accounting_name"
+                ],
+                **{f"month{m}": 0 for m in range(1, 13)},
+                "total": 0,
+            }
+            row_dict[item["himoku"]] = (sort_key, row)
+        row = row_dict[item["himoku"]][1]
+        row[f"month{item['month']}"] += item["price"]
+        row["total"] += item["price"]
+        col_total[f"total{item['month']}"] += item["price"]
+
+    rows = [row for _, row in sorted(row_dict.values(), key=lambda x: x[0])]
+    return rows, col_total
 
 
 def adjust_month(year, month):
@@ -39,55 +92,6 @@ def adjust_month(year, month):
     return year, month
 
 
-def get_year_period(year):
-    """指定年の1年分の月範囲データをlistで返す"""
-    period = []
-    for month in range(1, 13):
-        month_period = [0, 0]
-        day = calendar.monthrange(year, month)[1]
-        # 月初と月末の日付を設定
-        month_period[0] = timezone.datetime(year, month, 1, 0, 0, 0)
-        month_period[1] = timezone.datetime(year, month, day, 0, 0, 0)
-        period.append(month_period)
-    return period
-
-
-def get_allmonths_data(qs, year):
-    """年間の月毎、費目毎金額の集計（リファクタリング版）"""
-    # 日付の期間を作成
-    period = get_year_period(int(year))
-
-    # 1. 12ヶ月分の集計条件を辞書内包処理で作る
-    # month1=Sum(Case(When(transaction_date__range=[period[0][0], period[0][1]], then="amount",), default=0,)),
-    # month2=Sum(Case(When(transaction_date__range=[period[1][0], period[1][1]], then="amount",), default=0,)),
-    monthly_queries = {
-        f"month{i + 1}": Sum(
-            Case(
-                When(transaction_date__range=[p[0], p[1]], then="amount"),
-                default=0,
-                output_field=IntegerField(),
-            )
-        )
-        for i, p in enumerate(period)
-    }
-
-    # 2. 全期間の合計（total）を追加
-    monthly_queries["total"] = Sum(
-        Case(
-            When(transaction_date__range=[period[0][0], period[11][1]], then="amount"),
-            default=0,
-            output_field=IntegerField(),
-        )
-    )
-
-    # 3. 辞書を展開（**）して annotate に渡す
-    return (
-        qs.values("himoku__himoku_name", "himoku__accounting_class__accounting_name")
-        .annotate(**monthly_queries)
-        .order_by("himoku__accounting_class__code", "himoku__code")
-    )
-
-
 def aggregate_himoku(qs):
     """querysetデータを費目で集計してdictで返す"""
     pb_dict = {}
@@ -102,19 +106,16 @@ def aggregate_himoku(qs):
 
 def qs_year_income(tstart, tend, ac_class, others_flg):
     """月次報告の年間収入データを返す"""
-    # 月次報告収入リスト
-    qs = get_monthly_report_queryset(tstart, tend, ac_class, "income", True)
+    # 月次報告収入の集計データ
+    qs = get_monthly_summary_queryset(tstart, tend, ac_class, "income", True)
     # 修繕積立会計の「修繕積立金」以外の収入を抽出する。
     if others_flg:
         qs = qs.exclude(himoku__himoku_name="修繕積立金")
-    # 月次報告収入の月別合計を計算。
-    year = tstart.year
-    mr_total = monthly_total(qs, int(year), "amount")
+    # 各月毎の収入額と月別合計を計算。
+    rows, mr_total = summary_pivot(qs)
     # 年間合計を計算してmr_totalに追加する。
     mr_total["year_total"] = sum(mr_total.values())
-    # 各月毎の収入額を抽出。
-    qs = get_allmonths_data(qs, year)
-    return qs, mr_total
+    return rows, mr_total
 
 
 def get_monthly_report_queryset(tstart, tend, ac_class, inout_flg, community):
@@ -125,8 +126,10 @@ def get_monthly_report_queryset(tstart, tend, ac_class, inout_flg, community):
     qs = ReportTransaction.objects.select_related("himoku", "accounting_class")
 
     # (1) 期間と有効データでフィルタリング
-    qs = qs.filter(transaction_date__range=[tstart, tend], delete_flg=False, himoku__alive=True).exclude(
-        amount=0
+    qs = (
+        qs.in_period(Period.between(tstart, tend))
+        .filter(delete_flg=False, himoku__alive=True)
+        .exclude(amount=0)
     )
 
     # (2) 収入・支出の切り替え
@@ -148,3 +151,78 @@ def get_monthly_report_queryset(tstart, tend, ac_class, inout_flg, community):
             qs = qs.exclude(himoku__accounting_class=town_obj.pk)
 
     return qs.order_by("accounting_class", "himoku__code")
+
+
+def get_monthly_summary_queryset(tstart, tend, ac_class, inout_flg, community):
+    """
+    集計テーブル(MonthlySummary)からget_monthly_report_queryset()と同じ条件のQuerySetを取得する
+    - 期間は月単位となる。
+    """
+    # (1) 期間と有効な費目でフィルタリング
+    qs = MonthlySummary.filter_period(tstart, tend).filter(himoku__alive=True)
+
+    # (2) 収入・支出の切り替え
+    if inout_flg == "income":
+        qs = qs.filter(himoku__is_income=True)
+    elif inout_flg == "expense":
+        qs = qs.filter(himoku__is_income=False)
+
+    # (3) 特定の会計区分でフィルタリング (0より大きい場合)
+    if ac_class > 0:
+        qs = qs.filter(himoku__accounting_class=ac_class)
+
+    # (4) 町内会会計の除外処理
+    if not community:
+        town_class_name = AccountingClass.get_class_name("町内会")
+        town_obj = AccountingClass.get_accountingclass_obj(town_class_name)
+        if town_obj:
+            qs = qs.exclude(himoku__accounting_class=town_obj.pk)
+
+    return qs
+
+
+def summary_total(qs, exclude_netting=False):
+    """集計テーブルのquerysetの合計金額を返す
+    - exclude_netting: Trueの場合、相殺処理(is_netting)の金額を除外する。
+    """
+    expr = F("amount") - F("netting_amount") if exclude_netting else F("amount")
+    return qs.aggregate(total=Coalesce(Sum(expr), 0))["total"]
+
+
+def get_year_income_summary(tstart, tend):
+    """集計テーブルから費目名で集計した年間収入リストを返す
+    - ReportTransaction.get_year_income(community=True)と同じ内容。
+    """
+    return (
+        get_monthly_summary_queryset(tstart, tend, 0, "income", True)
+        .values("himoku", "himoku__himoku_name")
+        .annotate(price=Sum("amount"))
+        .exclude(price=0)
+        .order_by("himoku")
+    )
+
+
+def get_year_expense_summary(tstart, tend):
+    """集計テーブルから費目名・計算対象フラグで集計した年間支出リストを返す
+    - ReportTransaction.get_year_expense()と同じキー（himoku__himoku_name、himoku__aggregate_flag、
+      calc_flg、price）のdictのリストを返す。
+    """
+    qs = (
+        get_monthly_summary_queryset(tstart, tend, 0, "expense", True)
+        .values("himoku", "himoku__himoku_name", "himoku__aggregate_flag")
+        .annotate(sum_amount=Sum("amount"), sum_calc=Sum("calc_amount"))
+        .order_by("himoku")
+    )
+    rtn = []
+    for item in qs:
+        for calc_flg, price in ((False, item["sum_amount"] - item["sum_calc"]), (True, item["sum_calc"])):
+            if price:
+                rtn.append(
+                    {
+                        "himoku__himoku_name": item["himoku__himoku_name"],
+                        "himoku__aggregate_flag": item["himoku__aggregate_flag"],
+                        "calc_flg": calc_flg,
+                        "price": price,
+                    }
+                )
+    return rtn
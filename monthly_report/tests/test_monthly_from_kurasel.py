@@ -0,0 +1,77 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from kurasel_translator.services.monthly_report_service import MonthlyRecord
+from monthly_report.forms import MonthlyReportIncomeForm
+from monthly_report.models import DUPLICATE_REPORT_MESSAGE, ReportTransaction
+from record.models import AccountingClass, Himoku
+
+User = get_user_model()
+
+
+class MonthlyFromKuraselTests(TestCase):
+    """ReportTransaction.monthly_from_kurasel / set_offset_flag の単体テスト"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="pass")
+        self.ac = AccountingClass.objects.create(code=1, accounting_name="管理費会計")
+        self.kanrihi = Himoku.objects.create(
+            code=1, himoku_name="管理費", accounting_class=self.ac, is_income=True
+        )
+        self.fee = Himoku.objects.create(code=2, himoku_name="口座振替手数料", accounting_class=self.ac)
+
+    def _data(self, data_list):
+        return {"year": 2025, "month": 1, "author": self.user.pk, "data_list": data_list}
+
+    def _record(self, himoku_name, amount):
+        return MonthlyRecord(himoku_name, "", amount, "", "", 1)
+
+    def test_upsert(self):
+        rtn, errors = ReportTransaction.monthly_from_kurasel(
+            self.ac, self._data([self._record("管理費", 1000), self._record("口座振替手数料", 100)])
+        )
+        self.assertTrue(rtn)
+        self.assertEqual(errors, [])
+        self.assertEqual(ReportTransaction.objects.count(), 2)
+
+        # 再取り込みでは金額が更新され、件数は増えない
+        rtn, _ = ReportTransaction.monthly_from_kurasel(self.ac, self._data([self._record("管理費", 2000)]))
+        self.assertTrue(rtn)
+        self.assertEqual(ReportTransaction.objects.count(), 2)
+        self.assertEqual(ReportTransaction.objects.get(himoku=self.kanrihi).amount, 2000)
+
+    def test_edit_form_rejects_duplicate(self):
+        ReportTransaction.monthly_from_kurasel(
+            self.ac, self._data([self._record("管理費", 1000), self._record("口座振替手数料", 100)])
+        )
+        obj = ReportTransaction.objects.get(himoku=self.fee)
+        data = {
+            "accounting_class": self.ac.pk,
+            "transaction_date": "2025-01-01",
+            "amount": 100,
+            "himoku": self.kanrihi.pk,
+            "calc_flg": True,
+        }
+        # 別のデータと(取引月, 費目, 会計区分)が重複する編集は、保存せずにフォームのエラーとする
+        form = MonthlyReportIncomeForm(data=data, instance=obj)
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.non_field_errors(), [DUPLICATE_REPORT_MESSAGE])
+
+    def test_unknown_himoku_writes_nothing(self):
+        rtn, errors = ReportTransaction.monthly_from_kurasel(
+            self.ac, self._data([self._record("管理費", 1000), self._record("未登録", 100)])
+        )
+        self.assertFalse(rtn)
+        self.assertIn("未登録", errors[0])
+        self.assertEqual(ReportTransaction.objects.count(), 0)
+
+    def test_set_offset_flag(self):
+        ReportTransaction.monthly_from_kurasel(
+            self.ac, self._data([self._record("管理費", 1000), self._record("口座振替手数料", 100)])
+        )
+        tstart = timezone.datetime(2025, 1, 1).date()
+        tend = timezone.datetime(2025, 1, 31).date()
+        ReportTransaction.set_offset_flag("口座振替手数料", tstart, tend)
+
+        self.assertTrue(ReportTransaction.objects.get(himoku=self.fee).is_netting)
+        self.assertFalse(ReportTransaction.objects.get(himoku=self.kanrihi).is_netting)
@@ -0,0 +1,44 @@
+import datetime
+
+from django.test import TestCase
+from monthly_report.models import ReportTransaction
+from monthly_report.services.monthly_report_services import monthly_pivot
+from record.models import AccountingClass, Himoku, Transaction
+
+
+class MonthlyPivotTests(TestCase):
+    """monthly_pivot の単体テスト"""
+
+    def setUp(self):
+        self.ac = AccountingClass.objects.create(code=1, accounting_name="管理費会計")
+        self.h1 = Himoku.objects.create(code=2, himoku_name="清掃費", accounting_class=self.ac)
+        self.h2 = Himoku.objects.create(code=1, himoku_name="電気料", accounting_class=self.ac)
+        for month, himoku, amount in [(1, self.h1, 100), (1, self.h2, 200), (3, self.h1, 300)]:
+            ReportTransaction.objects.create(
+                transaction_date=datetime.date(2025, month, 1),
+                himoku=himoku,
+                accounting_class=self.ac,
+                amount=amount,
+            )
+            Transaction.objects.create(
+                transaction_date=datetime.date(2025, month, 15), himoku=himoku, amount=amount
+            )
+
+    def test_pivot_report_transaction(self):
+        with self.assertNumQueries(1):
+            rows, col_total = monthly_pivot(ReportTransaction.objects.all(), 2025)
+
+        # 費目コード順
+        self.assertEqual([r["himoku__himoku_name"] for r in rows], ["電気料", "清掃費"])
+        self.assertEqual(rows[1]["month1"], 100)
+        self.assertEqual(rows[1]["month3"], 300)
+        self.assertEqual(rows[1]["total"], 400)
+        self.assertEqual(col_total["total1"], 300)
+        self.assertEqual(col_total["total2"], 0)
+        self.assertEqual(sum(col_total.values()), 600)
+
+    def test_pivot_transaction(self):
+        rows, col_total = monthly_pivot(Transaction.objects.all(), 2025)
+
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(col_total["total3"], 300)
@@ -0,0 +1,97 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from monthly_report.models import MonthlySummary, ReportTransaction
+from monthly_report.services.monthly_report_services import (
+    get_monthly_summary_queryset,
+    summary_pivot,
+    summary_total,
+)
+from record.models import AccountingClass, Himoku
+
+User = get_user_model()
+
+
+class MonthlySummaryTests(TestCase):
+    """MonthlySummary の集計・再作成の単体テスト"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="pass")
+        self.ac = AccountingClass.objects.create(code=1, accounting_name="管理費会計")
+        self.kanrihi = Himoku.objects.create(
+            code=1, himoku_name="管理費", accounting_class=self.ac, is_income=True
+        )
+        self.fee = Himoku.objects.create(code=2, himoku_name="口座振替手数料", accounting_class=self.ac)
+
+    def _create(self, date, himoku, amount, **kwargs):
+        return ReportTransaction.objects.create(
+            transaction_date=date,
+            accounting_class=self.ac,
+            himoku=himoku,
+            amount=amount,
+            author=self.user,
+            **kwargs,
+        )
+
+    def test_refresh(self):
+        self._create(datetime.date(2025, 1, 1), self.kanrihi, 1000)
+        self._create(datetime.date(2025, 1, 1), self.fee, 100, is_netting=True)
+        self._create(datetime.date(2025, 1, 15), self.fee, 50, delete_flg=True)
+        MonthlySummary.refresh(2025, 1)
+
+        self.assertEqual(MonthlySummary.objects.count(), 2)
+        fee = MonthlySummary.objects.get(himoku=self.fee)
+        self.assertEqual(fee.amount, 100)
+        self.assertEqual(fee.netting_amount, 100)
+
+        tstart = datetime.datetime(2025, 1, 1)
+        tend = datetime.datetime(2025, 1, 31)
+        qs = get_monthly_summary_queryset(tstart, tend, 0, "expense", True)
+        self.assertEqual(summary_total(qs), 100)
+        self.assertEqual(summary_total(qs, exclude_netting=True), 0)
+
+    def test_rebuild_matches_refresh(self):
+        self._create(datetime.date(2024, 12, 1), self.kanrihi, 1000)
+        self._create(datetime.date(2025, 1, 1), self.kanrihi, 2000)
+        MonthlySummary.rebuild()
+
+        qs = get_monthly_summary_queryset(
+            datetime.datetime(2024, 12, 1), datetime.datetime(2025, 1, 31), 0, "income", True
+        )
+        rows, col_total = summary_pivot(qs)
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["month12"], 1000)
+        self.assertEqual(rows[0]["month1"], 2000)
+        self.assertEqual(rows[0]["total"], 3000)
+
+        # 月単位で作り直しても結果は変わらない
+        MonthlySummary.refresh_dates(datetime.date(2025, 1, 1))
+        self.assertEqual(MonthlySummary.objects.count(), 2)
+
+    def test_signals_refresh_on_commit(self):
+        # 管理画面などでの保存・削除は、コミット後にその年月の集計データを作り直す
+        with self.captureOnCommitCallbacks(execute=True):
+            obj = self._create(datetime.date(2025, 1, 1), self.fee, 100)
+        self.assertEqual(MonthlySummary.objects.get(year=2025, month=1).amount, 100)
+
+        # 取引月の変更では、変更前の年月も作り直す
+        with self.captureOnCommitCallbacks(execute=True):
+            obj.transaction_date = datetime.date(2025, 2, 1)
+            obj.save()
+        self.assertEqual(list(MonthlySummary.objects.values_list("month", flat=True)), [2])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            obj.delete()
+        self.assertEqual(MonthlySummary.objects.count(), 0)
+
+    def test_is_income_read_from_himoku(self):
+        self._create(datetime.date(2025, 1, 1), self.fee, 100)
+        MonthlySummary.refresh(2025, 1)
+        tstart, tend = datetime.datetime(2025, 1, 1), datetime.datetime(2025, 1, 31)
+
+        # 費目マスタの収入・支出の変更は、集計データを作り直さなくても反映される
+        self.fee.is_income = True
+        self.fee.save()
+        self.assertEqual(summary_total(get_monthly_summary_queryset(tstart, tend, 0, "income", True)), 100)
+        self.assertEqual(summary_total(get_monthly_summary_queryset(tstart, tend, 0, "expense", True)), 0)
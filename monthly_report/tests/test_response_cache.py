@@ -0,0 +1,98 @@
+import datetime
+
+from common import response_cache
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from monthly_report.models import ReportTransaction
+from monthly_report.views import UnpaidBalanceListView
+from record.models import AccountingClass, Himoku
+
+User = get_user_model()
+
+
+class ReportCacheTests(TestCase):
+    """集計ページのレスポンスキャッシュのテスト"""
+
+    def setUp(self):
+        cache.clear()
+        response_cache.reset_stats()
+        self.user = User.objects.create_superuser(username="admin", password="pass")
+        self.ac = AccountingClass.objects.create(code=1, accounting_name="管理費会計")
+        self.himoku = Himoku.objects.create(code=1, himoku_name="修繕費", accounting_class=self.ac)
+
+    def _get(self, **headers):
+        request = RequestFactory().get("/monthly_report/unpaid_list/", {"year": "2025"}, headers=headers)
+        request.user = self.user
+        return UnpaidBalanceListView.as_view()(request)
+
+    def _create(self, date, amount):
+        # 期間のバージョンはコミット後に更新する
+        with self.captureOnCommitCallbacks(execute=True):
+            return ReportTransaction.objects.create(
+                transaction_date=date,
+                accounting_class=self.ac,
+                himoku=self.himoku,
+                amount=amount,
+                is_miharai=True,
+                author=self.user,
+            )
+
+    def test_hit_until_period_is_changed(self):
+        self._create(datetime.date(2025, 3, 1), 1000)
+        first = self._get()
+        second = self._get()
+        self.assertEqual(first["X-Report-Cache"], "MISS")
+        self.assertEqual(second["X-Report-Cache"], "HIT")
+        self.assertEqual(first.content, second.content)
+
+        # 別の年のデータの変更ではキャッシュを破棄しない
+        self._create(datetime.date(2023, 3, 1), 500)
+        self.assertEqual(self._get()["X-Report-Cache"], "HIT")
+
+        # 表示年のデータを変更するとキャッシュを破棄する
+        self._create(datetime.date(2025, 4, 1), 2000)
+        third = self._get()
+        self.assertEqual(third["X-Report-Cache"], "MISS")
+        self.assertContains(third, "3,000")
+
+        stats = response_cache.get_stats()
+        self.assertEqual(list(stats.values()), [{"hits": 2, "misses": 2}])
+
+    def test_moving_date_out_of_period(self):
+        obj = self._create(datetime.date(2025, 3, 1), 1000)
+        self._get()
+        obj.transaction_date = datetime.date(2024, 3, 1)
+        with self.captureOnCommitCallbacks() as callbacks:
+            obj.save()
+        # コミット前はバージョンを更新しない（他のスレッドがコミット前のデータを新しいバージョンでキャッシュしないよう）
+        self.assertEqual(self._get()["X-Report-Cache"], "HIT")
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self._get()["X-Report-Cache"], "MISS")
+
+    def test_master_change_invalidates(self):
+        self._create(datetime.date(2025, 3, 1), 1000)
+        self._get()
+        self.himoku.himoku_name = "小修繕費"
+        self.himoku.save()
+        response = self._get()
+        self.assertEqual(response["X-Report-Cache"], "MISS")
+        self.assertContains(response, "小修繕費")
+
+    def test_conditional_get(self):
+        self._create(datetime.date(2025, 3, 1), 1000)
+        first = self._get()
+        etag = first["ETag"]
+        self.assertTrue(etag.startswith('"'))
+        self.assertIn("Last-Modified", first)
+
+        response = self._get(if_none_match=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+        # データが変更された後は新しいETagで再表示する
+        self._create(datetime.date(2025, 4, 1), 2000)
+        response = self._get(if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
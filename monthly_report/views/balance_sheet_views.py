@@ -1,6 +1,8 @@
 # views/balance_sheet_views.py
 import logging
 
+from common.period import Period
+from common.response_cache import ReportCacheMixin
 from common.services import select_period
 from control.models import FiscalLock
 from django.conf import settings
@@ -37,7 +39,7 @@ logger = logging.getLogger(__name__)
 # =============================================================================
 # 貸借対照表 表示 View
 # =============================================================================
-class BalanceSheetTableView(MonthlyReportBaseView):
+class BalanceSheetTableView(ReportCacheMixin, MonthlyReportBaseView):
     """
     貸借対照表の表示専用 View
     - 年・月・会計区分の取得は MonthlyReportBaseView に委譲
@@ -136,7 +138,7 @@ class BalanceSheetTableView(MonthlyReportBaseView):
 # =============================================================================
 # 貸借対照表 修正用一覧 View
 # =============================================================================
-class BalanceSheetListView(MonthlyReportBaseView):
+class BalanceSheetListView(ReportCacheMixin, MonthlyReportBaseView):
     """
     貸借対照表 修正用リスト表示 View
 
@@ -152,10 +154,8 @@ class BalanceSheetListView(MonthlyReportBaseView):
 
         # パラメータ取得
         year, month, ac_class = self.get_year_month_ac(kwargs)
-        tstart, tend = select_period(year, month)
-
         qs = (
-            BalanceSheet.objects.filter(monthly_date__range=[tstart, tend])
+            BalanceSheet.objects.in_period(Period.of(year, month))
             .select_related("item_name", "item_name__ac_class")
             .order_by("monthly_date", "item_name__ac_class", "item_name__code")
         )
@@ -202,7 +202,7 @@ class BalanceSheetCreateView(PermissionRequiredMixin, CreateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         year = localtime(timezone.now()).year
-        context["bs_list"] = BalanceSheet.objects.filter(monthly_date__contains=year).order_by(
+        context["bs_list"] = BalanceSheet.objects.in_period(Period.of(year)).order_by(
             "-monthly_date", "item_name"
         )
         return context
@@ -316,7 +316,7 @@ class BalanceSheetDeleteByYearMonthView(PermissionRequiredMixin, FormView):
                 return redirect(f"{base_url}?{params}")
 
             # 「確認ボタン」が押された場合は、データを抽出して同じページを表示
-            target_data = BalanceSheet.objects.filter(monthly_date__year=year, monthly_date__month=month)
+            target_data = BalanceSheet.by_yearmonth(year, month, ac_class)
             return self.render_to_response(
                 self.get_context_data(
                     form=form,
@@ -1,8 +1,9 @@
+from common.response_cache import ReportCacheMixin
+from common.period import Period
 from common.services import select_period
 from control.models import ControlRecord
 from django.contrib import messages
 from django.contrib.auth.mixins import PermissionRequiredMixin
-from django.db.models import Sum
 from django.utils import timezone
 from django.utils.timezone import localtime
 from django.views import generic
@@ -13,7 +14,7 @@ from monthly_report.models import ReportTransaction
 from monthly_report.services import monthly_report_services
 
 
-class CalcFlgCheckList(PermissionRequiredMixin, generic.TemplateView):
+class CalcFlgCheckList(ReportCacheMixin, PermissionRequiredMixin, generic.TemplateView):
     """合計計算から除外している項目リスト
     - calc_flg（計算対象フラグ）がFalse
     - 細目レベルでis_aggregareがFalse
@@ -31,9 +32,7 @@ class CalcFlgCheckList(PermissionRequiredMixin, generic.TemplateView):
         # 合計計算除外項目リスト（calc_flg=False, aggregate_flag=False）
         qs = ReportTransaction.get_calcflg_check(tstart, tend)
         # 除外項目の合計
-        total = 0
-        for i in qs:
-            total += i.amount
+        total = qs.totals()["total"]
         # formに初期値を設定する
         form = MonthlyReportViewForm(
             initial={
@@ -47,7 +46,7 @@ class CalcFlgCheckList(PermissionRequiredMixin, generic.TemplateView):
         return context
 
 
-class CheckOffset(PermissionRequiredMixin, generic.TemplateView):
+class CheckOffset(ReportCacheMixin, PermissionRequiredMixin, generic.TemplateView):
     """「口座振替手数料」の相殺処理のフラグをチェック"""
 
     template_name = "monthly_report/chk_offset.html"
@@ -58,7 +57,6 @@ class CheckOffset(PermissionRequiredMixin, generic.TemplateView):
         context = super().get_context_data(**kwargs)
         year = self.request.GET.get("year", localtime(timezone.now()).year)
         # 抽出期間
-        tstart, tend = select_period(year, 0)
         # 費目名「口座振替手数料」でfilter
         offset_himoku_name = ControlRecord.get_offset_himoku()
         if offset_himoku_name is None:
@@ -66,11 +64,11 @@ class CheckOffset(PermissionRequiredMixin, generic.TemplateView):
         # 期間と相殺処理する費目名でfiler
         qs = (
             ReportTransaction.objects.all()
-            .filter(transaction_date__range=[tstart, tend])
+            .in_period(Period.of(year))
             .filter(himoku__himoku_name=offset_himoku_name)
             .order_by("-transaction_date")
         )
-        offset_total = qs.aggregate(Sum("amount"))["amount__sum"] or 0
+        offset_total = qs.totals()["total"]
         context["offset_total"] = offset_total
 
         form = MonthlyReportViewForm(
@@ -83,7 +81,7 @@ class CheckOffset(PermissionRequiredMixin, generic.TemplateView):
         return context
 
 
-class UnpaidBalanceListView(PermissionRequiredMixin, generic.TemplateView):
+class UnpaidBalanceListView(ReportCacheMixin, PermissionRequiredMixin, generic.TemplateView):
     """未払金一覧"""
 
     template_name = "monthly_report/unpaid_list.html"
@@ -98,9 +96,7 @@ class UnpaidBalanceListView(PermissionRequiredMixin, generic.TemplateView):
         # 未払金リスト
         qs = ReportTransaction.get_unpaid_balance(tstart, tend)
         # 未払金の合計
-        total = 0
-        for i in qs:
-            total += i.amount
+        total = qs.totals()["total"]
         # formに初期値を設定する
         form = MonthlyReportViewForm(
             initial={
@@ -114,7 +110,7 @@ class UnpaidBalanceListView(PermissionRequiredMixin, generic.TemplateView):
         return context
 
 
-class SimulationDataListView(PermissionRequiredMixin, generic.TemplateView):
+class SimulationDataListView(ReportCacheMixin, PermissionRequiredMixin, generic.TemplateView):
     """長期修繕計画シミュレーション用データリスト
     - 長期修繕計画シミュレーション用データとして、修繕積立金会計と駐車場会計の実績収入リストを表示する。
     """
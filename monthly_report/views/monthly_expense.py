@@ -1,9 +1,12 @@
 import logging
 
+from common.response_cache import ReportCacheMixin
 from common.services import select_period
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import PermissionRequiredMixin
+from django.db import IntegrityError
+from django.db import transaction as db_transaction
 from django.urls import reverse, reverse_lazy
 from django.utils import timezone
 from django.utils.http import urlencode
@@ -11,7 +14,7 @@ from django.views.generic import DeleteView, UpdateView
 from record.models import AccountingClass
 
 from monthly_report.forms import MonthlyReportExpenseForm
-from monthly_report.models import ReportTransaction
+from monthly_report.models import DUPLICATE_REPORT_MESSAGE, ReportTransaction
 from monthly_report.services.monthly_report_services import get_monthly_report_queryset
 
 from .base import MonthlyReportBaseView
@@ -23,7 +26,7 @@ logger = logging.getLogger(__name__)
 # ----------------------------------------------------------------------------
 # ListView
 # ----------------------------------------------------------------------------
-class MonthlyReportExpenseListView(MonthlyReportBaseView):
+class MonthlyReportExpenseListView(ReportCacheMixin, MonthlyReportBaseView):
     template_name = "monthly_report/monthly_report_expense.html"
 
     def get_context_data(self, **kwargs):
@@ -43,7 +46,7 @@ class MonthlyReportExpenseListView(MonthlyReportBaseView):
             "calc_flg",
             "transaction_date",
         )
-        context["total_withdrawals"] = ReportTransaction.total_calc_flg(qs)
+        context["total_withdrawals"] = qs.totals()["total"]
         context["yyyymm"] = f"第{year - settings.FIRST_PERIOD_YEAR}期{month}月"
 
         return self.base_context(context, year, month, ac_class)
@@ -91,8 +94,13 @@ class MonthlyReportExpenseUpdateView(PermissionRequiredMixin, UpdateView):
             f"修正者「{self.request.user}」"
         )
         logger.info(msg)
-        # データを保存。
-        self.object.save()
+        # データを保存。（検証後に同じ取引月・費目・会計区分のデータが登録された場合は、フォームのエラーとする）
+        try:
+            with db_transaction.atomic():
+                self.object.save()
+        except IntegrityError:
+            form.add_error(None, DUPLICATE_REPORT_MESSAGE)
+            return self.form_invalid(form)
         return super().form_valid(form)
 
 
@@ -1,10 +1,14 @@
 import logging
 
+from common.period import Period
+from common.response_cache import ReportCacheMixin
 from common.services import select_period
 from control.models import FiscalLock
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import PermissionRequiredMixin
+from django.db import IntegrityError
+from django.db import transaction as db_transaction
 from django.shortcuts import redirect
 from django.urls import reverse
 from django.utils import timezone
@@ -13,7 +17,7 @@ from django.views.generic import DeleteView, FormView, UpdateView
 from record.models import AccountingClass
 
 from monthly_report.forms import DeleteByYearMonthAcclass, MonthlyReportIncomeForm
-from monthly_report.models import ReportTransaction
+from monthly_report.models import DUPLICATE_REPORT_MESSAGE, ReportTransaction
 from monthly_report.services.monthly_report_services import get_monthly_report_queryset
 
 from .base import MonthlyReportBaseView
@@ -24,7 +28,7 @@ logger = logging.getLogger(__name__)
 # ----------------------------------------------------------------------------
 # ListView
 # ----------------------------------------------------------------------------
-class MonthlyReportIncomeListView(MonthlyReportBaseView):
+class MonthlyReportIncomeListView(ReportCacheMixin, MonthlyReportBaseView):
     template_name = "monthly_report/monthly_report_income.html"
 
     def get_context_data(self, **kwargs):
@@ -43,7 +47,7 @@ class MonthlyReportIncomeListView(MonthlyReportBaseView):
             "calc_flg",
             "transaction_date",
         )
-        context["total_withdrawals"] = ReportTransaction.total_calc_flg(qs)
+        context["total_withdrawals"] = qs.totals()["total"]
         context["yyyymm"] = f"第{year - settings.FIRST_PERIOD_YEAR}期{month}月"
 
         return self.base_context(context, year, month, ac_class)
@@ -91,8 +95,13 @@ class MonthlyReportIncomeUpdateView(PermissionRequiredMixin, UpdateView):
             f"修正者「{self.request.user}」"
         )
         logger.info(msg)
-        # データを保存。
-        self.object.save()
+        # データを保存。（検証後に同じ取引月・費目・会計区分のデータが登録された場合は、フォームのエラーとする）
+        try:
+            with db_transaction.atomic():
+                self.object.save()
+        except IntegrityError:
+            form.add_error(None, DUPLICATE_REPORT_MESSAGE)
+            return self.form_invalid(form)
         messages.success(self.request, "修正しました。")
         return super().form_valid(form)
 
@@ -195,15 +204,13 @@ class MonthlyIncomeDeleteByYearMonthView(MonthlyReportBaseView, FormView):
 
             # 2.「確認ボタン」が押された場合は、データを抽出して同じページを表示
             filters = {
-                "transaction_date__year": year,
-                "transaction_date__month": month,
                 "himoku__is_income": self.income_flg,
                 "amount__gt": 0,
             }
             if ac_class:
                 filters["accounting_class"] = ac_class
 
-            target_data = ReportTransaction.objects.filter(**filters)
+            target_data = ReportTransaction.objects.in_period(Period.of(year, month)).filter(**filters)
 
             # 3. レスポンス（ac_classのNoneチェックを入れる）
             return self.render_to_response(
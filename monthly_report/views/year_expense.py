@@ -1,5 +1,6 @@
 import logging
 
+from common.response_cache import ReportCacheMixin
 from common.services import select_period
 from django.contrib.auth.mixins import PermissionRequiredMixin
 from django.utils import timezone
@@ -8,12 +9,12 @@ from django.views import generic
 
 from monthly_report.forms import MonthlyReportViewForm
 from monthly_report.services import monthly_report_services
-from monthly_report.services.monthly_report_services import get_monthly_report_queryset
+from monthly_report.services.monthly_report_services import get_monthly_summary_queryset
 
 logger = logging.getLogger(__name__)
 
 
-class YearExpenseListView(PermissionRequiredMixin, generic.TemplateView):
+class YearExpenseListView(ReportCacheMixin, PermissionRequiredMixin, generic.TemplateView):
     """月次報告支出リスト 年間表示"""
 
     template_name = "monthly_report/year_expenselist.html"
@@ -31,15 +32,13 @@ class YearExpenseListView(PermissionRequiredMixin, generic.TemplateView):
         # 抽出期間
         tstart, tend = select_period(year, 0)
 
-        qs = get_monthly_report_queryset(tstart, tend, ac_class, "expense", True)
-        # 月次報告支出の月別合計を計算。 aggregateは辞書を返す。
-        mr_total = monthly_report_services.monthly_total(qs, int(year), "amount")
+        qs = get_monthly_summary_queryset(tstart, tend, ac_class, "expense", True)
+        # 各月毎の支出額と月別合計を集計テーブルから1回のクエリで集計する。
+        qs, mr_total = monthly_report_services.summary_pivot(qs)
         # 年間合計を計算してmr_totalに追加する。
         mr_total["year_total"] = sum(mr_total.values())
 
         context["mr_total"] = mr_total
-        # 各月毎の支出額を抽出。行集約は最後に行う必要がある。
-        qs = monthly_report_services.get_allmonths_data(qs, year)
         # form 初期値を設定
         form = MonthlyReportViewForm(
             initial={
@@ -1,5 +1,6 @@
 import logging
 
+from common.response_cache import ReportCacheMixin
 from common.services import select_period
 from django.contrib.auth.mixins import PermissionRequiredMixin
 from django.utils import timezone
@@ -12,7 +13,7 @@ from monthly_report.services import monthly_report_services
 logger = logging.getLogger(__name__)
 
 
-class YearIncomeListView(PermissionRequiredMixin, generic.TemplateView):
+class YearIncomeListView(ReportCacheMixin, PermissionRequiredMixin, generic.TemplateView):
     """月次報告収入リスト 年間表示"""
 
     template_name = "monthly_report/year_incomelist.html"
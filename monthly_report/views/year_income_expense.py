@@ -1,5 +1,6 @@
 import logging
 
+from common.response_cache import ReportCacheMixin
 from common.services import select_period
 from django.contrib.auth.mixins import PermissionRequiredMixin
 from django.utils import timezone
@@ -8,12 +9,12 @@ from django.views import generic
 
 from monthly_report.forms import MonthlyReportViewForm
 from monthly_report.services import monthly_report_services
-from monthly_report.services.monthly_report_services import get_monthly_report_queryset
+from monthly_report.services.monthly_report_services import get_monthly_summary_queryset
 
 logger = logging.getLogger(__name__)
 
 
-class YearIncomeExpenseListView(PermissionRequiredMixin, generic.TemplateView):
+class YearIncomeExpenseListView(ReportCacheMixin, PermissionRequiredMixin, generic.TemplateView):
     """収支リスト 年間表示"""
 
     template_name = "monthly_report/year_income_expenselist.html"
@@ -32,17 +33,17 @@ class YearIncomeExpenseListView(PermissionRequiredMixin, generic.TemplateView):
         tstart, tend = select_period(year, 0)
 
         # 収入
-        qs_income = get_monthly_report_queryset(tstart, tend, ac_class, "income", False)
+        qs_income = get_monthly_summary_queryset(tstart, tend, ac_class, "income", False)
         # 月次報告収入の月別合計を計算。
-        mr_income_total = monthly_report_services.monthly_total(qs_income, int(year), "amount")
+        _, mr_income_total = monthly_report_services.summary_pivot(qs_income)
         # 年間合計を計算してmr_income_totalに追加する。
         mr_income_total["income_year_total"] = sum(mr_income_total.values())
         context["mr_income_total"] = mr_income_total
 
         # 支出
-        qs_expense = get_monthly_report_queryset(tstart, tend, ac_class, "expense", False)
-        # 月次報告支出の月別合計を計算。 aggregateは辞書を返す。
-        mr_expense_total = monthly_report_services.monthly_total(qs_expense, int(year), "amount")
+        qs_expense = get_monthly_summary_queryset(tstart, tend, ac_class, "expense", False)
+        # 月次報告支出の月別合計を計算。
+        _, mr_expense_total = monthly_report_services.summary_pivot(qs_expense)
         # 年間合計を計算してmr_totalに追加する。
         mr_expense_total["expense_year_total"] = sum(mr_expense_total.values())
         context["mr_expense_total"] = mr_expense_total
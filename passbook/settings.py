@@ -118,6 +118,12 @@ DATABASES = {
     }
 }
 
+# キャッシュ（マスタデータ・台帳データのバージョン管理とレスポンスキャッシュに使用する: common/cache.py）
+# バージョンはgunicornのworker・import_worker・管理コマンドの間で共有する必要があるため、
+# プロセス間で共有できるバックエンド（既定はファイル）を使う。locmemcacheは単一プロセスの開発用。
+# 例: CACHE_URL=filecache:///var/tmp/django_cache
+CACHES = {"default": env.cache_url("CACHE_URL", default=f"filecache://{BASE_DIR / '.django_cache'}")}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -197,6 +203,15 @@ MISHUU_PARKING = 165560
 MAEUKE_INITIAL = 17000
 # 第1期の西暦
 FIRST_PERIOD_YEAR = 1999
+# 支払い承認データと通帳出金データの照合: 支払日と出金日の許容日数、支払先名の類似度の下限（0〜1）
+PAYMENT_MATCH_DAYS = 7
+PAYMENT_MATCH_SIMILARITY = 0.0
+# Kuraselデータ取り込み（登録モード）のジョブを実行するプロセス内のスレッド数。
+# 0の場合はジョブを登録するだけで、import_workerコマンドで実行する。
+IMPORT_JOB_THREADS = env.int("IMPORT_JOB_THREADS", default=1)
+# 実行中のまま、この秒数を過ぎた取り込みジョブは中断されたものとして失敗にする（サーバの再起動など）
+# このホストで実行しているジョブは、実行しているプロセスが終了している場合だけ失敗にする（秒数は使わない）
+IMPORT_JOB_TIMEOUT = env.int("IMPORT_JOB_TIMEOUT", default=60 * 60)
 # Kuraselデータ取り込み時のチェック用。無くてもエラーチェックしないだけのはず。
 KANRI_INCOME = ["収入", "管理費会計", "管理費", "緑地維持管理費"]
 KANRI_PAYMENT = ["支出", "管理費会計", "管理委託業務費", "管理手数料"]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.11 on 2026-10-18 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("payment", "0002_initial"),
+        ("record", "0019_transaction_claimdata_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(fields=["payment_date"], name="payment_date_idx"),
+        ),
+    ]
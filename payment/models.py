@@ -1,6 +1,8 @@
 import datetime
 import logging
 
+from common.period import Period
+from common.querysets import PeriodQuerySet, TotalsQuerySet
 from django.contrib.auth import get_user_model
 from django.db import models
 from django.utils import timezone
@@ -10,6 +12,13 @@ user = get_user_model()
 logger = logging.getLogger(__name__)
 
 
+class PaymentQuerySet(PeriodQuerySet, TotalsQuerySet):
+    """支払いデータのQuerySet"""
+
+    amount_field = "payment"
+    period_field = "payment_date"
+
+
 class Payment(models.Model):
     """承認された支払いデータ
     費目コードはlimit_choices_toで勘定科目のフィルターをする。
@@ -22,6 +31,26 @@ class Payment(models.Model):
     payment_destination = models.CharField(verbose_name="支払先", max_length=32, blank=True, default="")
     payment = models.IntegerField(verbose_name="金額", default=0)
     summary = models.CharField(verbose_name="摘要", max_length=64, blank=True, default="")
+    # Kuraselからの取り込みで登録・更新したバッチ（取り込みの取り消しに使う）
+    import_batch = models.ForeignKey(
+        "kurasel_translator.ImportBatch",
+        verbose_name="取り込みバッチ",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+
+    objects = PaymentQuerySet.as_manager()
+
+    class Meta:
+        """インデックス
+        - kurasel_get_payment()の支払日の期間での抽出用。
+        """
+
+        indexes = [
+            models.Index(fields=["payment_date"], name="payment_date_idx"),
+        ]
 
     def __str__(self):
         return self.summary
@@ -31,6 +60,8 @@ class Payment(models.Model):
         """クラセルの承認済み支払いデータを読み込む
         - 承認済みデータなので、金額の修正は無しとして「支払先、支払い金額、支払日, 摘要」でget_or_createする。
         - 費目はdefault費目をセットする。
+        - data["data_list"]は支払承認データのレコード（kurasel_translatorのPaymentRecord）のリスト。
+        - data["import_batch"]: 新規に登録するデータに設定する取り込みバッチ（省略可）。
         """
         # 支払日
         date_str = str(data["year"]) + str(data["month"]).zfill(2) + data["day"].zfill(2)
@@ -42,31 +73,38 @@ class Payment(models.Model):
         for item in data["data_list"]:
             try:
                 cls.objects.get_or_create(
-                    payment_destination=item[2],
-                    payment=item[3],
+                    payment_destination=item.destination,
+                    payment=item.amount,
                     payment_date=payment_day,
                     # 2024-07-27「祭礼寄付」「盆踊り寄付」のため「摘要」を追加。
                     # したがって摘要を手入力すると、再読み込みすると同じデータを重複して取り込んでしまう。
-                    summary=item[1],
+                    summary=item.summary,
                     defaults={
                         # "summary": item[1],
                         "himoku": default_himoku,
+                        "import_batch": data.get("import_batch"),
                     },
                 )
             except Exception as e:
                 logger.error(e)
-                error_list.append(item[0])
+                error_list.append(item.no)
                 rtn = False
         return rtn, error_list
 
+    @classmethod
+    def get_kurasel_amounts(cls, year, month, day):
+        """支払日の登録済みデータの{(支払先, 支払い金額, 摘要): 支払い金額}を返す（確認モードの差分表示用）"""
+        payment_day = datetime.date(int(year), int(month), int(day))
+        qs = cls.objects.filter(payment_date=payment_day).values_list(
+            "payment_destination", "payment", "summary"
+        )
+        return {(destination, payment, summary): payment for destination, payment, summary in qs}
+
     @classmethod
     def kurasel_get_payment(cls, tstart, tend):
         """承認済み支払いデータを返す"""
-        qs = cls.objects.filter(payment_date__range=[tstart, tend])
-        total = 0
-        for i in qs:
-            total += i.payment
-        return qs, total
+        qs = cls.objects.in_period(Period.between(tstart, tend))
+        return qs, qs.totals()["total"]
 
     @classmethod
     def delete_by_yearmonth(cls, year, month):
@@ -75,7 +113,7 @@ class Payment(models.Model):
         - month: 月 (int: 2)
         - return: 削除件数
         """
-        deleted_count, _ = cls.objects.filter(payment_date__year=year, payment_date__month=month).delete()
+        deleted_count, _ = cls.objects.in_period(Period.of(year, month)).delete()
 
         return deleted_count
 
@@ -86,7 +124,7 @@ class Payment(models.Model):
         - month: 月 (int: 2)
         - return: queryset
         """
-        qs = cls.objects.filter(payment_date__year=year, payment_date__month=month).order_by("payment_date")
+        qs = cls.objects.in_period(Period.of(year, month)).order_by("payment_date")
         return qs
 
 
@@ -1,7 +1,7 @@
 # payment/services.py
 import datetime
 
-from common.services import select_period
+from common.period import Period
 from django.db.models import Sum
 
 from payment.models import Payment
@@ -9,14 +9,12 @@ from payment.models import Payment
 
 def get_payment_summary(year, month, day=0, list_order=0):
     """指定された期間の支払いデータと合計金額を取得"""
-    tstart, tend = select_period(year, month)
-
     # 1. フィルタリング
     qs = Payment.objects.select_related("himoku")
 
     if day == 0:
         # 月間表示
-        qs = qs.filter(payment_date__range=[tstart, tend])
+        qs = qs.in_period(Period.of(year, month))
     else:
         # 特定の日付表示
         payment_day = datetime.date(year, month, day)
@@ -125,7 +125,7 @@ class PaymentDeleteByYearMonthView(PaymentAdminBase, PermissionRequiredMixin, ge
                 return redirect(f"{base_url}?{params}")
 
             # 「確認ボタン」が押された場合は、データを抽出して同じページを表示
-            target_data = Payment.objects.filter(payment_date__year=year, payment_date__month=month)
+            target_data = Payment.get_data_by_yearmonth(year, month)
             return self.render_to_response(
                 self.get_context_data(
                     form=form,
@@ -2,6 +2,7 @@ from django.contrib import admin
 
 from record.models import (
     Account,
+    AccountBalance,
     AccountingClass,
     ApprovalCheckData,
     Bank,
@@ -78,6 +79,11 @@ class ClaimDataAdmin(admin.ModelAdmin):
     ordering = ("claim_type", "claim_date")
 
 
+class AccountBalanceAdmin(admin.ModelAdmin):
+    list_display = ["account", "date", "deposit", "withdrawal", "balance"]
+    ordering = ("account", "date")
+
+
 # Register your models here.
 admin.site.register(Bank, BankAdmin)
 admin.site.register(Account, AccountAdmin)
@@ -87,3 +93,4 @@ admin.site.register(TransferRequester, TransferRequesterAdmin)
 admin.site.register(Transaction, TransactionAdmin)
 admin.site.register(ApprovalCheckData, ApprovalCheckDataAdmin)
 admin.site.register(ClaimData, ClaimDataAdmin)
+admin.site.register(AccountBalance, AccountBalanceAdmin)
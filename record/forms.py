@@ -1,5 +1,6 @@
 import logging
 
+from common.cache import CachedModelChoiceField
 from django import forms
 from django.conf import settings
 from django.utils import timezone
@@ -39,7 +40,7 @@ class TransactionDisplayForm(YearMonthForm):
         required=True,
     )
     # 会計区分
-    ac_class = forms.ModelChoiceField(
+    ac_class = CachedModelChoiceField(
         label="会計区分",
         required=False,
         queryset=AccountingClass.objects.order_by("code"),
@@ -55,13 +56,14 @@ class TransactionDisplayForm(YearMonthForm):
         required=True,
     )
     # 費目
-    himoku_id = forms.ModelChoiceField(
+    himoku_id = CachedModelChoiceField(
         label="入出金費目",
         empty_label="全費目",
         required=False,
-        queryset=Himoku.objects.filter(alive=True, code__lt=9000).order_by(
-            "-is_income", "accounting_class", "code"
-        ),
+        depends_on=("record.AccountingClass",),
+        queryset=Himoku.objects.select_related("accounting_class")
+        .filter(alive=True, code__lt=9000)
+        .order_by("-is_income", "accounting_class", "code"),
     )
 
 
@@ -71,19 +73,20 @@ class TransactionDisplayForm(YearMonthForm):
 class TransactionCreateForm(forms.ModelForm):
     """入出金明細データ登録・編集用フォーム"""
 
-    account = forms.ModelChoiceField(
+    account = CachedModelChoiceField(
         label="口座名",
         required=True,
         queryset=Account.objects.filter(alive=True),
         widget=forms.Select(attrs={"class": "select-css"}),
     )
 
-    himoku = forms.ModelChoiceField(
+    himoku = CachedModelChoiceField(
         label="費目選択",
         required=False,
-        queryset=Himoku.objects.filter(alive=True, code__lt=9000).order_by(
-            "-is_income", "accounting_class", "code"
-        ),
+        depends_on=("record.AccountingClass",),
+        queryset=Himoku.objects.select_related("accounting_class")
+        .filter(alive=True, code__lt=9000)
+        .order_by("-is_income", "accounting_class", "code"),
         widget=forms.Select(attrs={"class": "select-css"}),
     )
     # requiredをFalseにするため上書きする。
@@ -159,7 +162,7 @@ class TransactionCreateForm(forms.ModelForm):
 class HimokuForm(forms.ModelForm):
     """費目マスタデータ登録/修正用Form"""
 
-    accounting_class = forms.ModelChoiceField(
+    accounting_class = CachedModelChoiceField(
         label="会計区分",
         queryset=AccountingClass.objects.all().order_by("code"),
         widget=forms.Select(attrs={"class": "select-css"}),
@@ -232,12 +235,13 @@ class AccountTitleForm(forms.ModelForm):
 class RequesterForm(forms.ModelForm):
     """振込依頼者データ登録/修正用Form"""
 
-    himoku = forms.ModelChoiceField(
+    himoku = CachedModelChoiceField(
         label="費目選択",
         required=False,
-        queryset=Himoku.objects.filter(alive=True, is_income=False, code__lt=9000).order_by(
-            "-is_income", "code"
-        ),
+        depends_on=("record.AccountingClass",),
+        queryset=Himoku.objects.select_related("accounting_class")
+        .filter(alive=True, is_income=False, code__lt=9000)
+        .order_by("-is_income", "code"),
         widget=forms.Select(attrs={"class": "select-css"}),
     )
 
@@ -341,7 +345,7 @@ class HimokuCsvFileSelectForm(forms.Form):
 class HimokuListForm(forms.Form):
     """費目アップデート用リスト表示"""
 
-    ac_class = forms.ModelChoiceField(
+    ac_class = CachedModelChoiceField(
         label="会計区分",
         queryset=AccountingClass.objects.all().order_by("code"),
         empty_label="会計区分ALL",
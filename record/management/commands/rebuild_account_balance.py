@@ -0,0 +1,20 @@
+from common.cache import require_shared_cache
+from django.core.management.base import BaseCommand
+
+from record.models import AccountBalance
+
+
+class Command(BaseCommand):
+    """口座の日毎残高(AccountBalance)を入出金明細データから作り直す
+    - 通常は入出金明細データの変更時に変更のあった日から計算し直すため、導入時やデータの一括修正後に使う。
+    """
+
+    help = "口座の日毎残高を入出金明細データから作り直す"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--account", type=int, help="作り直す口座のID（省略すると全口座）")
+
+    def handle(self, *args, **options):
+        require_shared_cache()
+        count = AccountBalance.rebuild(options["account"])
+        self.stdout.write(self.style.SUCCESS(f"日毎残高を {count} 件作成しました。"))
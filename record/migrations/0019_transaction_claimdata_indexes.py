@@ -0,0 +1,32 @@
+# Generated by Django 5.2.11 on 2026-10-18 18:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("record", "0018_himoku_is_unbilled_income"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="claimdata",
+            index=models.Index(fields=["claim_type", "claim_date"], name="claimdata_type_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["transaction_date", "is_income", "calc_flg"], name="transaction_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                condition=models.Q(("is_manualinput", False)),
+                fields=["transaction_date", "is_income"],
+                name="transaction_kurasel_idx",
+            ),
+        ),
+    ]
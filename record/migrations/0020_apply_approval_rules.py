@@ -0,0 +1,35 @@
+import logging
+import re
+
+from django.db import migrations
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+
+def apply_approval_rules(apps, schema_editor):
+    """既存の出金データに支払い承認の要否を反映する（Transaction.apply_approval_rules()と同じ処理）
+    - これまでは支払い承認チェック画面の表示時に、表示した月だけを更新していた。
+    """
+    Transaction = apps.get_model("record", "Transaction")
+    ApprovalCheckData = apps.get_model("record", "ApprovalCheckData")
+    condition = Q(himoku__is_approval=False)
+    qs = ApprovalCheckData.objects.filter(alive=True).exclude(atext__isnull=True).exclude(atext="")
+    for atext in qs.values_list("atext", flat=True):
+        try:
+            re.compile(atext)
+        except re.error:
+            logger.warning(f"ApprovalCheckData pattern error: {atext}")
+            continue
+        condition |= Q(description__regex=atext)
+    Transaction.objects.filter(condition, is_income=False, is_approval=True).update(is_approval=False)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("record", "0019_transaction_claimdata_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(apply_approval_rules, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.11 on 2026-10-18 18:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('record', '0021_import_batch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='日付')),
+                ('deposit', models.IntegerField(default=0, verbose_name='入金')),
+                ('withdrawal', models.IntegerField(default=0, verbose_name='出金')),
+                ('balance', models.IntegerField(verbose_name='残高')),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='record.account', verbose_name='口座名')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('account', 'date'), name='accountbalance_account_date_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.11 on 2026-10-18 19:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("record", "0022_account_balance"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transaction",
+            name="updated_date",
+            field=models.DateTimeField(blank=True, null=True, verbose_name="更新日時"),
+        ),
+    ]
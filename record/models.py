@@ -1,12 +1,20 @@
+import contextlib
 import datetime
 import logging
 import re
+import threading
 
-from common.services import select_period
+from common.cache import cached_master
+from common.ledger_version import bump_all, bump_period
+from common.period import Period
+from common.querysets import PeriodQuerySet, TotalsQuerySet
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db import transaction as db_transaction
 from django.db.models import Sum
+from django.db.models.functions import Coalesce
+from django.dispatch import receiver
 from django.utils import timezone
 
 user = get_user_model()
@@ -59,6 +67,7 @@ class AccountingClass(models.Model):
         return self.accounting_name
 
     @classmethod
+    @cached_master("record.AccountingClass")
     def get_accountingclass_obj(cls, accounting_class_name):
         """会計区分名からそのオブジェクトを返す
         例えば、町内会会計の項目を除く場合は下記のようにする。
@@ -69,6 +78,7 @@ class AccountingClass(models.Model):
         return qs
 
     @classmethod
+    @cached_master("record.AccountingClass")
     def get_accountingclass_name(cls, ac_pk) -> str:
         try:
             qs = cls.objects.get(pk=ac_pk)
@@ -79,6 +89,7 @@ class AccountingClass(models.Model):
         return ac_name
 
     @classmethod
+    @cached_master("record.AccountingClass")
     def get_class_name(cls, shortname):
         """概略名から推測した管理費会計の会計区分名を返す"""
         try:
@@ -173,6 +184,30 @@ class Himoku(models.Model):
         return qs
 
     @classmethod
+    def get_himoku_dict(cls, himoku_names, ac_class):
+        """費目名のリストから{費目名: 費目オブジェクト}のdictを1回のクエリで返す
+        - get_himoku_obj()の一括版。費目名が存在しない場合は含めない。
+        - 同じ費目名が複数ある場合はデフォルト費目とする。
+        """
+        qs = cls.objects.filter(
+            alive=True,
+            himoku_name__in=set(himoku_names),
+            accounting_class__accounting_name__contains=ac_class,
+        )
+        himoku_dict = {}
+        duplicated_names = set()
+        for obj in qs:
+            if obj.himoku_name in himoku_dict:
+                duplicated_names.add(obj.himoku_name)
+            himoku_dict[obj.himoku_name] = obj
+        if duplicated_names:
+            default_himoku = cls.get_default_himoku()
+            for name in duplicated_names:
+                himoku_dict[name] = default_himoku
+        return himoku_dict
+
+    @classmethod
+    @cached_master("record.Himoku")
     def get_default_himoku(cls):
         """デフォルト費目オブジェクトを返す。
         - 前提として、default費目が「収入」「支出」でそれぞれ1つだけ設定されている。
@@ -189,6 +224,7 @@ class Himoku(models.Model):
             return None
 
     @classmethod
+    @cached_master("record.Himoku", "record.AccountingClass")
     def get_himoku_list(cls, ac_class_name=None):
         """有効な費目名をリストで返す"""
         himoku_list = []
@@ -259,6 +295,27 @@ class TransferRequester(models.Model):
         return obj_list
 
 
+class TransactionQuerySet(PeriodQuerySet, TotalsQuerySet):
+    """取引明細データのQuerySet
+    - deposit/withdrawals: 入金/出金の合計。
+    - calc_deposit/calc_withdrawals: calc_flgがONの入金/出金の合計。
+    - net_deposit: calc_flgがONで前受金でない入金の合計。月次収入チェック用。
+    - maeukekin: 前受金の合計。
+    - approval_withdrawals: 支払い承認が必要な出金の合計。支払い承認チェック用。
+    """
+
+    totals_spec = {
+        "deposit": {"is_income": True},
+        "withdrawals": {"is_income": False},
+        "calc_deposit": {"calc_flg": True, "is_income": True},
+        "calc_withdrawals": {"calc_flg": True, "is_income": False},
+        "net_deposit": {"calc_flg": True, "is_income": True, "is_maeukekin": False},
+        "maeukekin": {"is_maeukekin": True},
+        "approval_withdrawals": {"is_income": False, "is_approval": True},
+    }
+    period_field = "transaction_date"
+
+
 class Transaction(models.Model):
     """取引明細データ
     費目が明確でないので、入出金を区別するフィールドが必要。
@@ -291,6 +348,34 @@ class Transaction(models.Model):
     is_mishuukin = models.BooleanField(verbose_name="未収金", default=False)
     # 「前期の未払い分」フラグを追加。（2025-01-18）
     is_miharai = models.BooleanField(verbose_name="未払金支払い", default=False)
+    # 登録後に変更した日時（取り込みの取り消しで、取り込み後に変更されたデータを確認するため）
+    updated_date = models.DateTimeField(verbose_name="更新日時", null=True, blank=True)
+    # Kuraselからの取り込みで登録・更新したバッチ（取り込みの取り消しに使う）
+    import_batch = models.ForeignKey(
+        "kurasel_translator.ImportBatch",
+        verbose_name="取り込みバッチ",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+
+    objects = TransactionQuerySet.as_manager()
+
+    class Meta:
+        """インデックス
+        - get_qs_pb()の期間(in_period)と入出金・計算対象フラグでの抽出用。
+        - Kuraselの入出金明細データ(手入力以外)だけを抽出する場合は部分インデックスを使う。
+        """
+
+        indexes = [
+            models.Index(fields=["transaction_date", "is_income", "calc_flg"], name="transaction_date_idx"),
+            models.Index(
+                fields=["transaction_date", "is_income"],
+                condition=models.Q(is_manualinput=False),
+                name="transaction_kurasel_idx",
+            ),
+        ]
 
     def __str__(self):
         if self.himoku:
@@ -302,59 +387,8 @@ class Transaction(models.Model):
         """通帳データの前受金(is_maeukekinフラグがon)合計を返す
         他の関数（stattic method）に依存するため、インスタンス関数とする。
         """
-        tstart, tend = select_period(year, month)
-        total = 0
-        qs = Transaction.objects.filter(transaction_date__range=[tstart, tend]).filter(is_maeukekin=True)
-        for i in qs:
-            total += i.amount
-        return total
-
-    @staticmethod
-    def total_all(sql):
-        """calc_flgがONの合計金額を返す"""
-        total_deposit = 0
-        total_withdrawals = 0
-        for data in sql:
-            # 収入項目で前受金でない場合、収入合計計算する。月次収入チェック用。
-            if data.is_income:
-                total_deposit += data.amount
-            # 収入項目で
-            else:
-                total_withdrawals += data.amount
-        return total_deposit, total_withdrawals
-
-    @staticmethod
-    def total_with_calc_flg(sql):
-        """calc_flgがONの合計金額を返す"""
-        total_deposit = 0
-        total_withdrawals = 0
-        for data in sql:
-            if data.calc_flg:
-                # 収入項目で前受金でない場合、収入合計計算する。月次収入チェック用。
-                if data.is_income:
-                    total_deposit += data.amount
-                # 収入項目で
-                else:
-                    total_withdrawals += data.amount
-        return total_deposit, total_withdrawals
-
-    @staticmethod
-    def total_without_calc_flg(sql):
-        """calc_flgがONの合計金額を返す
-        - 収入の場合は前受金を除外した通帳データの合計を返す
-        - 支出の場合はcalc_flgがONの支出合計を返す
-        """
-        total_deposit = 0
-        total_withdrawals = 0
-        for data in sql:
-            if data.calc_flg:
-                # 収入項目で前受金でない場合、収入合計計算する。月次収入チェック用。
-                if data.is_income and not data.is_maeukekin:
-                    total_deposit += data.amount
-                # 収入項目で
-                else:
-                    total_withdrawals += data.amount
-        return total_deposit, total_withdrawals
+        qs = Transaction.objects.in_period(Period.of(year, month)).filter(is_maeukekin=True)
+        return qs.totals()["maeukekin"]
 
     @classmethod
     def get_qs_pb(cls, tstart, tend, account, ac_class, deposit_flg, manualinput, calc_flg):
@@ -371,9 +405,9 @@ class Transaction(models.Model):
         qs_pb = cls.objects.all().select_related("himoku")
         # 補正データを含める場合は手入力filterをしない。
         if manualinput:
-            qs_pb = qs_pb.filter(transaction_date__range=[tstart, tend])
+            qs_pb = qs_pb.in_period(Period.between(tstart, tend))
         else:
-            qs_pb = qs_pb.filter(transaction_date__range=[tstart, tend]).filter(is_manualinput=False)
+            qs_pb = qs_pb.in_period(Period.between(tstart, tend)).filter(is_manualinput=False)
         # 入金・出金のfilter
         if deposit_flg == "income":
             qs_pb = qs_pb.filter(is_income=True)
@@ -390,20 +424,51 @@ class Transaction(models.Model):
             qs_pb = qs_pb.filter(calc_flg=calc_flg)
         return qs_pb
 
+    @staticmethod
+    def is_approval_required(himoku, description, pattern=None):
+        """出金データの支払い承認が必要かどうかを返す
+        - 費目の支払い承認フラグがOFFの場合は不要。
+        - 摘要欄が承認不要のチェック文字列のいずれかに一致する場合は不要。
+        - pattern: ApprovalCheckData.get_pattern()の戻り値（Noneの場合は取得する）。
+        """
+        if himoku is not None and not himoku.is_approval:
+            return False
+        if pattern is None:
+            pattern = ApprovalCheckData.get_pattern()
+        return pattern is None or not pattern.search(description or "")
+
+    @classmethod
+    def apply_approval_rules(cls, qs=None):
+        """支払い承認が不要な出金データの承認フラグ(is_approval)をOFFにする
+        - 条件はis_approval_required()と同じ。qsがNoneの場合は全期間を対象とする。
+        - 費目の承認フラグがOFFのデータは1回のUPDATEで、摘要欄のチェックは取り込み時と同じ
+          正規表現で判定して、承認フラグが変わるデータだけを主キー指定でUPDATEする。
+        - 承認フラグは入出金明細の修正画面でも変更するため、ONに戻す処理はしない。
+        - 戻り値: 更新件数
+        """
+        if qs is None:
+            qs = cls.objects.all()
+        qs = qs.filter(is_income=False, is_approval=True)
+        updated = qs.filter(himoku__is_approval=False).update(is_approval=False)
+
+        pattern = ApprovalCheckData.get_pattern()
+        if pattern is not None:
+            rows = qs.exclude(description="").values_list("pk", "description").iterator(chunk_size=2000)
+            pks = [pk for pk, description in rows if pattern.search(description)]
+            for i in range(0, len(pks), 500):
+                updated += cls.objects.filter(pk__in=pks[i : i + 500]).update(is_approval=False)
+        if updated:
+            bump_all()
+        return updated
+
     @classmethod
-    def set_is_approval_himoku(cls, qs_transaction):
-        """費目で支払い承認が必要かどうかのフラグを設定する
-        - ToDo 今の所「費目」で支払い承認不要としていてもチェックをする。
+    def apply_approval_rules_on_commit(cls, *pks):
+        """指定したデータの承認フラグを、コミット後にapply_approval_rules()で更新する
+        - 費目・摘要を変更・作成した書き込み処理（修正画面、相殺・分割）で使う。
         """
-        # 入出金明細データでループ
-        for qs_data in qs_transaction:
-            is_approval = qs_data.himoku.is_approval
-            if is_approval is False:
-                pk = qs_data.id
-                obj = cls.objects.get(pk=pk)
-                obj.is_approval = False
-                obj.save()
-        return None
+        pks = [pk for pk in pks if pk]
+        if pks:
+            db_transaction.on_commit(lambda: cls.apply_approval_rules(cls.objects.filter(pk__in=pks)))
 
     @classmethod
     def get_year_income(cls, tstart, tend, manualinput):
@@ -419,9 +484,9 @@ class Transaction(models.Model):
         qs_pb = qs_pb.filter(is_income=True)
         # 補正データを含める場合はfilterをしない。
         if manualinput:
-            qs_pb = qs_pb.filter(transaction_date__range=[tstart, tend])
+            qs_pb = qs_pb.in_period(Period.between(tstart, tend))
         else:
-            qs_pb = qs_pb.filter(transaction_date__range=[tstart, tend]).filter(is_manualinput=False)
+            qs_pb = qs_pb.in_period(Period.between(tstart, tend)).filter(is_manualinput=False)
         # 計算フラグでfilterする
         qs_pb = qs_pb.filter(calc_flg=True)
         qs_pb = qs_pb.filter(himoku__aggregate_flag=True)
@@ -439,7 +504,7 @@ class Transaction(models.Model):
         # 出金だけを抽出
         qs_pb = qs_pb.filter(is_income=False)
         # 抽出期間。
-        qs_pb = qs_pb.filter(transaction_date__range=[tstart, tend])
+        qs_pb = qs_pb.in_period(Period.between(tstart, tend))
         # 資金移動（計算フラグOFF）を除外
         qs_pb = qs_pb.filter(calc_flg=True)
         # 前期の未払い分は除外
@@ -449,6 +514,156 @@ class Transaction(models.Model):
         return qs_pb
 
 
+# 口座の日毎残高の再計算をまとめて行うブロック（AccountBalance.deferred()）の変更（スレッド毎）
+_balance_changes = threading.local()
+
+
+class AccountBalanceQuerySet(PeriodQuerySet):
+    """口座の日毎残高のQuerySet"""
+
+    period_field = "date"
+
+
+class AccountBalance(models.Model):
+    """口座の日毎の残高（入出金明細データから計算して保持する）
+    - 入出金のあった日だけ行を持ち、balanceはその日の最終残高。
+    - 残高は口座の開始日(start_day)の最終残高を開始残高(start_amount)として、開始日の翌日以降の入金を足し、
+      出金を引いたもの。開始日が未設定の場合は、全期間の入出金を0から積み上げる。
+    - 入出金明細データの登録・変更・削除では、変更のあった最も古い日から後の行だけを計算し直す。
+    - ある日の残高は、その日以前の最後の1行を(口座, 日付)のインデックスで読むだけで得られる(balance_at)。
+    """
+
+    account = models.ForeignKey(Account, verbose_name="口座名", on_delete=models.CASCADE, related_name="+")
+    date = models.DateField(verbose_name="日付")
+    deposit = models.IntegerField(verbose_name="入金", default=0)
+    withdrawal = models.IntegerField(verbose_name="出金", default=0)
+    balance = models.IntegerField(verbose_name="残高")
+
+    objects = AccountBalanceQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["account", "date"], name="accountbalance_account_date_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.balance}"
+
+    @classmethod
+    def recalc(cls, account_id, start):
+        """口座のstart（変更のあった最も古い日）以降の日毎残高を計算し直す
+        - 戻り値: 計算し直した行数
+        """
+        start_day, start_amount = Account.objects.values_list("start_day", "start_amount").get(pk=account_id)
+        # 開始日以前の入出金は残高に含めない
+        first_day = start_day + datetime.timedelta(days=1) if start_day else datetime.date.min
+        rows = cls.objects.filter(account_id=account_id)
+        with db_transaction.atomic():
+            balance = rows.filter(date__lt=start).order_by("-date").values_list("balance", flat=True).first()
+            if balance is None or start < first_day:
+                # 前日までの行が無い場合（計算していない口座など）は、開始日の翌日から計算する
+                start, balance = first_day, start_amount or 0
+                rows.filter(date__lt=start).delete()
+            daily = (
+                Transaction.objects.filter(account_id=account_id, transaction_date__gte=start)
+                .order_by("transaction_date")
+                .values("transaction_date")
+                .annotate(
+                    deposit=Coalesce(Sum("amount", filter=models.Q(is_income=True)), 0),
+                    withdrawal=Coalesce(Sum("amount", filter=models.Q(is_income=False)), 0),
+                )
+            )
+            objs = []
+            for day in daily:
+                balance += day["deposit"] - day["withdrawal"]
+                objs.append(
+                    cls(
+                        account_id=account_id,
+                        date=day["transaction_date"],
+                        deposit=day["deposit"],
+                        withdrawal=day["withdrawal"],
+                        balance=balance,
+                    )
+                )
+            rows.filter(date__gte=start).delete()
+            cls.objects.bulk_create(objs, batch_size=1000)
+        # 後の月の残高も変わるため、表示のキャッシュを更新する
+        if objs:
+            bump_period(objs[0].date, objs[-1].date)
+        return len(objs)
+
+    @classmethod
+    def rebuild(cls, account_id=None):
+        """口座（Noneの場合は全口座）の日毎残高を全期間計算し直す"""
+        account_ids = [account_id] if account_id else Account.objects.values_list("pk", flat=True)
+        return sum(cls.recalc(pk, datetime.date.min) for pk in account_ids)
+
+    @classmethod
+    def changed(cls, account_id, date):
+        """入出金明細データの変更を通知する（deferred()のブロック内では、ブロックの終わりにまとめて再計算する）"""
+        if account_id is None or date is None:
+            return
+        changes = getattr(_balance_changes, "changes", None)
+        if changes is None:
+            cls.recalc(account_id, date)
+        else:
+            changes[account_id] = min(date, changes.get(account_id, date))
+
+    @classmethod
+    @contextlib.contextmanager
+    def deferred(cls):
+        """ブロック内の入出金明細データの変更による再計算を、ブロックの終わりに口座毎に1回だけ行う
+        - 例外で終わった場合は再計算しない（atomicのブロック内で使う）。
+        """
+        if getattr(_balance_changes, "changes", None) is not None:
+            yield
+            return
+        changes = _balance_changes.changes = {}
+        try:
+            yield
+        finally:
+            _balance_changes.changes = None
+        for account_id, date in changes.items():
+            cls.recalc(account_id, date)
+
+    @classmethod
+    def balance_at(cls, account, date):
+        """口座の指定日の最終残高を返す（開始日より前の日付はNone）"""
+        balance = (
+            cls.objects.filter(account=account, date__lte=date)
+            .order_by("-date")
+            .values_list("balance", flat=True)
+            .first()
+        )
+        if balance is not None:
+            return balance
+        if account.start_day and date < account.start_day:
+            return None
+        return account.start_amount or 0
+
+    @classmethod
+    def total_at(cls, date):
+        """有効な全口座の指定日の最終残高の合計を返す（残高が分かる口座が無い場合はNone）"""
+        balances = [cls.balance_at(account, date) for account in Account.objects.filter(alive=True)]
+        balances = [b for b in balances if b is not None]
+        return sum(balances) if balances else None
+
+
+# 番号による後方参照（\1、(?(1)...)）
+# - エスケープした「\\」の後の数字にも一致するが、個別の正規表現での判定になるだけで結果は変わらない。
+_NUMBERED_GROUPREF = re.compile(r"\\[1-9]|\(\?\(\d")
+
+
+class _AnyPattern:
+    """正規表現のリストを1つの正規表現と同じように使う（いずれかに一致するか）"""
+
+    def __init__(self, patterns):
+        self.patterns = patterns
+
+    def search(self, text):
+        return next((m for p in self.patterns if (m := p.search(text))), None)
+
+
 class ApprovalCheckData(models.Model):
     """入出金明細データの「支払い承認」が必要か否かを判定するための文字列オブジェクト"""
 
@@ -459,6 +674,46 @@ class ApprovalCheckData(models.Model):
     def __str__(self):
         return self.atext
 
+    @classmethod
+    @cached_master("record.approvalcheckdata")
+    def get_patterns(cls):
+        """有効なチェック文字列をコンパイル済みの正規表現のリストで返す
+        - 正規表現として不正な文字列はログに記録して除外する。
+        """
+        patterns = []
+        qs = cls.objects.filter(alive=True).exclude(atext__isnull=True).exclude(atext="")
+        for atext in qs.order_by("pk").values_list("atext", flat=True):
+            try:
+                patterns.append(re.compile(atext))
+            except re.error:
+                logger.warning(f"ApprovalCheckData pattern error: {atext}")
+        return patterns
+
+    @classmethod
+    @cached_master("record.approvalcheckdata")
+    def get_pattern(cls):
+        """有効なチェック文字列を1つの選択(|)にまとめた正規表現を返す（チェック文字列が無い場合はNone）
+        - チェック文字列の変更まで、コンパイル済みの正規表現をプロセス内で再利用する。
+        - 取り込み時の判定(is_approval_required)と一括更新(apply_approval_rules)で共用する。
+        - まとめるとグループ番号がずれるため、番号による後方参照（\\1、(?(1)...)）がある場合と、
+          グループ名の重複などでコンパイルできない場合は、個別の正規表現で判定する。
+        """
+        patterns = cls.get_patterns()
+        if not patterns:
+            return None
+        if any(_NUMBERED_GROUPREF.search(p.pattern) for p in patterns):
+            return _AnyPattern(patterns)
+        try:
+            return re.compile("|".join(f"(?:{p.pattern})" for p in patterns))
+        except re.error:
+            return _AnyPattern(patterns)
+
+
+class ClaimDataQuerySet(PeriodQuerySet, TotalsQuerySet):
+    """請求データのQuerySet"""
+
+    period_field = "claim_date"
+
 
 class ClaimData(models.Model):
     """管理費等請求一覧データ"""
@@ -474,6 +729,26 @@ class ClaimData(models.Model):
     name = models.CharField(verbose_name="氏名", max_length=16, default="")
     amount = models.IntegerField(verbose_name="金額", default=0)
     comment = models.CharField(verbose_name="摘要", max_length=64, default="")
+    # Kuraselからの取り込みで登録・更新したバッチ（取り込みの取り消しに使う）
+    import_batch = models.ForeignKey(
+        "kurasel_translator.ImportBatch",
+        verbose_name="取り込みバッチ",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+
+    objects = ClaimDataQuerySet.as_manager()
+
+    class Meta:
+        """インデックス
+        - get_claim_list()の請求種別と期間での抽出用。
+        """
+
+        indexes = [
+            models.Index(fields=["claim_type", "claim_date"], name="claimdata_type_date_idx"),
+        ]
 
     def __str__(self):
         return self.claim_type
@@ -482,6 +757,8 @@ class ClaimData(models.Model):
     def claim_from_kurasel(cls, data):
         """管理費等請求一覧データを保存処理する
         - 取り込む前に同じ年月、同じ請求種別のデータを削除することで重複登録を防止する
+        - data["data_list"]は請求データのレコード（kurasel_translatorのClaimRecord）のリスト。
+        - data["import_batch"]: 登録するデータに設定する取り込みバッチ（省略可）。
         """
         # 支払日
         date_str = str(data["year"]) + str(data["month"]).zfill(2) + "01"
@@ -498,16 +775,26 @@ class ClaimData(models.Model):
                 cls.objects.create(
                     claim_date=claim_date,
                     claim_type=claim_type,
-                    room_no=item[1],
-                    name=item[2],
-                    amount=item[3],
+                    room_no=item.room_no,
+                    name=item.name,
+                    amount=item.amount,
+                    import_batch=data.get("import_batch"),
                 )
             except Exception as e:
                 logger.error(e)
-                error_list.append(item[0])
+                error_list.append(item.no)
                 rtn = False
         return rtn, error_list
 
+    @classmethod
+    def get_kurasel_amounts(cls, year, month, claim_type):
+        """年月・請求種別の登録済みデータの{(部屋番号, 氏名): 金額}を返す（確認モードの差分表示用）"""
+        claim_date = datetime.date(int(year), int(month), 1)
+        qs = cls.objects.filter(claim_date=claim_date, claim_type=claim_type)
+        return {
+            (room_no, name): amount for room_no, name, amount in qs.values_list("room_no", "name", "amount")
+        }
+
     @classmethod
     def get_maeuke_claim(cls, year, month):
         """指定された年月に使われる前受金dictのリストを返す"""
@@ -549,12 +836,69 @@ class ClaimData(models.Model):
         """管理費等の請求時「未収金」「前受金」「請求不備」のリストを返す"""
 
         claim_qs = (
-            cls.objects.filter(claim_date__range=[tstart, tend])
+            cls.objects.in_period(Period.between(tstart, tend))
             .filter(claim_type=claim_type)
             .order_by("claim_date")
         )
-        total = 0
-        for i in claim_qs:
-            total += i.amount
+        return claim_qs, claim_qs.totals()["total"]
+
+
+@receiver(models.signals.post_save, sender=ApprovalCheckData)
+def post_save_approval_check_handler(sender, instance, **kwargs):
+    """承認不要のチェック文字列が登録・変更されたら、コミット後に全期間の承認フラグを一括更新する"""
+    db_transaction.on_commit(Transaction.apply_approval_rules)
+
+
+@receiver(models.signals.post_save, sender=Himoku)
+def post_save_himoku_handler(sender, instance, **kwargs):
+    """費目の支払い承認フラグがOFFなら、コミット後にその費目の承認フラグを一括更新する"""
+    if not instance.is_approval:
+        himoku_id = instance.pk
+        db_transaction.on_commit(
+            lambda: Transaction.apply_approval_rules(Transaction.objects.filter(himoku_id=himoku_id))
+        )
+
+
+@receiver(models.signals.pre_save, sender=Transaction)
+def pre_save_transaction_handler(sender, instance, raw=False, **kwargs):
+    """変更前の口座・取引日・金額・入出金を保持する（日毎残高の再計算用）
+    - 登録済みのデータの変更では、更新日時を設定する。
+    """
+    instance._balance_old = None
+    if raw or instance.pk is None:
+        return
+    instance.updated_date = timezone.now()
+    instance._balance_old = (
+        sender.objects.filter(pk=instance.pk)
+        .values_list("account_id", "transaction_date", "amount", "is_income")
+        .first()
+    )
+
 
-        return claim_qs, total
+@receiver(models.signals.post_save, sender=Transaction)
+def post_save_transaction_handler(sender, instance, raw=False, **kwargs):
+    """入出金明細データの登録・変更で、変更前後の口座の日毎残高を変更のあった日から計算し直す"""
+    if raw:
+        return
+    date = sender._meta.get_field("transaction_date").to_python(instance.transaction_date)
+    new = (instance.account_id, date, int(instance.amount), instance.is_income)
+    old = getattr(instance, "_balance_old", None)
+    if old == new:
+        return
+    with AccountBalance.deferred():
+        AccountBalance.changed(instance.account_id, date)
+        if old:
+            AccountBalance.changed(old[0], old[1])
+
+
+@receiver(models.signals.post_delete, sender=Transaction)
+def post_delete_transaction_handler(sender, instance, **kwargs):
+    """入出金明細データの削除で、口座の日毎残高を削除した日から計算し直す"""
+    AccountBalance.changed(instance.account_id, instance.transaction_date)
+
+
+@receiver(models.signals.post_save, sender=Account)
+def post_save_account_handler(sender, instance, raw=False, **kwargs):
+    """口座の開始日・開始残高が変わる場合があるため、口座の日毎残高を全期間計算し直す"""
+    if not raw:
+        AccountBalance.rebuild(instance.pk)
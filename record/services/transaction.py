@@ -2,7 +2,7 @@ import logging
 
 from django.db import transaction as db_transaction
 
-from record.models import Account, Himoku, Transaction
+from record.models import Account, AccountBalance, Himoku, Transaction
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +12,8 @@ def create_offset_transaction(*, base_transaction, user):
     相殺用トランザクションを作成する
     - 引数に*を置くことでキーワード引数のみを受け付けるようにする。
     - 相殺処理は元データの金額のマイナスを登録する。
+    - 口座の日毎残高は、保存時のシグナルで取引日から計算し直す。
+    - 支払い承認の要否は、コミット後に摘要（「（相殺）」付き）で判定する。
     """
     offset = Transaction(
         account=base_transaction.account,
@@ -29,6 +31,7 @@ def create_offset_transaction(*, base_transaction, user):
 
     offset.save()
 
+    Transaction.apply_approval_rules_on_commit(offset.pk)
     logger.info(f"相殺作成: 元PK={base_transaction.pk} 新PK={offset.pk} by {user}")
     return offset
 
@@ -37,6 +40,8 @@ def create_divided_transactions(*, base_transaction, divide_forms, user):
     """
     分割トランザクションを作成する
     - *をつけることでキーワード引数のみを受け付けるようにする
+    - 口座の日毎残高は、全ての分割データを保存した後に1回だけ計算し直す。
+    - 支払い承認の要否は、コミット後に分割データの費目・摘要で判定する。
     """
     base_amount = -base_transaction.amount
 
@@ -51,7 +56,7 @@ def create_divided_transactions(*, base_transaction, divide_forms, user):
 
     created = []
 
-    with db_transaction.atomic():
+    with db_transaction.atomic(), AccountBalance.deferred():
         # formにはformsetがセットされているので、繰り返し処理する。
         for form in divide_forms:
             amount = form.cleaned_data.get("amount")
@@ -77,4 +82,6 @@ def create_divided_transactions(*, base_transaction, divide_forms, user):
 
             logger.info(f"分割作成: basePK={base_transaction.pk} amount={amount} by {user}")
 
+        Transaction.apply_approval_rules_on_commit(*(tx.pk for tx in created))
+
     return created
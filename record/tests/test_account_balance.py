@@ -0,0 +1,94 @@
+# record/tests/test_account_balance.py
+import datetime
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from record.models import Account, AccountBalance, AccountingClass, Bank, Himoku, Transaction
+from record.services.transaction import create_divided_transactions, create_offset_transaction
+
+User = get_user_model()
+d = datetime.date
+
+
+class AccountBalanceTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="pass")
+        ac = AccountingClass.objects.create(code=1, accounting_name="管理費会計")
+        self.himoku = Himoku.objects.create(code=1, himoku_name="修繕費", accounting_class=ac)
+        bank = Bank.objects.create(code="0001", bank_name="銀行")
+        self.account = Account.objects.create(
+            account_name="口座",
+            account_number="1234567",
+            bank=bank,
+            start_day=d(2024, 3, 31),
+            start_amount=10000,
+        )
+
+    def _create(self, date, amount, is_income=False):
+        return Transaction.objects.create(
+            transaction_date=date,
+            account=self.account,
+            himoku=self.himoku,
+            amount=amount,
+            is_income=is_income,
+            author=self.user,
+        )
+
+    def _balances(self):
+        return list(AccountBalance.objects.order_by("date").values_list("date", "balance"))
+
+    def test_incremental_updates(self):
+        self._create(d(2024, 4, 1), 5000, is_income=True)
+        obj = self._create(d(2024, 5, 10), 3000)
+        self._create(d(2024, 6, 1), 1000)
+        self.assertEqual(
+            self._balances(), [(d(2024, 4, 1), 15000), (d(2024, 5, 10), 12000), (d(2024, 6, 1), 11000)]
+        )
+
+        # 日付の変更は、変更前後の古い方の日から計算し直す
+        obj.transaction_date = d(2024, 6, 1)
+        obj.save()
+        self.assertEqual(self._balances(), [(d(2024, 4, 1), 15000), (d(2024, 6, 1), 11000)])
+        self.assertEqual(AccountBalance.objects.get(date=d(2024, 6, 1)).withdrawal, 4000)
+
+        obj.delete()
+        self.assertEqual(self._balances(), [(d(2024, 4, 1), 15000), (d(2024, 6, 1), 14000)])
+
+        # 開始日以前の入出金は含めない
+        self._create(d(2024, 3, 1), 999)
+        self.assertEqual(self._balances(), [(d(2024, 4, 1), 15000), (d(2024, 6, 1), 14000)])
+
+    def test_offset_and_divide(self):
+        base = self._create(d(2024, 5, 10), 3000)
+        offset = create_offset_transaction(base_transaction=base, user=self.user)
+        self.assertEqual(self._balances(), [(d(2024, 5, 10), 10000)])
+
+        forms = [
+            SimpleNamespace(cleaned_data={"amount": a, "requesters_name": "", "description": "分割"})
+            for a in (1000, 2000)
+        ]
+        with mock.patch.object(AccountBalance, "recalc", wraps=AccountBalance.recalc) as recalc:
+            create_divided_transactions(base_transaction=offset, divide_forms=forms, user=self.user)
+        # 分割データの保存毎ではなく、最後に1回だけ計算し直す
+        recalc.assert_called_once_with(self.account.pk, d(2024, 5, 10))
+        self.assertEqual(self._balances(), [(d(2024, 5, 10), 7000)])
+
+    def test_balance_at_and_total_at(self):
+        self._create(d(2024, 4, 1), 5000, is_income=True)
+        self._create(d(2024, 5, 10), 3000)
+        self.assertIsNone(AccountBalance.balance_at(self.account, d(2024, 3, 1)))
+        self.assertEqual(AccountBalance.balance_at(self.account, d(2024, 3, 31)), 10000)
+        self.assertEqual(AccountBalance.balance_at(self.account, d(2024, 4, 30)), 15000)
+        self.assertEqual(AccountBalance.total_at(d(2024, 5, 31)), 12000)
+
+        # 開始日・開始残高の変更で全期間を計算し直す
+        self.account.start_day, self.account.start_amount = d(2024, 4, 1), 0
+        self.account.save()
+        self.assertEqual(self._balances(), [(d(2024, 5, 10), -3000)])
+
+        AccountBalance.objects.all().delete()
+        AccountBalance.rebuild()
+        self.assertEqual(self._balances(), [(d(2024, 5, 10), -3000)])
@@ -0,0 +1,128 @@
+# record/tests/test_approval_rules.py
+import re
+from types import SimpleNamespace
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from record.models import AccountingClass, ApprovalCheckData, Himoku, Transaction
+from record.services.transaction import create_divided_transactions, create_offset_transaction
+
+
+class ApprovalRulesTest(TestCase):
+    """支払い承認の要否(is_approval)の一括更新のテスト"""
+
+    def setUp(self):
+        # チェック文字列の正規表現はプロセス内にキャッシュされる（テスト毎のロールバックでは無効にならない）
+        cache.clear()
+        self.ac = AccountingClass.objects.create(code=1, accounting_name="管理費会計")
+        self.himoku = Himoku.objects.create(code=1, himoku_name="委託費", accounting_class=self.ac)
+        self.other = Himoku.objects.create(code=2, himoku_name="修繕費", accounting_class=self.ac)
+
+    def _create(self, himoku, description, is_income=False):
+        return Transaction.objects.create(
+            transaction_date="2025-01-10",
+            amount=100,
+            himoku=himoku,
+            description=description,
+            is_income=is_income,
+        )
+
+    def test_check_data_saved(self):
+        expense = self._create(self.other, "電気料金 口座振替")
+        income = self._create(self.other, "電気料金", is_income=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            ApprovalCheckData.objects.create(atext="電気.*振替")
+
+        expense.refresh_from_db()
+        income.refresh_from_db()
+        self.assertFalse(expense.is_approval)
+        self.assertTrue(income.is_approval)
+
+    def test_himoku_approval_off(self):
+        target = self._create(self.himoku, "")
+        other = self._create(self.other, "")
+        self.himoku.is_approval = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.himoku.save()
+
+        target.refresh_from_db()
+        other.refresh_from_db()
+        self.assertFalse(target.is_approval)
+        self.assertTrue(other.is_approval)
+
+    def test_is_approval_required(self):
+        self.assertIsNone(ApprovalCheckData.get_pattern())
+        self.assertTrue(Transaction.is_approval_required(self.himoku, "振込"))
+        ApprovalCheckData.objects.create(atext="振込")
+        ApprovalCheckData.objects.create(atext="[不正", comment="不正な正規表現は無視する")
+        ApprovalCheckData.objects.create(atext="^電気")
+        self.assertEqual(len(ApprovalCheckData.get_patterns()), 2)
+        pattern = ApprovalCheckData.get_pattern()
+        self.assertIs(pattern, ApprovalCheckData.get_pattern())
+        self.assertFalse(Transaction.is_approval_required(self.himoku, "振込", pattern))
+        self.assertFalse(Transaction.is_approval_required(self.himoku, "電気料金", pattern))
+        self.assertTrue(Transaction.is_approval_required(self.himoku, "水道 電気", pattern))
+
+    def test_pattern_with_groups(self):
+        ApprovalCheckData.objects.create(atext=r"(デン)キ\1")
+        ApprovalCheckData.objects.create(atext="振込")
+        pattern = ApprovalCheckData.get_pattern()
+        self.assertTrue(pattern.search("デンキデン"))
+        self.assertTrue(pattern.search("振込"))
+        self.assertIsNone(pattern.search("デンキ"))
+
+    def test_pattern_with_plain_groups(self):
+        # 後方参照が無いグループは1つの正規表現にまとめる。グループ名の重複は個別に判定する
+        ApprovalCheckData.objects.create(atext="(電気|ガス)料金")
+        ApprovalCheckData.objects.create(atext="(?P<kind>振込)")
+        self.assertIsInstance(ApprovalCheckData.get_pattern(), re.Pattern)
+        ApprovalCheckData.objects.create(atext="(?P<kind>水道)")
+        pattern = ApprovalCheckData.get_pattern()
+        self.assertNotIsInstance(pattern, re.Pattern)
+        self.assertTrue(pattern.search("ガス料金"))
+        self.assertTrue(pattern.search("水道"))
+
+    def test_update_only_changed_rows(self):
+        changed = self._create(self.other, "電気料金 口座振替")
+        manual = self._create(self.other, "委託料")
+        ApprovalCheckData.objects.create(atext="電気.*振替")
+        self.assertEqual(Transaction.apply_approval_rules(), 1)
+        self.assertEqual(Transaction.apply_approval_rules(), 0)
+        changed.refresh_from_db()
+        manual.refresh_from_db()
+        self.assertFalse(changed.is_approval)
+        self.assertTrue(manual.is_approval)
+
+    def test_offset_and_divide(self):
+        ApprovalCheckData.objects.create(atext="電気")
+        # 分割データはデフォルト費目で作成し、承認フラグは分割データの摘要で判定する
+        Himoku.objects.create(code=3, himoku_name="不明", accounting_class=self.ac, is_default=True)
+        base = self._create(self.other, "委託料")
+        with self.captureOnCommitCallbacks(execute=True):
+            offset = create_offset_transaction(base_transaction=base, user=None)
+        offset.refresh_from_db()
+        self.assertTrue(offset.is_approval)
+
+        forms = [
+            SimpleNamespace(cleaned_data={"amount": 60, "requesters_name": "", "description": "電気料金"}),
+            SimpleNamespace(cleaned_data={"amount": 40, "requesters_name": "", "description": "委託料"}),
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            electric, other = create_divided_transactions(
+                base_transaction=offset, divide_forms=forms, user=None
+            )
+        electric.refresh_from_db()
+        other.refresh_from_db()
+        self.assertFalse(electric.is_approval)
+        self.assertTrue(other.is_approval)
+
+        # 修正画面などで費目を変更した場合も、コミット後に判定する
+        self.himoku.is_approval = False
+        self.himoku.save()
+        other.himoku = self.himoku
+        other.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            Transaction.apply_approval_rules_on_commit(other.pk)
+        other.refresh_from_db()
+        self.assertFalse(other.is_approval)
@@ -0,0 +1,99 @@
+# record/tests/test_query_plans.py
+import datetime
+import re
+
+from billing.models import Billing
+from common.period import Period
+from common.services import select_period
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase
+from monthly_report.models import BalanceSheet, ReportTransaction
+from monthly_report.services.monthly_report_services import get_monthly_report_queryset
+from payment.models import Payment
+
+from record.models import ClaimData, Transaction
+
+# 全件走査をしてはいけない取引系テーブル
+LEDGER_TABLES = [
+    Transaction._meta.db_table,
+    ClaimData._meta.db_table,
+    BalanceSheet._meta.db_table,
+    Payment._meta.db_table,
+    Billing._meta.db_table,
+    "monthly_report_reporttransaction",
+]
+
+
+class QueryPlanTest(TestCase):
+    """期間で抽出する主要なquerysetがインデックスを使うことを EXPLAIN QUERY PLAN で確認する"""
+
+    def setUp(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("EXPLAIN QUERY PLAN の出力形式はSQLite前提")
+        self.tstart = datetime.date(2025, 1, 1)
+        self.tend = datetime.date(2025, 1, 31)
+
+    def assertNoFullScan(self, qs):
+        plan = qs.explain()
+        for table in LEDGER_TABLES:
+            self.assertIsNone(
+                re.search(rf"\bSCAN {table}\b", plan),
+                f"{table} が全件走査になっている:\n{plan}\n{qs.query}",
+            )
+
+    def test_transaction_get_qs_pb(self):
+        for deposit_flg in ["income", "expense", ""]:
+            for manualinput in [True, False]:
+                with self.subTest(deposit_flg=deposit_flg, manualinput=manualinput):
+                    qs = Transaction.get_qs_pb(
+                        self.tstart, self.tend, "0", "0", deposit_flg, manualinput, True
+                    )
+                    self.assertNoFullScan(qs)
+
+    def test_monthly_report_queryset(self):
+        for inout_flg in ["income", "expense"]:
+            with self.subTest(inout_flg=inout_flg):
+                self.assertNoFullScan(get_monthly_report_queryset(self.tstart, self.tend, 0, inout_flg, True))
+
+    def test_balance_sheet_get_bs(self):
+        self.assertNoFullScan(BalanceSheet.get_bs(self.tstart, self.tend, 0, True))
+        self.assertNoFullScan(BalanceSheet.get_bs(self.tstart, self.tend, 1, False))
+
+    def test_claim_list(self):
+        qs, _ = ClaimData.get_claim_list(self.tstart, self.tend, settings.RECIVABLE)
+        self.assertNoFullScan(qs)
+
+    def test_payment_and_billing(self):
+        qs, _ = Payment.kurasel_get_payment(self.tstart, self.tend)
+        self.assertNoFullScan(qs)
+        self.assertNoFullScan(Billing.get_billing_data_qs(self.tstart, self.tend))
+
+    def test_year_month_filters(self):
+        # 旧: __year/__month（EXTRACT）、monthly_date__contains（LIKE）
+        self.assertNoFullScan(Payment.get_data_by_yearmonth(2025, 1))
+        self.assertNoFullScan(BalanceSheet.by_yearmonth(2025, 1, None))
+        self.assertNoFullScan(BalanceSheet.objects.in_period(Period.of(2025)))
+        self.assertNoFullScan(ReportTransaction.objects.in_period(Period.of(2025, 1)))
+
+
+class PeriodTest(TestCase):
+    """期間(Period)の計算のテスト"""
+
+    def test_bounds(self):
+        feb = Period.of("2024", "2")
+        self.assertEqual((feb.start, feb.end), (datetime.date(2024, 2, 1), datetime.date(2024, 3, 1)))
+        self.assertEqual(feb.last_day, datetime.date(2024, 2, 29))
+        self.assertIs(feb, Period.of(2024, 2))
+        self.assertEqual(Period.of(2024).end, datetime.date(2025, 1, 1))
+        self.assertEqual(Period.of(2024, 1).previous_month(), Period.of(2023, 12))
+        self.assertEqual(select_period(2024, 2), (feb.start, feb.last_day))
+        # 最終日は含み、翌月1日は含まない（datetimeは日付で判定する）
+        self.assertIn(datetime.datetime(2024, 2, 29, 23, 59), feb)
+        self.assertNotIn(datetime.date(2024, 3, 1), feb)
+        self.assertEqual(Period.between(datetime.datetime(2024, 2, 1), datetime.date(2024, 2, 29)), feb)
+
+    def test_in_period_is_half_open(self):
+        sql = str(Transaction.objects.in_period(Period.of(2024, 2)).query)
+        self.assertIn('"transaction_date" >= 2024-02-01', sql)
+        self.assertIn('"transaction_date" < 2024-03-01', sql)
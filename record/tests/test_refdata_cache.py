@@ -0,0 +1,53 @@
+# record/tests/test_refdata_cache.py
+from common.cache import get_versions
+from django.test import TestCase
+
+from record.forms import TransactionDisplayForm
+from record.models import AccountingClass, Himoku
+
+
+class RefdataCacheTest(TestCase):
+    """マスタデータのプロセス内キャッシュ(common.cache)のテスト"""
+
+    def setUp(self):
+        self.ac = AccountingClass.objects.create(code=1, accounting_name="管理費会計")
+        self.himoku = Himoku.objects.create(
+            code=999, himoku_name="不明", accounting_class=self.ac, is_default=True
+        )
+
+    def test_cached_until_saved(self):
+        self.assertEqual(Himoku.get_default_himoku(), self.himoku)
+        with self.assertNumQueries(0):
+            self.assertEqual(Himoku.get_default_himoku(), self.himoku)
+            self.assertEqual(Himoku.get_default_himoku().himoku_name, "不明")
+
+        # 保存するとバージョンが更新されて再取得する
+        self.himoku.himoku_name = "未分類"
+        self.himoku.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(Himoku.get_default_himoku().himoku_name, "未分類")
+
+    def test_bumped_again_after_commit(self):
+        # 他のスレッドがコミット前のデータを変更後のバージョンでキャッシュしても、コミット後に破棄する
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.himoku.save()
+        version = get_versions(["record.himoku"])
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(get_versions(["record.himoku"]), version)
+
+    def test_cached_by_args(self):
+        AccountingClass.objects.create(code=2, accounting_name="町内会会計")
+        self.assertEqual(AccountingClass.get_class_name("町内会"), "町内会会計")
+        with self.assertNumQueries(0):
+            self.assertEqual(AccountingClass.get_class_name("町内会"), "町内会会計")
+        self.assertEqual(AccountingClass.get_class_name("管理"), "管理費会計")
+
+    def test_choice_field(self):
+        str(TransactionDisplayForm()["himoku_id"])
+        with self.assertNumQueries(0):
+            html = str(TransactionDisplayForm()["himoku_id"])
+        self.assertIn("不明", html)
+
+        Himoku.objects.create(code=1, himoku_name="管理費", accounting_class=self.ac)
+        self.assertIn("管理費", str(TransactionDisplayForm()["himoku_id"]))
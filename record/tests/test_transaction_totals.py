@@ -0,0 +1,53 @@
+# record/tests/test_transaction_totals.py
+from django.test import TestCase
+
+from record.models import Transaction
+
+
+class TransactionTotalsTest(TestCase):
+    """TransactionQuerySet.totals() の単体テスト"""
+
+    def setUp(self):
+        rows = [
+            # (is_income, amount, calc_flg, is_maeukekin, is_approval)
+            (True, 1000, True, False, True),
+            (True, 300, True, True, True),
+            (True, 50, False, False, True),
+            (False, 700, True, False, True),
+            (False, 200, True, False, False),
+            (False, 10, False, False, True),
+        ]
+        for is_income, amount, calc_flg, is_maeukekin, is_approval in rows:
+            Transaction.objects.create(
+                transaction_date="2025-01-10",
+                is_income=is_income,
+                amount=amount,
+                calc_flg=calc_flg,
+                is_maeukekin=is_maeukekin,
+                is_approval=is_approval,
+            )
+        self.expected = {
+            "deposit": 1350,
+            "withdrawals": 910,
+            "calc_deposit": 1300,
+            "calc_withdrawals": 900,
+            "net_deposit": 1000,
+            "maeukekin": 300,
+            "approval_withdrawals": 710,
+        }
+
+    def test_totals_single_query(self):
+        with self.assertNumQueries(1):
+            totals = Transaction.objects.all().totals()
+        self.assertEqual(totals, self.expected)
+
+    def test_totals_reuse_fetched_rows(self):
+        qs = Transaction.objects.all()
+        list(qs)
+        with self.assertNumQueries(0):
+            totals = qs.totals()
+        self.assertEqual(totals, self.expected)
+
+    def test_totals_empty(self):
+        totals = Transaction.objects.none().totals()
+        self.assertEqual(totals["deposit"], 0)
@@ -18,6 +18,8 @@ urlpatterns = [
     path("claim_list/", views.ClaimDataListView.as_view(), name="claim_list"),
     # 前受金データチェック
     path("chk_maeuke/", views.CheckMaeukeDataView.as_view(), name="chk_maeuke"),
+    # 通帳残高チェック（口座の日毎残高）
+    path("account_balance/", views.AccountBalanceView.as_view(), name="account_balance"),
     # マスタデータ関係
     path("himoku_list/", views.HimokuListView.as_view(), name="himoku_list"),
     path("read_himoku_csv/", views.HimokuCsvReadView.as_view(), name="read_himoku_csv"),
@@ -1,6 +1,6 @@
 # viewsファイル分割する場合に必須
 from .approval import ApprovalTextCreateView, ApprovalTextUpdateView
-from .checks import CheckMaeukeDataView
+from .checks import AccountBalanceView, CheckMaeukeDataView
 from .claims import ClaimDataListView, ClaimdataUpdateView
 from .himoku import HimokuCreateView, HimokuCsvReadView, HimokuListView, HimokuUpdateView
 from .requester import TransferRequesterCreateView, TransferRequesterUpdateView
@@ -9,6 +9,7 @@ from .transaction_offset import TransactionDivideCreateView, TransactionOffsetCr
 from .transactions import TransactionListView, TransactionOriginalListView
 
 __all__ = [
+    "AccountBalanceView",
     "ApprovalTextCreateView",
     "ApprovalTextUpdateView",
     "CheckMaeukeDataView",
@@ -1,13 +1,19 @@
 import logging
 
-from common.services import select_period
+from common.mixins import PeriodParamMixin
+from common.period import Period
+from django.contrib import messages
 from django.contrib.auth.mixins import PermissionRequiredMixin
+from django.shortcuts import redirect
+from django.urls import reverse
 from django.utils import timezone
+from django.utils.http import urlencode
 from django.utils.timezone import localtime
 from django.views import generic
+from passbook.forms import YearMonthForm
 
-from record.forms import TransactionDisplayForm
-from record.models import Transaction
+from record.forms import RecalcBalanceForm, TransactionDisplayForm
+from record.models import Account, AccountBalance, Transaction
 
 logger = logging.getLogger(__name__)
 
@@ -25,13 +31,11 @@ class CheckMaeukeDataView(PermissionRequiredMixin, generic.TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         year = self.request.GET.get("year", localtime(timezone.now()).year)
-        # 抽出期間
-        tstart, tend = select_period(year, 0)
         # 期間と前受金フラグでfiler
         qs = (
             Transaction.objects.all()
             .select_related("account")
-            .filter(transaction_date__range=[tstart, tend])
+            .in_period(Period.of(year))
             .filter(is_maeukekin=True)
         )
         form = TransactionDisplayForm(
@@ -42,3 +46,54 @@ class CheckMaeukeDataView(PermissionRequiredMixin, generic.TemplateView):
         context["chk_obj"] = qs
         context["form"] = form
         return context
+
+
+class AccountBalanceView(PeriodParamMixin, PermissionRequiredMixin, generic.FormView):
+    """通帳残高チェック（口座の日毎残高とKuraselの残高の比較）
+    - GET: 指定された年月の日毎の計算残高と、Kuraselの入出金明細データの残高（その日の最後のデータ）を表示する。
+    - POST: 残高の判明している基準日と残高を口座の開始日・開始残高に設定し、日毎残高を計算し直す。
+    """
+
+    template_name = "record/account_balance.html"
+    form_class = RecalcBalanceForm
+    permission_required = "record.add_transaction"
+    raise_exception = True
+
+    def get_initial(self):
+        account = Account.objects.first()
+        if account is None:
+            return {}
+        return {"sdate": account.start_day, "balance": account.start_amount}
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        year, month = self.get_year_month_params()
+        period = Period.of(year, month)
+        # Kuraselの残高（手入力データは元データの残高を複写しているため除く）。同じ日は後に登録したデータの残高
+        kurasel = dict(
+            Transaction.objects.in_period(period)
+            .filter(is_manualinput=False, balance__isnull=False)
+            .order_by("transaction_date", "pk")
+            .values_list("transaction_date", "balance")
+        )
+        rows = AccountBalance.objects.in_period(period).order_by("account", "date")
+        context["balance_list"] = [
+            (row, kurasel.get(row.date), None if row.date not in kurasel else row.balance - kurasel[row.date])
+            for row in rows
+        ]
+        context["period_form"] = YearMonthForm(initial={"year": year, "month": month})
+        return context
+
+    def form_valid(self, form):
+        account = Account.objects.first()
+        if account is None:
+            messages.error(self.request, "口座が登録されていません。")
+            return self.form_invalid(form)
+        sdate = form.cleaned_data["sdate"]
+        account.start_day = sdate
+        account.start_amount = form.cleaned_data["balance"]
+        # 口座の保存時に日毎残高を全期間計算し直す
+        account.save()
+        messages.success(self.request, f"{sdate}の残高を基準に、通帳残高を計算し直しました。")
+        params = urlencode({"year": sdate.year, "month": sdate.month})
+        return redirect(f"{reverse('record:account_balance')}?{params}")
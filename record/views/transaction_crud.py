@@ -99,6 +99,9 @@ class TransactionUpdateView(PermissionRequiredMixin, generic.UpdateView):
         logger.info(msg)
         # データを保存。
         self.object.save()
+        # 費目・摘要を変更した場合は、支払い承認が不要になったかをコミット後に判定する
+        if {"himoku", "description"} & set(form.changed_data):
+            Transaction.apply_approval_rules_on_commit(self.object.pk)
         messages.success(self.request, "修正しました。")
         return super().form_valid(form)
 
@@ -61,7 +61,8 @@ class TransactionListView(PermissionRequiredMixin, generic.TemplateView):
         else:
             qs = qs.order_by("himoku__himoku_name", "-transaction_date", "requesters_name")
         # Kuraselの入出金明細データの合計
-        total_deposit, total_withdrawals = Transaction.total_all(qs)
+        totals = qs.totals()
+        total_deposit, total_withdrawals = totals["deposit"], totals["withdrawals"]
         # forms.pyのKeikakuListFormに初期値を設定する
         form = TransactionDisplayForm(
             initial={